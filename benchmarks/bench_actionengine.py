@@ -0,0 +1,200 @@
+"""
+ActionEngine throughput/latency benchmark
+
+Pushes synthetic pulse streams through ActionEngine.processCall and pulseCycle and reports pulses/sec,
+per-pulse latency percentiles and allocations per pulse (memory blocks that are still allocated after the run and
+the peak traced memory).
+
+Usage: python benchmarks/bench_actionengine.py [-n PULSES] [--scenario NAME] [--json]
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from harness import Harness
+
+from smartwheel.api.action import DevicePulse, PulseTypes
+
+
+def button(command="sw_btn_click"):
+    return DevicePulse(bind="button1", command=command, pulse_type=PulseTypes.BUTTON)
+
+
+def encoder(up=True, command="enc1_scroll", bind="encoder1"):
+    return DevicePulse(bind=bind, command=command + (" up" if up else " down"), pulse_type=PulseTypes.ENCODER)
+
+
+def buttonClicks(h, n):
+    """
+    Button clicks in module mode (keyAction1 -> module processKey)
+    """
+    h.setState(True)
+    return [button() for _ in range(n)], None
+
+
+def encoderBursts(h, n, burst=16):
+    """
+    Bursts of encoder detents in wheel mode, the haptics engine runs between the bursts
+    """
+    h.setState(False)
+    return [encoder(up=(i // burst) % 2 == 0) for i in range(n)], burst
+
+
+def encoderModule(h, n, burst=16):
+    """
+    Bursts of encoder detents in module mode
+    """
+    h.setState(True)
+    return [encoder(up=(i // burst) % 2 == 0) for i in range(n)], burst
+
+
+def multiEncoder(h, n, burst=16, devices=3):
+    """
+    Several encoders spinning concurrently in module mode
+    """
+    h.addDevices(devices)
+    h.setState(True)
+    return [encoder(up=(i // burst) % 2 == 0, bind="encoder" + str(i % devices + 1)) for i in range(n)], burst
+
+
+def mixed(h, n, burst=8):
+    """
+    Encoder detents and clicks while switching between wheel and module states
+    """
+    pulses = []
+    for i in range(n):
+        if i % burst == burst - 1:
+            pulses.append((i // burst) % 2 == 0)  # Switch the state
+        else:
+            pulses.append(encoder(up=i % 3 != 0, command="enc1_doubleclick_scroll"))
+    return pulses, burst
+
+
+scenarios = {
+    "buttons": buttonClicks,
+    "encoder": encoderBursts,
+    "encoder_module": encoderModule,
+    "multi_encoder": multiEncoder,
+    "mixed": mixed,
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+def runPulses(h, pulses, cycle_every, latencies=None, cycle_latencies=None):
+    """
+    Feed the pulses into the engine. Bool entries switch the wheel state
+    """
+    engine = h.engine
+    clock = time.perf_counter_ns
+
+    def cycle():
+        while engine.enablePulseCycle:
+            start = clock()
+            h.cycle()
+            end = clock()
+            if cycle_latencies is not None:
+                cycle_latencies.append(end - start)
+
+    for i, p in enumerate(pulses):
+        if type(p) is bool:
+            cycle()
+            h.setState(p)
+            continue
+
+        start = clock()
+        engine.processCall(p)
+        end = clock()
+        if latencies is not None:
+            latencies.append(end - start)
+
+        if cycle_every and i % cycle_every == cycle_every - 1:
+            cycle()
+    h.settle()
+
+
+def bench(name, n):
+    h = Harness()
+
+    # Warmup
+    pulses, cycle_every = scenarios[name](h, min(n, 1000))
+    runPulses(h, pulses, cycle_every)
+
+    pulses, cycle_every = scenarios[name](h, n)
+    n_pulses = sum(1 for p in pulses if type(p) is not bool)
+    latencies = []
+    cycles = []
+
+    gc.collect()
+    start = time.perf_counter_ns()
+    runPulses(h, pulses, cycle_every, latencies, cycles)
+    total = time.perf_counter_ns() - start
+
+    # Allocations are measured in a separate pass, tracemalloc slows everything down
+    pulses, cycle_every = scenarios[name](h, n)
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    blocks = sys.getallocatedblocks()
+    runPulses(h, pulses, cycle_every)
+    blocks = sys.getallocatedblocks() - blocks
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.enable()
+
+    latencies.sort()
+    cycles.sort()
+    h.close()
+
+    return {
+        "scenario": name,
+        "pulses": n_pulses,
+        "pulses_per_sec": n_pulses / (total / 1e9),
+        "latency_us": {p: percentile(latencies, p) / 1000 for p in (50, 90, 99)},
+        "latency_max_us": latencies[-1] / 1000 if latencies else 0.0,
+        "cycles": len(cycles),
+        "cycle_us": {p: percentile(cycles, p) / 1000 for p in (50, 90, 99)},
+        "retained_blocks_per_pulse": blocks / n_pulses,
+        "peak_traced_kib": (peak - base) / 1024,
+    }
+
+
+def report(r):
+    print(r["scenario"] + ": " + str(r["pulses"]) + " pulses, " + str(round(r["pulses_per_sec"])) + " pulses/sec")
+    print("  processCall latency (us): p50 %.1f  p90 %.1f  p99 %.1f  max %.1f" % (
+        r["latency_us"][50], r["latency_us"][90], r["latency_us"][99], r["latency_max_us"]))
+    if r["cycles"]:
+        print("  pulseCycle latency (us):  p50 %.1f  p90 %.1f  p99 %.1f  (%d cycles)" % (
+            r["cycle_us"][50], r["cycle_us"][90], r["cycle_us"][99], r["cycles"]))
+    print("  allocations: %.3f retained blocks per pulse, %.1f KiB peak traced memory" % (
+        r["retained_blocks_per_pulse"], r["peak_traced_kib"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless ActionEngine benchmark")
+    parser.add_argument("-n", type=int, default=20000, help="Number of pulses per scenario")
+    parser.add_argument("--scenario", choices=list(scenarios.keys()), action="append",
+                        help="Scenario to run (all by default)")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    results = [bench(name, args.n) for name in (args.scenario or scenarios.keys())]
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    for r in results:
+        report(r)
+
+
+if __name__ == "__main__":
+    main()
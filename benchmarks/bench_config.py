@@ -0,0 +1,105 @@
+"""
+Config lookup micro-benchmark
+
+Builds the config chain of the app from the shipped defaults (common -> canvas -> wheel) and measures the cost
+of a frame worth of `conf["key"]` lookups done by ui/wheel.py, with and without the Config read cache. Each frame
+also writes a runtime variable to the canvas config (as RootCanvas.draw does), which invalidates the cached key.
+
+Usage: python benchmarks/bench_config.py [-n FRAMES] [--json]
+"""
+import argparse
+import json
+import os
+import time
+
+from harness import DEFAULTS_DIR, application
+
+from smartwheel import config
+
+FRAME_KEYS = {
+    "cx": 11, "cy": 11, "selectionAngle": 10, "width": 6, "sectionsHideTimeout": 6, "pointerMargin": 4, "height": 4,
+    "wheelTextureColor": 3, "sectionsAnimationDuration": 3, "fixedWheelWidth": 3, "bgWheelColor": 3,
+    "shadowAnimationDuration": 2, "selectionWheelEntries": 2, "overlayCirclesWidth": 2, "overlayCirclesColor": 2,
+    "isWheelWidthFixed": 2, "wheelShadowColor": 1, "selectionWheelFG": 1, "selectionWheelBG": 1, "pointerColor": 1,
+    "overlayRectsWidth": 1, "overlayRectsOpacity": 1, "overlayRectsColor": 1, "overlayCirclesOpacity": 1,
+    "drawWheelCircle": 1, "drawOverlayRects": 1, "drawOverlayCircles": 1,
+}
+"""
+Keys read by ui/wheel.py and the number of reads per frame (static count of the draw code paths)
+"""
+
+
+def load(name):
+    with open(os.path.join(DEFAULTS_DIR, name), "r") as f:
+        return json.load(f)
+
+
+def buildChain():
+    """
+    Build common, canvas and wheel configs linked the same way as in the app, returns (common, canvas, wheel).
+    The links are weak references, all configs must be kept alive
+    """
+    common_config = config.Config(config_dict=load("common.json"), disableSaving=True)
+    canvas = config.Config(config_dict=load("config.json")["canvas"], disableSaving=True)
+    canvas.update(common_config)
+    wheel = config.Config(config_dict=load("wheel.json"), disableSaving=True)
+    wheel.update(canvas)
+    return common_config, canvas, wheel
+
+
+def frameKeys(wheel):
+    keys = []
+    for key, count in FRAME_KEYS.items():
+        if wheel.get(key) is not None:
+            keys += [key] * count
+    return keys
+
+
+def bench(n, cached):
+    config.Config.cacheReads = cached
+    _, canvas, wheel = buildChain()
+    keys = frameKeys(wheel)
+
+    clock = time.perf_counter_ns
+    frames = []
+    for i in range(n):
+        start = clock()
+        for key in keys:
+            wheel[key]
+        canvas["real_fps"] = str(i)  # Runtime variable written by RootCanvas.draw
+        frames.append(clock() - start)
+
+    config.Config.cacheReads = True
+    frames.sort()
+    return {
+        "cached": cached,
+        "frames": n,
+        "lookups_per_frame": len(keys),
+        "frame_us_p50": frames[len(frames) // 2] / 1000,
+        "frame_us_p99": frames[min(len(frames) - 1, len(frames) * 99 // 100)] / 1000,
+        "lookup_ns": sum(frames) / n / len(keys),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Config lookup micro-benchmark")
+    parser.add_argument("-n", type=int, default=20000, help="Number of frames")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    application()
+
+    results = [bench(args.n, False), bench(args.n, True)]
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    for r in results:
+        print("%-8s %d lookups per frame: frame p50 %.2f us, p99 %.2f us, %.1f ns per lookup" % (
+            "cached" if r["cached"] else "uncached", r["lookups_per_frame"], r["frame_us_p50"], r["frame_us_p99"],
+            r["lookup_ns"]))
+
+
+if __name__ == "__main__":
+    main()
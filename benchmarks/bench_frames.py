@@ -0,0 +1,197 @@
+"""
+Frame pacing benchmark: sleeping in the paint event vs FrameScheduler
+
+Runs a Qt event loop with a simulated 1 kHz encoder (every pulse requests a repaint, as ActionEngine.processCall
+does) for the scroll part of the run, followed by an animation tail and an idle part. Frames are "painted" by
+a stub window whose update() posts one coalesced paint event, like QWidget.update(). Two pacing models are compared:
+
+* sleep - the removed RootCanvas.draw code: time.sleep() of the remaining frame budget inside the paint event
+* scheduler - smartwheel.framescheduler.FrameScheduler
+
+Reports the frames per second while scrolling and while idle, the frame interval jitter, the time the GUI thread
+was blocked and how late the encoder pulses were handled.
+
+Usage: python benchmarks/bench_frames.py [--fps FPS] [--draw-ms MS] [--seconds S] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from harness import application
+
+from PyQt6.QtCore import QEventLoop, QTimer, Qt
+
+from smartwheel.framescheduler import FrameScheduler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class StubWindow:
+    """
+    update() posts one paint event until it is delivered, like QWidget.update()
+    """
+
+    def __init__(self, paint):
+        self.paint = paint
+        self.pending = False
+
+    def update(self):
+        if self.pending:
+            return
+        self.pending = True
+        QTimer.singleShot(0, self.paintEvent)
+
+    def paintEvent(self):
+        self.pending = False
+        self.paint()
+
+
+class Run:
+    """
+    One benchmark run: the encoder, the animation state and the frame statistics
+    """
+
+    def __init__(self, conf, draw_ms, scroll_s, tail_s, idle_s):
+        self.conf = conf
+        self.draw_ms = draw_ms
+        self.scroll_end = scroll_s
+        self.anim_end = scroll_s + tail_s
+        self.total = scroll_s + tail_s + idle_s
+        self.frames = []  # (time, phase)
+        self.blocked = 0.0
+        self.pulse_lateness = []
+        self.request = None
+        self.start = None
+
+    def now(self):
+        return time.perf_counter() - self.start
+
+    def phase(self, t):
+        if t < self.anim_end:
+            return "scroll"
+        return "idle"
+
+    def drawFrame(self):
+        t = self.now()
+        self.frames.append((t, self.phase(t)))
+        busy(self.draw_ms / 1000)
+        # The wheel animation keeps running for a while after the last pulse
+        if t < self.anim_end:
+            self.request()
+
+    def pulse(self):
+        t = self.now()
+        expected = self.next_pulse
+        self.pulse_lateness.append(max(t - expected, 0.0))
+        self.next_pulse = t + 0.001
+        if t < self.scroll_end:
+            self.request()
+
+    def run(self):
+        loop = QEventLoop()
+        encoder = QTimer()
+        encoder.setTimerType(Qt.TimerType.PreciseTimer)
+        encoder.setInterval(1)
+        encoder.timeout.connect(self.pulse)
+        QTimer.singleShot(int(self.total * 1000), loop.quit)
+
+        self.start = time.perf_counter()
+        self.next_pulse = 0.001
+        encoder.start()
+        loop.exec()
+        encoder.stop()
+
+    def stats(self):
+        scroll = [t for t, phase in self.frames if phase == "scroll"]
+        idle = [t for t, phase in self.frames if phase == "idle"]
+        intervals = [b - a for a, b in zip(scroll, scroll[1:])]
+        lateness = sorted(self.pulse_lateness)
+        return {
+            "scroll_fps": len(scroll) / self.anim_end,
+            "idle_fps": len(idle) / (self.total - self.anim_end),
+            "interval_ms_mean": statistics.mean(intervals) * 1000 if intervals else None,
+            "interval_ms_stdev": statistics.pstdev(intervals) * 1000 if intervals else None,
+            "gui_blocked_ms": self.blocked * 1000,
+            "pulse_late_ms_p50": lateness[len(lateness) // 2] * 1000,
+            "pulse_late_ms_p99": lateness[min(len(lateness) - 1, len(lateness) * 99 // 100)] * 1000,
+            "pulses": len(lateness),
+        }
+
+
+def runSleep(conf, args):
+    """
+    The removed pacing of RootCanvas.draw
+    """
+    run = Run(conf, args.draw_ms, args.seconds, 0.3, args.seconds)
+    state = {"start": None, "exec": 0.01}
+
+    def paint():
+        if state["start"] is not None:
+            e_time = time.perf_counter() - state["start"]
+            if conf["stabilizeFPS"]:
+                sleep = max(1 / conf["fps"] - state["exec"], 0)
+            else:
+                sleep = 1 / conf["fps"]
+            if conf["enableSleep"]:
+                time.sleep(sleep)
+                run.blocked += sleep
+            state["exec"] = 0.9 * state["exec"] + 0.1 * e_time
+        state["start"] = time.perf_counter()
+        run.drawFrame()
+
+    window = StubWindow(paint)
+    run.request = window.update
+    run.run()
+    return run.stats()
+
+
+def runScheduler(conf, args):
+    run = Run(conf, args.draw_ms, args.seconds, 0.3, args.seconds)
+    scheduler = None
+
+    def paint():
+        scheduler.frameStarted()
+        run.drawFrame()
+        scheduler.frameDone()
+
+    window = StubWindow(paint)
+    scheduler = FrameScheduler(window.update, conf)
+    run.request = scheduler.request
+    run.run()
+    return run.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame pacing benchmark")
+    parser.add_argument("--fps", type=int, default=60, help="Target frame rate")
+    parser.add_argument("--draw-ms", type=float, default=3.0, help="Simulated draw time")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Length of the scroll and of the idle part")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    application()
+    conf = {"fps": args.fps, "stabilizeFPS": True, "enableSleep": True}
+    results = {"sleep": runSleep(conf, args), "scheduler": runScheduler(conf, args)}
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    print("target %d fps, draw %.1f ms" % (args.fps, args.draw_ms))
+    for name, r in results.items():
+        print(
+            "%-9s scroll %.1f fps (interval %.2f +- %.2f ms), idle %.1f fps, GUI blocked %.0f ms, "
+            "pulse lateness p50 %.2f ms p99 %.2f ms" % (
+                name, r["scroll_fps"], r["interval_ms_mean"], r["interval_ms_stdev"], r["idle_fps"],
+                r["gui_blocked_ms"], r["pulse_late_ms_p50"], r["pulse_late_ms_p99"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Haptics trajectory benchmark and golden trace check
+
+Runs scripted impulse sequences through ActionEngine.physics_process (haptics engine) and linear_process at several
+pulseRefreshTime/linearRefreshTime values. Each engine cycle records (time, step, target, velocity, active, clicks)
+of every device, the traces are compared with the golden traces in golden/haptics.json. Reports CPU time per simulated
+second of the engine.
+
+The golden traces were recorded after the haptics engine refactoring (per-device state, struct-of-arrays state, fixed
+sub-steps), which changed the trajectories. They catch drift from the current engine, not from the feel of the
+original single-state engine.
+
+A run that is cut at MAX_TIME after the last impulse is reported as "not settled" and fails unless the golden trace
+was recorded unsettled as well.
+
+Usage: python benchmarks/bench_haptics.py [--record] [--scenario NAME] [--json] [--tolerance TOL]
+
+--record overwrites the golden traces, do it only if the change of the wheel feel is intended
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+from harness import Harness
+
+from smartwheel.api.action import DevicePulse, PulseTypes
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "haptics.json")
+
+PULSE_REFRESH = (10, 20, 50)
+"""
+pulseRefreshTime values (ms) of the physics scenarios
+"""
+
+LINEAR_REFRESH = (10, 20, 40)
+"""
+linearRefreshTime values (ms) of the linear scenarios
+"""
+
+MAX_TIME = 10000
+"""
+Simulation limit (ms) after the last impulse
+"""
+
+
+def encoder(up=True, bind="encoder1", timestamp=None):
+    return DevicePulse(bind=bind, command="enc1_scroll" + (" up" if up else " down"), pulse_type=PulseTypes.ENCODER,
+                       timestamp=timestamp)
+
+
+def impulses(t, n, period, up=True, bind="encoder1"):
+    """
+    n encoder detents starting at t ms, one per period ms
+    """
+    return [(t + i * period, "encoder", (up, bind)) for i in range(n)]
+
+
+# Scripts are lists of (time in ms, event, argument), the time does not depend on the refresh time
+
+def singleDetent():
+    """
+    One detent in wheel mode
+    """
+    return [(0, "state", False)] + impulses(0, 1, 0)
+
+
+def fastSpin():
+    """
+    Fast spin (20 detents, 15 ms apart) and a coast until the stop
+    """
+    return [(0, "state", False)] + impulses(0, 20, 15)
+
+
+def slowClicks():
+    """
+    Slow detents: the wheel settles between the clicks
+    """
+    return [(0, "state", False)] + impulses(0, 5, 400)
+
+
+def reverse():
+    """
+    Fast spin up, then down before the wheel stops
+    """
+    return [(0, "state", False)] + impulses(0, 10, 20) + impulses(250, 10, 20, up=False)
+
+
+def moduleSpin():
+    """
+    Spin of two encoders in module mode
+    """
+    return [(0, "state", True)] + impulses(0, 12, 25) + impulses(100, 6, 40, up=False, bind="encoder2")
+
+
+def accelCurve():
+    """
+    Fast spin with the acceleration curve, then slow detents (multiplier 1)
+    """
+    return [(0, "state", True)] + impulses(0, 20, 15) + impulses(3000, 4, 300)
+
+
+def linearDevice():
+    """
+    Detents of an encoder with haptics disabled (linear_process)
+    """
+    return [(0, "state", True)] + impulses(0, 3, 100, bind="encoder2")
+
+
+def linearWheel():
+    """
+    Explicit wheel turns (ActionEngine.angleChanged)
+    """
+    return [(0, "state", False), (0, "angle", True), (300, "angle", True), (1200, "angle", False)]
+
+
+# name: (script, refresh time key, refresh time values, deviceHaptics overrides)
+scenarios = {
+    "single_detent": (singleDetent, "pulseRefreshTime", PULSE_REFRESH, {}),
+    "fast_spin": (fastSpin, "pulseRefreshTime", PULSE_REFRESH, {}),
+    "slow_clicks": (slowClicks, "pulseRefreshTime", PULSE_REFRESH, {}),
+    "reverse": (reverse, "pulseRefreshTime", PULSE_REFRESH, {}),
+    "module_spin": (moduleSpin, "pulseRefreshTime", PULSE_REFRESH, {}),
+    "accel_curve": (accelCurve, "pulseRefreshTime", PULSE_REFRESH, {"encoder1": {"enableAccelCurve": True}}),
+    # Devices without haptics are advanced by linear_process in the regular engine cycles
+    "linear_device": (linearDevice, "pulseRefreshTime", PULSE_REFRESH, {"encoder2": {"enableHaptics": False}}),
+    "linear_wheel": (linearWheel, "linearRefreshTime", LINEAR_REFRESH, {}),
+}
+
+
+class ClickCounter:
+    """
+    Counts the clicks of the virtual pulses emitted by the engine
+    """
+
+    def __init__(self):
+        self.clicks = 0
+
+    def __call__(self, pulse):
+        if pulse._virtual and pulse._click:
+            self.clicks += 1
+
+
+def simulate(script, refresh_key, refresh, device_haptics):
+    """
+    Run the script, returns (trace, simulated ms, CPU ns spent in the engine, True if the engine has stopped)
+
+    The trace contains a frame per engine cycle: [time (ms), clicks, [[bind, step, target, velocity, active], ...]]
+    """
+    h = Harness()
+    h.addDevices(2)
+    engine = h.engine
+    acceleration = engine.conf["acceleration"]
+    acceleration["fixedDeltaTime"] = True  # angleChanged runs a cycle without the explicit delta
+    acceleration[refresh_key] = refresh
+    engine.conf["deviceHaptics"].update(device_haptics)
+    engine.updateHapticsConf()
+
+    counter = ClickCounter()
+    engine.callAction.connect(counter)
+
+    events = sorted(script, key=lambda e: e[0])
+    last_event = events[-1][0]
+    trace = []
+    now = 0
+    cpu = 0
+    i = 0
+
+    while True:
+        start = time.process_time_ns()
+        while i < len(events) and events[i][0] <= now:
+            _, event, arg = events[i]
+            if event == "state":
+                h.setState(arg)
+            elif event == "encoder":
+                # Pulses are stamped with the simulated time (acceleration curve)
+                engine.processCall(encoder(*arg, timestamp=events[i][0] * 1000000))
+            elif event == "angle":
+                engine.angleChanged(arg)
+            i += 1
+
+        active = engine.enablePulseCycle
+        if active:
+            h.cycle()
+        cpu += time.process_time_ns() - start
+
+        if active:
+            trace.append([now, counter.clicks, sorted(
+                [str(key), round(meta.step, 6), round(meta.target, 6), round(meta.acceleration, 6), meta.active]
+                for key, meta in engine.accelMeta.items())])
+            counter.clicks = 0
+
+        if i == len(events) and not engine.enablePulseCycle or now > last_event + MAX_TIME:
+            break
+        # Cycles run with the nominal refresh time (harness.cycle)
+        if engine.linear_mode_enabled:
+            now += acceleration["linearRefreshTime"]
+        else:
+            now += acceleration["pulseRefreshTime"]
+
+    settled = not engine.enablePulseCycle
+    h.close()
+    return trace, now, cpu, settled
+
+
+def summarize(trace, sim_ms, settled):
+    """
+    Stop time and total clicks of the trace
+    """
+    return {"stop_ms": sim_ms, "settled": settled, "clicks": sum(frame[1] for frame in trace), "frames": len(trace)}
+
+
+def compare(golden, trace, settled, tolerance):
+    """
+    Find the first frame that differs from the golden trace, returns None if the traces match
+
+    Parameters
+    ==========
+    golden
+        Golden entry: {"settled": bool, "frames": trace}
+    trace
+        Recorded trace
+    settled
+        True if the engine has stopped before MAX_TIME
+    tolerance
+        Tolerance of the float values
+    """
+    if golden["settled"] != settled:
+        return "not settled" if not settled else "settled, the golden trace is not"
+
+    golden = golden["frames"]
+    if len(golden) != len(trace):
+        return "length " + str(len(trace)) + " != " + str(len(golden))
+
+    for g, t in zip(golden, trace):
+        if g[0] != t[0] or g[1] != t[1] or len(g[2]) != len(t[2]):
+            return "frame at " + str(t[0]) + " ms: " + str(t[:2]) + " != " + str(g[:2])
+        for gd, td in zip(g[2], t[2]):
+            if gd[0] != td[0] or gd[4] != td[4] or \
+                    any(not math.isclose(a, b, rel_tol=tolerance, abs_tol=tolerance) for a, b in zip(gd[1:4], td[1:4])):
+                return "frame at " + str(t[0]) + " ms: " + str(td) + " != " + str(gd)
+    return None
+
+
+def writeGolden(golden):
+    # One trace per line keeps the diffs of the golden file readable
+    os.makedirs(os.path.dirname(GOLDEN_FILE), exist_ok=True)
+    with open(GOLDEN_FILE, "w") as f:
+        f.write("{\n")
+        for i, (key, trace) in enumerate(sorted(golden.items())):
+            f.write("    " + json.dumps(key) + ": " + json.dumps(trace, separators=(",", ":")))
+            f.write(",\n" if i < len(golden) - 1 else "\n")
+        f.write("}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Haptics trajectory benchmark and golden trace check")
+    parser.add_argument("--record", action="store_true", help="Overwrite the golden traces")
+    parser.add_argument("--scenario", choices=list(scenarios.keys()), action="append",
+                        help="Scenario to run (all by default)")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Tolerance of the float values")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    golden = {}
+    if os.path.exists(GOLDEN_FILE):
+        with open(GOLDEN_FILE, "r") as f:
+            golden = json.load(f)
+
+    results = []
+    failed = False
+    for name in (args.scenario or scenarios.keys()):
+        script, refresh_key, refresh_values, device_haptics = scenarios[name]
+        for refresh in refresh_values:
+            key = name + "@" + str(refresh)
+            trace, sim_ms, cpu, settled = simulate(script(), refresh_key, refresh, device_haptics)
+
+            if args.record:
+                golden[key] = {"settled": settled, "frames": trace}
+                status = "recorded"
+            elif key not in golden:
+                status = "no golden trace"
+                failed = True
+            else:
+                diff = compare(golden[key], trace, settled, args.tolerance)
+                status = "ok" if diff is None else "MISMATCH " + diff
+                failed = failed or diff is not None
+
+            results.append(dict(summarize(trace, sim_ms, settled), scenario=key, status=status,
+                                cpu_ms_per_sim_sec=cpu / 1e6 / max(sim_ms / 1000, 1e-3)))
+
+    if args.record:
+        writeGolden(golden)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for r in results:
+            stop = ("stop %5d ms" if r["settled"] else "not settled (cut at %d ms)") % r["stop_ms"]
+            print("%-22s %s, %3d clicks, %4d frames, %7.3f ms CPU per simulated second: %s" % (
+                r["scenario"], stop, r["clicks"], r["frames"], r["cpu_ms_per_sim_sec"], r["status"]))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Input queue benchmark and policy check
+
+Checks the PulseQueue policies on scripted pulse sequences (a single late detent is delivered, coalesced detents keep
+their step count, stale `latest` pulses are dropped only with max_age set) and measures emit/drain throughput of an
+encoder burst. Exits with 1 if a check fails.
+
+Usage: python benchmarks/bench_queue.py [-n PULSES] [--burst N] [--json]
+"""
+import argparse
+import json
+import sys
+import time
+
+from harness import application
+
+from smartwheel.api.action import DevicePulse, PulseTypes
+from smartwheel.pulsequeue import PulseQueue, QueuePolicy
+
+MS = 1000000
+
+
+def encoder(timestamp, up=True, command="enc1_scroll", bind="encoder1"):
+    return DevicePulse(bind=bind, command=command + (" up" if up else " down"), pulse_type=PulseTypes.ENCODER,
+                       up=up, timestamp=timestamp)
+
+
+def button(timestamp, command="sw_btn_click"):
+    return DevicePulse(bind="button1", command=command, pulse_type=PulseTypes.BUTTON, timestamp=timestamp)
+
+
+def steps(pulses):
+    return [(p.command, p.steps) for p in pulses]
+
+
+def checkLateDetent():
+    """
+    A single detent captured long before drain() reaches the engine, even with max_age set
+    """
+    queue = PulseQueue(max_age=250)
+    queue.emit(encoder(time.monotonic_ns() - 1000 * MS))
+    result = steps(queue.drain())
+    return result == [("enc1_scroll up", 1)], result
+
+
+def checkDefaultNoAge():
+    """
+    max_age is off by default, a stale `latest` pulse is delivered
+    """
+    queue = PulseQueue(policies={"encoder1.enc1_scroll up": QueuePolicy.LATEST})
+    queue.emit(encoder(time.monotonic_ns() - 1000 * MS))
+    result = steps(queue.drain())
+    return result == [("enc1_scroll up", 1)], result
+
+
+def checkCoalesce():
+    """
+    Repeated detents are merged with the step count, the direction change starts a new pulse
+    """
+    queue = PulseQueue(max_age=250)
+    now = time.monotonic_ns() - 1000 * MS
+    for i in range(5):
+        queue.emit(encoder(now + i * MS))
+    queue.emit(encoder(now + 5 * MS, up=False))
+    queue.emit(encoder(now + 6 * MS, up=False))
+    result = steps(queue.drain())
+    return result == [("enc1_scroll up", 5), ("enc1_scroll down", 2)], result
+
+
+def checkStaleLatest():
+    """
+    With max_age set, a stale `latest` pulse is dropped, the coalesced detents around it are merged
+    """
+    queue = PulseQueue(max_age=250, policies={"encoder2": QueuePolicy.LATEST})
+    now = time.monotonic_ns() - 1000 * MS
+    queue.emit(encoder(now))
+    queue.emit(encoder(now + MS, bind="encoder2", command="enc2_scroll"))
+    queue.emit(encoder(now + 2 * MS))
+    queue.emit(encoder(now + 3 * MS))
+    result = steps(queue.drain())
+    return result == [("enc1_scroll up", 3)] and queue.stale == 1, result
+
+
+def checkButtons():
+    """
+    Buttons are never merged or dropped
+    """
+    queue = PulseQueue(size=1, max_age=250)
+    now = time.monotonic_ns() - 1000 * MS
+    for i in range(3):
+        queue.emit(button(now + i * MS))
+    result = steps(queue.drain())
+    return result == [("sw_btn_click", 1)] * 3, result
+
+
+checks = {
+    "late_detent": checkLateDetent,
+    "default_no_age": checkDefaultNoAge,
+    "coalesce": checkCoalesce,
+    "stale_latest": checkStaleLatest,
+    "buttons": checkButtons,
+}
+
+
+def throughput(n, burst):
+    """
+    Emit n encoder pulses in bursts (alternating direction every 3rd pulse) and drain after each burst,
+    returns (emitted pulses per second, drained pulses)
+    """
+    queue = PulseQueue()
+    now = time.monotonic_ns()
+    pulses = [encoder(now + i * MS, up=i % 3 != 0) for i in range(n)]
+    drained = 0
+    start = time.perf_counter()
+    for i in range(0, n, burst):
+        for pulse in pulses[i:i + burst]:
+            queue.emit(pulse)
+        drained += len(queue.drain())
+    return n / (time.perf_counter() - start), drained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input queue benchmark and policy check")
+    parser.add_argument("-n", type=int, default=200000, help="Number of pulses")
+    parser.add_argument("--burst", type=int, default=16, help="Pulses emitted between two drains")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    application()
+
+    results = {"checks": {}}
+    failed = False
+    for name, check in checks.items():
+        ok, result = check()
+        results["checks"][name] = {"ok": ok, "result": result}
+        failed = failed or not ok
+
+    rate, drained = throughput(args.n, args.burst)
+    results["pulses_per_sec"] = rate
+    results["drained"] = drained
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for name, r in results["checks"].items():
+            print("%-16s %s" % (name, "ok" if r["ok"] else "FAILED " + str(r["result"])))
+        print("emit/drain: %.0f pulses/sec, %d of %d pulses drained (burst %d)" % (rate, drained, args.n, args.burst))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
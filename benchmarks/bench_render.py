@@ -0,0 +1,263 @@
+"""
+Wheel render benchmark: static layer cache vs direct drawing
+
+Builds the wheel UI element (ui/wheel.py) from the shipped defaults with stub canvas/window objects and renders
+frames into an offscreen QImage with the layer cache (`renderCache`) disabled and enabled, in two scenarios: idle
+(the wheel is open and does not move, the common case) and scroll (the angle changes every frame, the rotating parts
+are drawn directly). Reports ms per frame, the number of layer renders and the largest per-channel pixel difference
+between the two paths for the same frames. Exits with 1 if the difference exceeds --max-diff.
+
+The module scenario compares a full repaint with a repaint of the dirty region of the displayed module only
+(a midi-like indicator in the wheel center), as RootCanvas does when nothing else changes. Qt limits the painting
+of a partial update to the region, the benchmark clips the painter the same way.
+
+Usage: python benchmarks/bench_render.py [-n FRAMES] [--dpr RATIO] [--max-diff VALUE] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import weakref
+
+from harness import BASEDIR, DEFAULTS_DIR, application
+
+import numpy as np
+from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QColor, QImage, QPainter, QRegion
+
+from smartwheel import common, config
+from smartwheel.api.app import Classes, Common
+from smartwheel.ui.base import BaseUIElem
+
+
+class StubWindow:
+    def __init__(self, dpr):
+        self.dpr = dpr
+
+    def devicePixelRatio(self):
+        return self.dpr
+
+
+class StubCanvas:
+    """
+    Replacement of canvas.RootCanvas, the wheel reads only the brushes. The pattern fallback of
+    UIElem.drawWheelDisk is used, so the benchmark does not depend on the contour background
+    """
+
+    def __init__(self):
+        self.brushes = {}
+        self.paint_region = None
+
+
+class StubModule:
+    def __init__(self, icon):
+        self.icon_path = icon
+
+    def draw(self, qp, offset=None):
+        pass
+
+
+class IndicatorModule(BaseUIElem):
+    """
+    Module with dirty tracking that draws a circle in the wheel center, like ui/midi.py
+    """
+
+    dirtyTracking = True
+
+    def __init__(self, conf):
+        super().__init__()
+        self.conf = conf
+        self.icon_path = None
+        self.cur = 0
+
+    def boundingRect(self):
+        return QRect(self.conf["cx"] - 33, self.conf["cy"] - 33, 67, 67)
+
+    def step(self):
+        self.cur = (self.cur + 1) % 128
+        self.markDirty()
+
+    def draw(self, qp, offset=None):
+        qp.setBrush(QColor("#ffffff"))
+        qp.drawEllipse(QRect(self.conf["cx"] - self.cur // 4, self.conf["cy"] - self.cur // 4,
+                             self.cur // 2, self.cur // 2))
+
+
+def canvasConfig():
+    """
+    Canvas config with the geometry variables set the same way as in WConfig.processConfig
+    """
+    with open(os.path.join(DEFAULTS_DIR, "config.json"), "r") as f:
+        main = json.load(f)
+    with open(os.path.join(DEFAULTS_DIR, "common.json"), "r") as f:
+        canvas = json.load(f)
+    canvas.update(main["canvas"])
+
+    geometry = main["window"]["geometry"]
+    padding = main["window"]["padding"]
+    canvas["width"] = geometry[2] - padding * 2
+    canvas["height"] = geometry[3] - padding * 2
+    canvas["cx"] = geometry[2] // 2
+    canvas["cy"] = geometry[3] // 2
+    canvas["corner_x"] = padding
+    canvas["corner_y"] = padding
+    canvas["iconsFolder"] = os.path.join(BASEDIR, canvas["iconsFolder"])
+    return config.Config(config_dict=canvas, disableSaving=True), geometry[2], geometry[3]
+
+
+def renderFrames(wheel, n, size, dpr, cached, scroll):
+    """
+    Render n frames, returns (ms per frame, layer renders, first frames as a list of numpy arrays)
+    """
+    wheel.conf["renderCache"] = cached
+    for layer in wheel.layers.values():
+        layer.invalidate()
+        layer.renders = 0
+
+    image = QImage(int(size[0] * dpr), int(size[1] * dpr), QImage.Format.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(dpr)
+    start_angle = float(wheel.conf["selectionAngle"])
+
+    frames = []
+    total = 0
+    for i in range(n):
+        if scroll:
+            wheel._angle = start_angle + (i % 360) * 1.5
+        image.fill(QColor(0, 0, 0, 0))
+        start = time.perf_counter_ns()
+        qp = QPainter(image)
+        qp.setRenderHint(QPainter.RenderHint.Antialiasing)
+        wheel.draw(qp)
+        qp.end()
+        total += time.perf_counter_ns() - start
+        if i < 8:
+            ptr = image.constBits()
+            ptr.setsize(image.sizeInBytes())
+            frames.append(np.frombuffer(ptr, np.uint8).astype(np.int16).copy())
+    renders = {name: layer.renders for name, layer in wheel.layers.items()}
+    wheel._angle = start_angle
+    return total / n / 1e6, renders, frames
+
+
+def renderModuleFrames(wheel, canvas, module, n, size, dpr, partial):
+    """
+    Render n frames of the module changes with the layer cache, returns ms per frame. The wheel has selected the module
+    """
+    wheel.conf["renderCache"] = True
+    image = QImage(int(size[0] * dpr), int(size[1] * dpr), QImage.Format.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(dpr)
+    image.fill(QColor(0, 0, 0, 0))
+
+    total = 0
+    for i in range(n):
+        module.step()
+        region = module.repaintRegion() if partial else None
+        start = time.perf_counter_ns()
+        qp = QPainter(image)
+        qp.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if region is not None:
+            # Qt clears and clips the updated region of a translucent window
+            qp.setClipRegion(region)
+            qp.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            qp.fillRect(region.boundingRect(), QColor(0, 0, 0, 0))
+            qp.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        canvas.paint_region = region
+        wheel.draw(qp)
+        qp.end()
+        total += time.perf_counter_ns() - start
+        module.markClean()
+    canvas.paint_region = None
+    return total / n / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wheel render benchmark")
+    parser.add_argument("-n", type=int, default=500, help="Number of frames")
+    parser.add_argument("--dpr", type=float, default=1.0, help="Device pixel ratio")
+    parser.add_argument("--max-diff", type=int, default=4,
+                        help="Largest allowed per-channel pixel difference between the cached and direct drawing")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    app = application()
+    tmpdir = tempfile.TemporaryDirectory(prefix="smartwheel-bench-")
+    Common.Basedir = BASEDIR
+    common.defaults_manager.postInit(tmpdir.name, DEFAULTS_DIR)
+
+    window = StubWindow(args.dpr)
+    canvas = StubCanvas()
+    Classes.MainWindow = weakref.ref(window)
+
+    canvas_conf, width, height = canvasConfig()
+    icons = ["folder.svg", "hue.svg", "disc.svg", None]
+    modules = [{"name": "ui.bench", "class": StubModule(icons[i % len(icons)])}
+               for i in range(canvas_conf["selectionWheelEntries"])]
+
+    from smartwheel.ui.wheel import UIElem
+
+    wheel = UIElem(os.path.join(tmpdir.name, "wheel.json"), canvas_conf, modules, lambda: None,
+                   weakref.ref(canvas))
+    wheel.conf.disableSaving = True
+
+    results = {"frames": args.n, "dpr": args.dpr}
+    for scenario in ("idle", "scroll"):
+        scroll = scenario == "scroll"
+        direct_ms, _, direct = renderFrames(wheel, args.n, (width, height), args.dpr, False, scroll)
+        cached_ms, renders, cached = renderFrames(wheel, args.n, (width, height), args.dpr, True, scroll)
+        results[scenario] = {
+            "direct_ms": direct_ms,
+            "cached_ms": cached_ms,
+            "speedup": direct_ms / cached_ms,
+            "layer_renders": renders,
+            "max_pixel_diff": int(max(np.abs(a - b).max() for a, b in zip(direct, cached))),
+            "mean_pixel_diff": float(np.mean([np.abs(a - b).mean() for a, b in zip(direct, cached)])),
+        }
+
+    module = IndicatorModule(wheel.conf)
+    wheel.modules[0]["class"] = module
+    wheel.sections[0].reload_module(wheel.modules[0])
+    wheel.cur_section = 0
+    full_ms = renderModuleFrames(wheel, canvas, module, args.n, (width, height), args.dpr, False)
+    partial_ms = renderModuleFrames(wheel, canvas, module, args.n, (width, height), args.dpr, True)
+    rect = module.boundingRect()
+    results["module"] = {
+        "full_ms": full_ms,
+        "partial_ms": partial_ms,
+        "speedup": full_ms / partial_ms,
+        "area": rect.width() * rect.height() / (width * height),
+    }
+    tmpdir.cleanup()
+
+    failed = [scenario for scenario in ("idle", "scroll") if results[scenario]["max_pixel_diff"] > args.max_diff]
+    results["failed"] = failed
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        printResults(results)
+
+    if failed:
+        sys.exit(1)
+
+
+def printResults(results):
+    """
+    Print the results as text
+    """
+
+    print("%d frames at dpr %.1f" % (results["frames"], results["dpr"]))
+    for scenario in ("idle", "scroll"):
+        r = results[scenario]
+        print("%-6s direct %.3f ms, cached %.3f ms per frame (%.1fx); pixel diff max %d, mean %.4f%s" % (
+            scenario, r["direct_ms"], r["cached_ms"], r["speedup"], r["max_pixel_diff"], r["mean_pixel_diff"],
+            " - DIFFERS" if scenario in results["failed"] else ""))
+        print("       layer renders: " + ", ".join("%s %d" % item for item in r["layer_renders"].items()))
+    r = results["module"]
+    print("module full repaint %.3f ms, dirty region (%.1f%% of the window) %.3f ms per frame (%.1fx)" % (
+        r["full_ms"], r["area"] * 100, r["partial_ms"], r["speedup"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Config storage benchmark: json files vs SQLite
+
+Copies the shipped default configs into a temporary config dir (several copies of each file), then measures:
+loading all configs (plain json, json through the snapshot cache, SQLite) and saving one changed key per config
+(atomic json rewrite of the whole file vs SQLite row update).
+
+Usage: python benchmarks/bench_storage.py [-n ROUNDS] [--copies N] [--json]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from harness import DEFAULTS_DIR
+
+from smartwheel.configsnapshot import SnapshotCache
+from smartwheel.storage import JsonStorage, SqliteStorage
+
+
+def buildConfigDir(root, copies):
+    """
+    Copy the default configs into root, returns the list of the config files
+    """
+    paths = []
+    for src in glob.glob(os.path.join(DEFAULTS_DIR, "**", "*.json"), recursive=True):
+        with open(src, "r") as f:
+            if not isinstance(json.load(f), dict):
+                continue
+        rel = os.path.relpath(src, DEFAULTS_DIR)
+        for i in range(copies):
+            dst = os.path.join(root, str(i), rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy(src, dst)
+            paths.append(dst)
+    return paths
+
+
+def timeLoad(storage, paths, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        for path in paths:
+            storage.read(path)
+        times.append(time.perf_counter_ns() - start)
+    return min(times) / 1e6
+
+
+def timeSave(storage, paths, rounds):
+    """
+    Change one top-level key of every config and save it, returns ms per save
+    """
+    configs = [(path, storage.read(path)) for path in paths]
+    start = time.perf_counter_ns()
+    for i in range(rounds):
+        for path, data in configs:
+            data["benchmarkCounter"] = i
+            storage.write(path, data)
+    return (time.perf_counter_ns() - start) / 1e6 / rounds / len(configs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Config storage benchmark")
+    parser.add_argument("-n", type=int, default=20, help="Number of rounds")
+    parser.add_argument("--copies", type=int, default=4, help="Copies of each default config")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="smartwheel_storage_")
+    try:
+        paths = buildConfigDir(root, args.copies)
+
+        plain = JsonStorage()
+        snapshot = SnapshotCache()
+        snapshot.open(os.path.join(root, "snapshot.marshal"))
+        cached = JsonStorage(snapshot)
+        sqlite = SqliteStorage(os.path.join(root, "config.sqlite"), root)
+
+        start = time.perf_counter_ns()
+        sqlite.importJson(paths)
+        import_ms = (time.perf_counter_ns() - start) / 1e6
+        timeLoad(cached, paths, 1)  # Fill the snapshot
+
+        results = {
+            "files": len(paths),
+            "import_sqlite_ms": import_ms,
+            "load_json_ms": timeLoad(plain, paths, args.n),
+            "load_snapshot_ms": timeLoad(cached, paths, args.n),
+            "load_sqlite_ms": timeLoad(sqlite, paths, args.n),
+            "save_json_ms": timeSave(plain, paths, args.n),
+            "save_sqlite_ms": timeSave(sqlite, paths, args.n),
+        }
+        sqlite.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    print("%d config files, SQLite import %.2f ms" % (results["files"], results["import_sqlite_ms"]))
+    print("load all:  json %.2f ms, json+snapshot %.2f ms, sqlite %.2f ms" % (
+        results["load_json_ms"], results["load_snapshot_ms"], results["load_sqlite_ms"]))
+    print("save one changed key: json (atomic rewrite, fsync) %.3f ms, sqlite (row update, WAL) %.3f ms per config" % (
+        results["save_json_ms"], results["save_sqlite_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Headless ActionEngine harness for benchmarks
+
+Builds ActionEngine with stub RootCanvas/WheelUi objects and the shipped defaults. No device or display is needed,
+Qt runs on the offscreen platform
+"""
+import json
+import os
+import sys
+import tempfile
+import weakref
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from PyQt6.QtWidgets import QApplication
+
+from smartwheel import common, config
+from smartwheel.api.app import Classes, Common
+
+BASEDIR = os.path.join(SRC_DIR, "smartwheel")
+DEFAULTS_DIR = os.path.join(BASEDIR, "defaults")
+
+_app = None
+
+
+def application():
+    """
+    Get the QApplication instance, it must outlive all harnesses
+    """
+    global _app
+    if _app is None:
+        _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+class StubModule:
+    """
+    Wheel module that counts processKey calls
+    """
+
+    def __init__(self):
+        self.icon_path = None
+        self.calls = 0
+        self.conf = {
+            "actions": {
+                "scroll.up": [{"action": "custom", "repeat": 0}],
+                "scroll.down": [{"action": "custom", "repeat": 0}],
+                "scroll2.up": [{"action": "custom", "repeat": 0}],
+                "scroll2.down": [{"action": "custom", "repeat": 0}],
+                "keyAction1": [{"action": "custom", "repeat": 0}],
+            }
+        }
+
+    def processKey(self, event, pulse):
+        self.calls += 1
+
+    def draw(self, qp, offset=None):
+        pass
+
+
+class StubWheel:
+    """
+    Replacement of ui.wheel.UIElem without any rendering or animations
+    """
+
+    def __init__(self):
+        self.is_sections_hidden = False
+        self.is_sections_anim_running = False
+        self.is_anim_running = False
+        self.cur_section = 0
+        self.calls = 0
+
+    def getCurModule(self):
+        return self.cur_section
+
+    def processKey(self, pulse):
+        self.calls += 1
+
+    def selectModule(self):
+        self.is_sections_hidden = True
+
+    def openWheel(self):
+        self.is_sections_hidden = False
+
+
+class StubCanvas:
+    """
+    Replacement of canvas.RootCanvas
+    """
+
+    def __init__(self, n_modules):
+        self.common_config = {"selectionWheelEntries": 10}
+        self.cur_wheel_modules = [
+            {"name": "ui.bench" + str(i), "title": "Bench " + str(i), "class": StubModule()}
+            for i in range(n_modules)
+        ]
+        self.updates = 0
+
+    def update_func(self):
+        self.updates += 1
+
+    def requestFrame(self):
+        self.updates += 1
+
+
+class Harness:
+    """
+    Owns the engine and all stub objects (api.app.Classes only stores weak references)
+    """
+
+    def __init__(self, n_modules=4):
+        self.app = application()
+        self.tmpdir = tempfile.TemporaryDirectory(prefix="smartwheel-bench-")
+
+        Common.Basedir = BASEDIR
+        common.defaults_manager.postInit(self.tmpdir.name, DEFAULTS_DIR)
+
+        with open(os.path.join(DEFAULTS_DIR, "config.json"), "r") as f:
+            canvas = json.load(f)["canvas"]
+
+        # Keypress actions would send real keystrokes
+        canvas["actionModulesLoad"] = [i for i, m in enumerate(canvas["actionModules"])
+                                       if m["name"] == "actions.custom"]
+        canvas["basedir"] = BASEDIR
+        canvas["cacheDir"] = self.tmpdir.name
+        self.wconf = config.Config(config_dict=canvas, disableSaving=True)
+
+        self.canvas = StubCanvas(n_modules)
+        self.wheel = StubWheel()
+        Classes.RootCanvas = weakref.ref(self.canvas)
+        Classes.WheelUi = weakref.ref(self.wheel)
+
+        from smartwheel.actionengine import ActionEngine
+
+        self.engine = ActionEngine(os.path.join(self.tmpdir.name, "actionengine.json"), self.wconf)
+        Classes.ActionEngine = weakref.ref(self.engine)
+
+    def addDevices(self, n):
+        """
+        Register encoder2..encoderN binds with the same commands as encoder1
+
+        Parameters
+        ==========
+        n
+            Total number of encoders
+        """
+        for i in range(2, n + 1):
+            self.engine.conf["commandBind"]["encoder" + str(i)] = self.engine.conf["commandBind"]["encoder1"]
+        self.engine.parseCommandBinds()
+
+    def setState(self, module_mode):
+        """
+        Open or close the wheel
+
+        Parameters
+        ==========
+        module_mode
+            True if a module is selected (sections hidden)
+        """
+        if self.wheel.is_sections_hidden == module_mode:
+            return
+        self.wheel.is_sections_hidden = module_mode
+        self.engine.wheelStateChanged(not module_mode)
+
+    def cycle(self):
+        """
+        Run one engine cycle with the nominal refresh time (independent of the wall clock)
+        """
+        acceleration = self.engine.conf["acceleration"]
+        if self.engine.linear_mode_enabled:
+            refresh = acceleration["linearRefreshTime"]
+        else:
+            refresh = acceleration["pulseRefreshTime"]
+        self.engine.pulseCycle(delta=refresh / 1000)
+
+    def settle(self, max_cycles=10000):
+        """
+        Run engine cycles until the wheel stops, returns the number of cycles
+        """
+        for i in range(max_cycles):
+            if not self.engine.enablePulseCycle:
+                return i
+            self.cycle()
+        return max_cycles
+
+    def close(self):
+        self.tmpdir.cleanup()
@@ -0,0 +1,71 @@
+"""
+Pulse trace replay
+
+Replays a trace recorded with `pulseTraceFile` (pulsetrace.PulseRecorder) into the headless engine of the benchmark
+harness with pulsetrace.PulseReplayer. By default the trace is replayed as fast as possible with simulated engine
+cycles between the pulses (deterministic), --speed replays it in real time on the Qt event loop. Reports the number
+of replayed pulses, the wheel/module calls, the final wheel state and the replay time.
+
+Usage: python benchmarks/replay_trace.py TRACE [--speed SPEED] [--modules N] [--json]
+"""
+import argparse
+import json
+import time
+
+from harness import Harness
+
+from PyQt6.QtCore import QEventLoop
+
+from smartwheel.pulsetrace import PulseReplayer
+
+
+def replay(harness, filename, speed):
+    """
+    Replay the trace, returns (replayed pulses, seconds)
+    """
+    replayer = PulseReplayer(harness.engine, filename, speed=speed)
+    start = time.perf_counter()
+    if speed:
+        loop = QEventLoop()
+        replayer.finished.connect(loop.quit)
+        replayer.start()
+        if replayer.pos < len(replayer.trace):
+            loop.exec()
+        harness.settle()
+    else:
+        replayer.start()
+    return replayer.pos, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pulse trace replay")
+    parser.add_argument("trace", help="Trace file")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Playback speed multiplier, 0 - as fast as possible (default)")
+    parser.add_argument("--modules", type=int, default=4, help="Number of stub wheel modules")
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args()
+
+    harness = Harness(args.modules)
+    pulses, seconds = replay(harness, args.trace, args.speed)
+    results = {
+        "pulses": pulses,
+        "seconds": seconds,
+        "wheel_calls": harness.wheel.calls,
+        "module_calls": sum(m["class"].calls for m in harness.canvas.cur_wheel_modules),
+        "module_mode": harness.wheel.is_sections_hidden,
+        "section": harness.wheel.cur_section,
+    }
+    harness.close()
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    print("%d pulses replayed in %.3f s: %d wheel calls, %d module calls, %s mode, section %d" % (
+        results["pulses"], results["seconds"], results["wheel_calls"], results["module_calls"],
+        "module" if results["module_mode"] else "wheel", results["section"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,7 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from smartwheel import common, config, gui_tools
+from smartwheel import common, config, gui_tools, storage
 from smartwheel.canvas import RootCanvas
 from smartwheel.settings import SettingsWindow
 from smartwheel.api.app import Classes, Common
@@ -50,6 +50,7 @@ class WConfig(config.Config):
         self.c_canvas = config.Config(
             config_dict=self.c["canvas"],
             varsWhitelist=["modulesLoad", "serialModulesLoad"],
+            dictOwner=self,
         )
         c_geometry = self.c["window"]["geometry"]
         self.c_canvas["width"] = c_geometry[2] - self.c["window"]["padding"] * 2
@@ -259,7 +260,7 @@ class RootWindow(QMainWindow):
         self.qp = QPainter(self)
         self.qp.setRenderHint(QPainter.RenderHint.Antialiasing)
         # self.qp.begin(self)
-        self.draw()
+        self.draw(event.region())
         self.qp.end()
 
     def mousePressEvent(self, event):
@@ -337,9 +338,11 @@ class RootWindow(QMainWindow):
         )
 
         QGuiApplication.instance().aboutToQuit.connect(self.rc.killThreads)
+        # Write the pending config files
+        QGuiApplication.instance().aboutToQuit.connect(common.config_writer.flush)
 
-    def draw(self):
-        self.rc.draw(self.qp)
+    def draw(self, region=None):
+        self.rc.draw(self.qp, region)
 
 
 def main():
@@ -357,6 +360,13 @@ def main():
 
     Common.Basedir = dirpath
 
+    # Optional single-file storage of the user configs, the json configs are imported on the first start
+    if launch_config.get("storage", "json") == "sqlite":
+        config_dir = os.path.join(dirpath, launch_config["config_dir"])
+        common.config_storage = storage.SqliteStorage(
+            os.path.join(config_dir, "config.sqlite"), config_dir, fallback=common.config_storage
+        )
+
     common.defaults_manager.postInit(
         launch_config["config_dir"], launch_config["defaults_config_dir"]
     )
@@ -366,6 +376,9 @@ def main():
         dirpath, launch_config["defaults_config_dir"]
     )
 
+    # Parsed config files are cached between the starts
+    common.config_snapshot.open(os.path.join(launch_config["config_dir"], "snapshot.marshal"))
+
     status = os.path.join(dirpath, "status.json")
     common.doctor.loadStatus(status)
 
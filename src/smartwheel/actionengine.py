@@ -1,47 +1,201 @@
 import copy
+import faulthandler
+import functools
 import importlib
 import logging
 import os
+import signal
+import struct
 import time
+import types
 import weakref
-from typing import Union
+from typing import Callable, NamedTuple, Optional, Union
 
 from PyQt6.QtCore import *
 
-from smartwheel import config, tools
+from smartwheel import common, config, flightrecorder, tools
+from smartwheel.haptics import AccelerationMeta, DetentRate, HapticsState, curveValue, parseCurve
+from smartwheel.latency import LatencyTracker
+from smartwheel.pulsequeue import PulseQueue
+from smartwheel.pulsetrace import PulseRecorder
 from smartwheel.api.app import Classes
+from smartwheel.api.settings import HandlersApi
 from smartwheel.api.action import AppState, Pulse, DevicePulse, PulseTypes, CommandActions, RotaryActions
 
 
-class AccelerationMeta:
+class BoundAction(NamedTuple):
     """
-    Internal acceleration metadata for each pulse
+    Pre-resolved commandBind action, ready to be executed
     """
 
-    def __init__(self, step, target, velocity, accel, maxvel):
-        self.step = step
-        self.target = target
-        self.velocity = velocity
-        self.acceleration = accel
-        self.maxVelocity = maxvel
+    run: Callable
+    """
+    Bound run method of the wheel action (actions/wheel)
+    """
+
+    call: Union[CommandActions, str]
+    """
+    Argument passed to the wheel action: CommandActions enum or the action name for non-core actions
+    """
+
+    action: CommandActions
+    """
+    CommandActions enum value (CommandActions.Custom for non-core actions)
+    """
+
+    repeat: int
+    """
+    Number of times to execute the action (1 + repeat)
+    """
+
+    up: Optional[bool]
+    """
+    Scroll direction set by the bind, may be None
+    """
+
+
+class CompiledCommand(NamedTuple):
+    """
+    All actions that are executed on the (bind, command, state) call
+    """
+
+    actions: tuple[BoundAction, ...]
+    """
+    Actions to execute, current state actions go first
+    """
+
+    commands: tuple[CommandActions, ...]
+    """
+    CommandActions of each action, is passed to DevicePulse.actions
+    """
+
+    up: Optional[bool]
+    """
+    Default pulse direction (first action that has the up property)
+    """
 
-    step: float = None
 
-    target: float = None
+class ModuleAction(NamedTuple):
+    """
+    Pre-resolved module action (actions folder), ready to be executed
+    """
 
-    velocity: float = None
+    run: Callable
+    """
+    Bound run method of the action
+    """
+
+    context: dict
+    """
+    Compiled copy of the action context with the module and call set
+    """
 
-    acceleration: float = None
 
-    maxVelocity: float = None
+class EngineSnapshot(NamedTuple):
+    """
+    Immutable state of the engine, published by the engine thread for the GUI
+    """
 
-    threshClick: bool = False
+    angle: float
+    """
+    Interpolated step of the last active device
+    """
+
+    velocity: float
+    """
+    Velocity of the last active device
+    """
+
+    section: int
+    """
+    Index of the selected wheel section
+    """
+
+    active: bool
+    """
+    True if the haptics engine is running
+    """
+
+
+class WheelState(NamedTuple):
+    """
+    Immutable state of the wheel UI, published by the GUI for the engine thread
+    """
+
+    sections_hidden: bool
+    """
+    True if a module is selected (module mode)
+    """
+
+    sections_anim_running: bool
+    """
+    True while the sections are being opened/closed
+    """
+
+    module_haptics: Optional[dict]
+    """
+    Copy of the haptics parameters of the current module, None if the module has none
+    """
+
+
+class ActionRunner(QObject):
+    """
+    Executes the actions on the GUI thread, the actions are queued by ActionEngine running in the engine thread
+    """
+
+    def __init__(self, latency: LatencyTracker, publish: Callable):
+        """
+        Initialize ActionRunner
+
+        Parameters
+        ==========
+        latency
+            Latency tracker of the engine
+        publish
+            Function that publishes the wheel state for the engine (ActionEngine.publishWheelState)
+        """
+        super(ActionRunner, self).__init__()
+        self.latency = latency
+        self.publish = publish
+
+    @pyqtSlot(object, object, object)
+    def runActions(self, actions: tuple, pulse: Pulse, bind: Optional[str] = None):
+        """
+        Execute the actions and refresh the canvas
+
+        Parameters
+        ==========
+        actions
+            Tuple of BoundAction
+        pulse
+            Pulse generated by the engine
+        bind
+            (Optional) Device bind of the pulse (flight recorder)
+        """
+        rec = flightrecorder.recorder
+        if rec is not None:
+            rec.begin(flightrecorder.EventKinds.ACTIONS, bind)
+
+        for act in actions:
+            for _ in range(act.repeat):
+                act.run(act.call, pulse)
+        # The actions may have changed the wheel state
+        self.publish()
+        Classes.RootCanvas().requestFrame()
+
+        if rec is not None:
+            rec.end(flightrecorder.EventKinds.ACTIONS, bind)
+
+        if pulse.timestamp is not None:
+            self.latency.dispatched(pulse.timestamp)
 
 
 class ActionEngine(QObject):
     """Modules and wheel interactions interface"""
 
     callAction = pyqtSignal(DevicePulse, name="action_call")
+    actionsReady = pyqtSignal(object, object, object)
+    engineCall = pyqtSignal(object)
 
     def __init__(self, config_file, WConfig):
         """
@@ -61,43 +215,80 @@ class ActionEngine(QObject):
         self.importConfig(config_file)
         tools.merge_dicts(self.conf, WConfig)
         self.callAction.connect(self.processCall)
+        self.pulseQueue = PulseQueue(self.conf["inputQueue"]["size"], self.conf["inputQueue"]["maxAge"],
+                                     self.conf["inputQueue"]["policies"])
+        self.pulseQueue.ready.connect(self.drainQueue)
+        self.engineCall.connect(self.runEngineCall)
+        self.latency = LatencyTracker()
+        self.runner = ActionRunner(self.latency, self.publishWheelState)
+        self.actionsReady.connect(self.runner.runActions)
+        self.engine_thread = None
+        self.threaded = False
+        self.snapshot = None
+        self.wheel_state = None  # WheelState published by the GUI, read in the engine thread
         self.actions = {}
+        self.module_bindings = weakref.WeakKeyDictionary()  # module -> (actions dict, {(call, up): ModuleActions})
+        self.bindings_modules = None  # Module list the bindings are compiled for
+        # Module configs connected to invalidateModuleBindings (by id, Config is not hashable)
+        self.bindings_configs = weakref.WeakValueDictionary()
         self.importActions()
         self.importWheelActions()
 
         self.n_positions = Classes.RootCanvas().common_config["selectionWheelEntries"]  # Current number of sections
         self.haptics = config.Config(logger=self.logger, ignoreNewVars=False, config_dict={}, disableSaving=True)
-        self.haptics.updated.connect(self.parseCommandBinds)
+        self.physics = HapticsState()
+        self.accelMeta = {}
+        self.devicePulses = {}
+        self.virtualPulses = {}  # Reusable pulses emitted by pulseCycle
+        self.detentRates = {}  # Device bind -> DetentRate
+        self.pulseClock = time.monotonic_ns  # Detent rate clock of pulses without the capture timestamp (replay)
+        self.accelCurves = {}  # Curve string -> parsed points
+        self.lastDevice = None
         self.updateModuleHaptics(True)
         self.last_state = True  # wheel
         self.linear_mode_enabled = False
-        self.angles = [0.0, 0.0]  # angles for wheel and module states
-        self.accelMeta = {}
-        self.devicePulses = {}
+        self.angles = [0.0, 0.0]  # angles for wheel and module states, module angles are stored by each device
         self.explicitPulses = {
             CommandActions.wheel: DevicePulse(bind="_none", pulse_type=PulseTypes.ENCODER,
                                               actions=[CommandActions.wheel], _virtual=True)
         }
-        self.start_time = None
+        self.last_cycle = None  # Monotonic timestamp of the last engine cycle
 
         self.modules_bind = {}
         self.loadModulesNames()
         self.cmdmap = {}
         self.commandActions = {}
+        self.commandActionsIndex = {}  # (type, name) -> commandAction
         self.buildCommandActionsCache()
         self.cmdbind = {}
+        self.bindSources = {}  # bind -> copy of the commandBind entry the bind is compiled from
+        self.dispatch = types.MappingProxyType({})
         self.parseCommandBinds()
+        common.config_manager.updated.connect(self.onConfigUpdated)
+        common.config_manager.batchUpdate.connect(self.onBatchConfigUpdated)
 
         self.accelTime = QTimer(self)
         self.accelTime.setInterval(self.conf["acceleration"]["pulseRefreshTime"])
         self.accelTime.timeout.connect(self.pulseCycle)
         self.enablePulseCycle = False
 
-        # Initialize debugging parameters
-        self.conf["debug"] = {}
-        self.conf["debugPulses"] = []
+        # Initialize debugging parameters. The engine writes them into a plain dict (it may run in its own thread),
+        # they are copied into the config on the GUI thread by publishDebug
+        self.debug = {"debug": {}, "debugPulses": [], "debug_input_blocked": False, "debugDetentRate": 0.0}
+        self.debug_lookup = ""  # debugLookupKey
+        for key, value in self.debug.items():
+            self.conf[key] = value
         self.conf["debugLookupKey"] = ""
 
+        self.conf["debugLatency"] = self.latency.summary()
+        self.conf["debugQueue"] = self.pulseQueue.stats()
+
+        self.recorder = None
+        self.initPulseRecorder()
+        self.fault_log = None
+        self.initFlightRecorder()
+        QCoreApplication.instance().aboutToQuit.connect(self.dumpLatency)
+
     def importConfig(self, config_file):
         """
         Load config file (actionengine.json)
@@ -111,11 +302,150 @@ class ActionEngine(QObject):
         # TODO (long) add multiple encoders settings
         self.conf = config.Config(
             config_file=config_file, logger=self.logger,
-            varsWhitelist=["commandBind", "acceleration", "logEngine", "debugLookupKey"]
+            varsWhitelist=["commandBind", "acceleration", "deviceHaptics", "logEngine", "debugLookupKey", "engineThread",
+                           "latencyCsvFile", "pulseTraceFile", "flightRecorder", "flightRecorderSize", "inputQueue"]
         )
         self.conf.loadConfig()
         self.conf.updated.connect(self.updateHapticsConf)
 
+    def initPulseRecorder(self):
+        """
+        Start recording device pulses to the trace file if `pulseTraceFile` is set
+        """
+        if not self.conf["pulseTraceFile"]:
+            return
+
+        filename = self.cachePath(self.conf["pulseTraceFile"])
+
+        try:
+            self.recorder = PulseRecorder(filename)
+        except OSError as e:
+            self.logger.error("Could not open pulse trace file: " + str(e))
+            return
+
+        self.logger.info("Recording pulses to " + filename)
+        QCoreApplication.instance().aboutToQuit.connect(self.recorder.close)
+
+    def initFlightRecorder(self):
+        """
+        Start the flight recorder if `flightRecorder` is enabled. The buffer of the previous session is exported
+        if the app has crashed. Fatal errors are logged by faulthandler next to the buffer, SIGUSR1 exports the trace
+        """
+        if not self.conf["flightRecorder"]:
+            return
+
+        filename = self.cachePath("flightrecorder.bin")
+        if os.path.exists(filename):
+            try:
+                data, names, clean = flightrecorder.loadBuffer(filename)
+                if not clean:
+                    crash_file = self.cachePath("flightrecorder-crash.json")
+                    flightrecorder.exportChrome(data, names, crash_file)
+                    self.logger.warning("Previous session has crashed, flight recorder trace saved to " + crash_file)
+            except (OSError, ValueError, struct.error) as e:
+                self.logger.error("Could not read the previous flight recorder buffer: " + str(e))
+
+        try:
+            flightrecorder.recorder = flightrecorder.FlightRecorder(filename, self.conf["flightRecorderSize"])
+            self.fault_log = open(self.cachePath("faulthandler.log"), "a")
+        except OSError as e:
+            self.logger.error("Could not start flight recorder: " + str(e))
+            return
+
+        faulthandler.enable(file=self.fault_log, all_threads=True)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.exportFlightRecorder())
+
+        self.logger.info("Flight recorder is enabled, send SIGUSR1 to export the trace")
+        QCoreApplication.instance().aboutToQuit.connect(self.closeFlightRecorder)
+
+    def exportFlightRecorder(self, filename=None):
+        """
+        Export the flight recorder buffer to Chrome trace JSON
+
+        Parameters
+        ==========
+        filename
+            (Optional) JSON file, flightrecorder-<time>.json in the cache dir by default
+        """
+        if flightrecorder.recorder is None:
+            self.logger.warning("Flight recorder is disabled")
+            return
+
+        if filename is None:
+            filename = self.cachePath("flightrecorder-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+        try:
+            flightrecorder.recorder.exportChrome(filename)
+        except OSError as e:
+            self.logger.error("Could not export flight recorder trace: " + str(e))
+
+    @pyqtSlot()
+    def closeFlightRecorder(self):
+        """
+        Mark the clean shutdown of the flight recorder and close the buffer and the fault log
+        """
+        if flightrecorder.recorder is None:
+            return
+        flightrecorder.recorder.close()
+        flightrecorder.recorder = None
+        faulthandler.enable()
+        self.fault_log.close()
+
+    def cachePath(self, filename):
+        """
+        Get the absolute path of the file, relative paths are resolved against the cache dir
+
+        Parameters
+        ==========
+        filename
+            File path
+        """
+        if os.path.isabs(filename):
+            return filename
+        return os.path.join(self.conf["basedir"], self.conf["cacheDir"], filename)
+
+    @pyqtSlot()
+    def dumpLatency(self):
+        """
+        Save the latency histograms to `latencyCsvFile` if it's set
+        """
+        if not self.conf["latencyCsvFile"]:
+            return
+
+        filename = self.cachePath(self.conf["latencyCsvFile"])
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            self.latency.dumpCsv(filename)
+        except OSError as e:
+            self.logger.error("Could not save latency histogram: " + str(e))
+            return
+        self.logger.info("Latency histogram saved to " + filename)
+
+    def updateLatencyDebug(self):
+        """
+        Frame has been drawn, publish the latency summary for the debugging menu (twice per second)
+        """
+        self.latency.frameDrawn()
+        self.publishDebug()
+
+        now = time.monotonic_ns()
+        if now - self.latency.last_publish < 500000000:
+            return
+        self.latency.last_publish = now
+        self.conf["debugLatency"] = self.latency.summary()
+        self.conf["debugQueue"] = self.pulseQueue.stats()
+        HandlersApi.watchDebug.emit()
+
+    def publishDebug(self):
+        """
+        Copy the debugging values of the engine into the config, must be called on the GUI thread
+        """
+        self.debug_lookup = self.conf["debugLookupKey"]
+        # The keys are never added, the engine thread only replaces the values
+        for key, value in tuple(self.debug.items()):
+            if self.conf.c.get(key) is not value:
+                self.conf[key] = value
+
     def loadModulesNames(self):
         """
         Register modules names bind (for settings)
@@ -169,68 +499,208 @@ class ActionEngine(QObject):
                                   "). Please update api.action.CommandActions")
 
             self.commandActions[self.cmdmap[act["name"]]] = act
+            self.commandActionsIndex.setdefault((act["type"], act["name"]), act)
+
+    @pyqtSlot(list)
+    def onConfigUpdated(self, key: list[str]):
+        """
+        Rebuild the command bind if it is updated from settings
+
+        Parameters
+        ==========
+        key
+            Updated nested key
+        """
+        if key and key[0] == "inputQueue":
+            self.updateQueueConf()
+            return
+        if not key or key[0] != "commandBind":
+            return
+        if len(key) > 1:
+            self.parseCommandBinds([key[1]])
+        else:
+            self.parseCommandBinds()
+
+    @pyqtSlot(list)
+    def onBatchConfigUpdated(self, keys: list[list[str]]):
+        if any(key and key[0] == "inputQueue" for key in keys):
+            self.updateQueueConf()
+        if any(key and key[0] == "commandBind" for key in keys):
+            self.parseCommandBinds()
+
+    def updateQueueConf(self):
+        """
+        Apply `inputQueue` settings to the pulse queue
+        """
+        self.pulseQueue.size = self.conf["inputQueue"]["size"]
+        self.pulseQueue.max_age = self.conf["inputQueue"]["maxAge"]
+        self.pulseQueue.setPolicies(self.conf["inputQueue"]["policies"])
 
     @pyqtSlot()
-    def parseCommandBinds(self):
+    def drainQueue(self):
         """
-        Iterate over commandBind and build cache
+        Process all pulses from the input queue (serialpipe modules)
         """
-        self.cmdbind = {}
+        for pulse in self.pulseQueue.drain():
+            self.processCall(pulse)
 
-        for bind, _ in self.conf["commandBind"].items():
-            self.cmdbind[bind] = {}
+    def parseCommandBinds(self, binds=None):
+        """
+        Rebuild the cache of the changed command binds. Binds that are equal to the compiled copy are skipped
 
-            # iterate over commands
-            for i, command in enumerate(self.conf["commandBind"][bind]):
-                if command.get("command") is None:
-                    continue
-                cmd = command["command"]
+        Parameters
+        ==========
+        binds
+            (Optional) Binds to check, all binds by default
+        """
+        commandBind = self.conf["commandBind"]
+        if binds is None:
+            binds = list(commandBind.keys()) + [bind for bind in self.bindSources if bind not in commandBind]
+
+        changed = []
+        for bind in binds:
+            source = commandBind.get(bind)
+            if source is None:
+                if bind in self.bindSources:
+                    del self.bindSources[bind]
+                    del self.cmdbind[bind]
+                    changed.append(bind)
+                continue
 
-                self.cmdbind[bind][cmd] = {}
-                # initialize action lists
-                for state in AppState:
-                    self.cmdbind[bind][cmd][state] = []
+            if bind in self.bindSources and self.bindSources[bind] == source:
+                continue
 
-                if self.conf["commandBind"][bind][i].get("actions") is None:
-                    self.logger.warning("Command " + bind + "." + cmd + " has no actions")
-                    continue
+            self.bindSources[bind] = copy.deepcopy(source)
+            self.cmdbind[bind] = self.parseBind(bind, source)
+            changed.append(bind)
+
+        if changed:
+            self.compileDispatchTable(changed)
 
-                # iterate over actions
-                for action in self.conf["commandBind"][bind][i]["actions"]:
-                    # Get corresponding commandAction
-                    act = copy.deepcopy(action)
-                    act["wheel"] = self.getWheelAction(act)
-
-                    # check where to call it
-                    onState = act.get("onState")
-                    checkState = act.get("checkState", True)
-
-                    # check for default
-                    if act.get("mode") is None:
-                        if act["wheel"].get("default", "wheel") == "wheel":
-                            act["mode"] = "wheel"
-                        elif act["wheel"]["default"] == "module":
-                            act["mode"] = "module"
-                        else:
-                            if act.get("checkState") is None:
-                                checkState = False
-
-                    # call anywhere
-                    if not checkState:
-                        self.cmdbind[bind][cmd][AppState.ANY].append(act)
-                    elif onState is None:
-                        # check by action mode
-
-                        if act.get("mode", "wheel") == "wheel":
-                            self.cmdbind[bind][cmd][AppState.WHEEL].append(act)
-                        else:
-                            self.cmdbind[bind][cmd][AppState.MODULE].append(act)
+    def parseBind(self, bind, source):
+        """
+        Sort the actions of the bind by application state, returns {command: {AppState: [action, ...]}}
+
+        Parameters
+        ==========
+        bind
+            Bind name (device)
+        source
+            List of commands from commandBind
+        """
+        commands = {}
+
+        # iterate over commands
+        for command in source:
+            if command.get("command") is None:
+                continue
+            cmd = command["command"]
+
+            states = {state: [] for state in AppState}
+            commands[cmd] = states
+
+            if command.get("actions") is None:
+                self.logger.warning("Command " + bind + "." + cmd + " has no actions")
+                continue
+
+            # iterate over actions
+            for action in command["actions"]:
+                # Get corresponding commandAction
+                act = dict(action)
+                act["wheel"] = self.getWheelAction(act)
+
+                # check where to call it
+                onState = act.get("onState")
+                checkState = act.get("checkState", True)
+
+                # check for default
+                if act.get("mode") is None:
+                    if act["wheel"].get("default", "wheel") == "wheel":
+                        act["mode"] = "wheel"
+                    elif act["wheel"]["default"] == "module":
+                        act["mode"] = "module"
                     else:
-                        # check by action onState
-                        if onState == "wheel":
-                            self.cmdbind[bind][cmd][AppState.WHEEL].append(act)
-                        else:
-                            self.cmdbind[bind][cmd][AppState.MODULE].append(act)
+                        if act.get("checkState") is None:
+                            checkState = False
+
+                # call anywhere
+                if not checkState:
+                    states[AppState.ANY].append(act)
+                elif onState is None:
+                    # check by action mode
+
+                    if act.get("mode", "wheel") == "wheel":
+                        states[AppState.WHEEL].append(act)
+                    else:
+                        states[AppState.MODULE].append(act)
+                else:
+                    # check by action onState
+                    if onState == "wheel":
+                        states[AppState.WHEEL].append(act)
+                    else:
+                        states[AppState.MODULE].append(act)
+
+        return commands
+
+    def compileAction(self, act):
+        """
+        Resolve cmdbind action into BoundAction, returns None if the action cannot be executed
+
+        Parameters
+        ==========
+        act
+            Action from cmdbind cache
+        """
+        if act.get("wheel") is None:
+            return None
+
+        wheel_action = self.wheel_actions.get(act["wheel"]["type"])
+        if wheel_action is None:
+            self.logger.warning("No wheel action of type " + str(act["wheel"]["type"]) + " is loaded")
+            return None
+
+        # Check for non-core actions
+        action = self.cmdmap.get(act["wheel"]["name"], CommandActions.Custom)
+        if action == CommandActions.Custom:
+            call = act["wheel"]["name"]
+        else:
+            call = action
+
+        return BoundAction(wheel_action.run, call, action, 1 + act.get("repeat", 0), act.get("up"))
+
+    def compileDispatchTable(self, binds=None):
+        """
+        Build immutable (bind, command, state) -> CompiledCommand table from cmdbind
+
+        Parameters
+        ==========
+        binds
+            (Optional) Binds to recompile, other entries are copied from the current table. All binds by default
+        """
+        if binds is None:
+            table = {}
+            binds = self.cmdbind.keys()
+        else:
+            binds = set(binds)
+            table = {key: value for key, value in self.dispatch.items() if key[0] not in binds}
+
+        for bind in binds:
+            commands = self.cmdbind.get(bind)
+            if commands is None:
+                continue
+            for cmd, states in commands.items():
+                any_actions = [self.compileAction(act) for act in states[AppState.ANY]]
+
+                for state in AppState:
+                    actions = [] if state == AppState.ANY else [self.compileAction(act) for act in states[state]]
+                    if state != AppState.ANY:
+                        actions += any_actions
+                    actions = tuple(act for act in actions if act is not None)
+
+                    up = next((act.up for act in actions if act.up is not None), None)
+                    table[(bind, cmd, state)] = CompiledCommand(actions, tuple(act.action for act in actions), up)
+
+        self.dispatch = types.MappingProxyType(table)
 
     def action(self, call: Union[CommandActions, str], pulse: Pulse = None):
         """
@@ -248,36 +718,118 @@ class ActionEngine(QObject):
 
         modules = Classes.RootCanvas().cur_wheel_modules
         current_module = Classes.WheelUi().getCurModule()
-        if current_module >= len(modules) or modules[current_module] is None \
-                or modules[current_module].get("class") is None:
+        if current_module >= len(modules) or modules[current_module] is None:
             return
-
-        if modules[current_module]["class"].conf.get("actions") is None:
+        module = modules[current_module].get("class")
+        if module is None:
             return
 
+        if modules is not self.bindings_modules:
+            self.module_bindings.clear()
+            self.bindings_modules = modules
+
+        key = (call, pulse.up)
+        bindings = self.module_bindings.get(module)
+        if bindings is None or bindings[0] is not module.conf.get("actions"):
+            bindings = (module.conf.get("actions"), {})
+            self.module_bindings[module] = bindings
+            self.watchModuleConfig(module)
+        invocations = bindings[1].get(key)
+
+        if invocations is None:
+            invocations = self.compileModuleAction(module, call, pulse.up)
+            if invocations is None:
+                return
+            bindings[1][key] = invocations
+
+        for act in invocations:
+            act.run(act.context, pulse)
+
+    def compileModuleAction(self, module, call: Union[CommandActions, str], up: Optional[bool]):
+        """
+        Resolve the module actions of the call, returns a tuple of ModuleAction or None if the call cannot be processed
+
+        Parameters
+        ----------
+        module
+            Wheel module class
+        call
+            Module action (from actions list)
+        up
+            Pulse direction, may be None
+        """
+        actions = module.conf.get("actions")
+        if actions is None:
+            return None
+
         if type(call) is str:
             mod_name = call
         else:
             mod_name = call.name
 
         # Check if we need to add .up/.down to the end of the name
-        if modules[current_module]["class"].conf["actions"].get(mod_name) is None and call in RotaryActions:
-            if pulse.up is None:
-                self.logger.warning("Could not process call " + call + ": pulse.up is unset")
-                return
-            mod_name += "." + ("up" if pulse.up else "down")
+        if actions.get(mod_name) is None and call in RotaryActions:
+            if up is None:
+                self.logger.warning("Could not process call " + mod_name + ": pulse.up is unset")
+                return None
+            mod_name += "." + ("up" if up else "down")
 
-        context = (
-            modules[current_module]["class"].conf["actions"].get(mod_name)
-        )
+        context = actions.get(mod_name)
         if context is None:
             self.logger.warning("Could not process call " + mod_name + ": no such action")
-            return
+            return None
 
+        invocations = []
         for i in context:
-            i["module"] = weakref.ref(modules[current_module]["class"])
-            i["call"] = call
-            self.actions[i["action"].lower()].run(i, pulse)
+            action = self.actions[i["action"].lower()]
+            ctx = dict(i)
+            ctx["module"] = weakref.ref(module)
+            ctx["call"] = call
+            invocations.append(ModuleAction(action.run, action.compile(ctx)))
+        return tuple(invocations)
+
+    def watchModuleConfig(self, module):
+        """
+        Drop the compiled module actions when the module config is updated
+
+        Parameters
+        ----------
+        module
+            Wheel module class
+        """
+        conf = module.conf
+        if not isinstance(conf, config.Config) or id(conf) in self.bindings_configs:
+            return
+        self.bindings_configs[id(conf)] = conf
+        module_ref = weakref.ref(module)
+        conf_ref = weakref.ref(conf)
+
+        def onUpdated():
+            module = module_ref()
+            if module is not None:
+                self.invalidateModuleBindings(module)
+                return
+            # The module is gone (its bindings were dropped with it), the config may be reused by another module
+            conf = conf_ref()
+            if conf is not None:
+                conf.updated.disconnect(onUpdated)
+                self.bindings_configs.pop(id(conf), None)
+
+        conf.updated.connect(onUpdated)
+
+    def invalidateModuleBindings(self, module=None):
+        """
+        Drop the compiled module actions
+
+        Parameters
+        ----------
+        module
+            (Optional) Wheel module class, all modules if not specified
+        """
+        if module is None:
+            self.module_bindings.clear()
+        else:
+            self.module_bindings.pop(module, None)
 
     def getWheelAction(self, a):
         """
@@ -285,19 +837,49 @@ class ActionEngine(QObject):
         a
            Action to find
         """
-        for i in self.conf["commandActions"]:
-            if i["type"] == a["mode"] and i["name"] == a["action"]:
-                return i
-        return None
+        return self.commandActionsIndex.get((a["mode"], a["action"]))
 
     def getState(self):
         """
         Get current state (sections opened or closed)
         """
-        if Classes.WheelUi().is_sections_hidden:
+        if self.onEngineThread():
+            hidden = self.wheel_state.sections_hidden
+        else:
+            hidden = Classes.WheelUi().is_sections_hidden
+        if hidden:
             return AppState.MODULE
         return AppState.WHEEL
 
+    def onEngineThread(self) -> bool:
+        """
+        True if called in the engine thread, the GUI objects must not be accessed there (see wheel_state)
+        """
+        return self.threaded and QThread.currentThread() is self.engine_thread
+
+    def readModuleHaptics(self) -> Optional[dict]:
+        """
+        Copy the haptics parameters of the current module, None if the module has none. GUI thread only
+        """
+        modules = Classes.RootCanvas().cur_wheel_modules
+        current_module = Classes.WheelUi().getCurModule()
+
+        if current_module >= len(modules) or modules[current_module] is None or modules[current_module].get("class") \
+                is None or modules[current_module]["class"].conf.get("haptics") is None:
+            return None
+        return dict(modules[current_module]["class"].conf["haptics"])
+
+    def publishWheelState(self):
+        """
+        Publish the wheel state for the engine thread. Is called on the GUI thread after the actions, on each frame
+        and before the calls are queued to the engine
+        """
+        if not self.threaded:
+            return
+        wheel = Classes.WheelUi()
+        self.wheel_state = WheelState(wheel.is_sections_hidden, wheel.is_sections_anim_running,
+                                      self.readModuleHaptics())
+
     @pyqtSlot(DevicePulse)
     def processCall(self, p_call: DevicePulse):
         """
@@ -315,6 +897,18 @@ class ActionEngine(QObject):
         elem = p_call.bind
         call = p_call.command
 
+        if not p_call._virtual:
+            if p_call.timestamp is not None:
+                self.latency.record("queue", p_call.timestamp)
+
+            rec = flightrecorder.recorder
+            if rec is not None:
+                rec.event(flightrecorder.EventKinds.PULSE, name=elem, arg=p_call.steps)
+
+        if self.recorder is not None and not p_call._virtual:
+            for _ in range(p_call.steps):
+                self.recorder.record(p_call, p_call.timestamp)
+
         cur_state = self.getState()
 
         if (elem is None or call is None) and not elem == "_none":
@@ -323,61 +917,128 @@ class ActionEngine(QObject):
 
         if not p_call._virtual:
             # All pulses are blocked while the sections are being opened/closed, or it's in the linear mode
-            if Classes.WheelUi().is_sections_anim_running or self.linear_mode_enabled:
-                self.conf["debug_input_blocked"] = True
+            if self.onEngineThread():
+                anim_running = self.wheel_state.sections_anim_running
+            else:
+                anim_running = Classes.WheelUi().is_sections_anim_running
+            if anim_running or self.linear_mode_enabled:
+                self.debug["debug_input_blocked"] = True
                 return
-            self.conf["debug_input_blocked"] = False
+            self.debug["debug_input_blocked"] = False
 
             self.logger.debug("Incoming call: " + elem + "." + call)
 
-        if (self.cmdbind.get(elem) is None or self.cmdbind[elem].get(call) is None) and not elem == "_none":
-            self.logger.warning("Actionengine could not find call " + str(elem) + "." + str(call))
-            return
-
-        call_stack = []
         # System explicit call
         if elem == "_none":
-            call_stack.append({"wheel": self.commandActions[p_call.actions[0]]})
+            pulse = self.generatePulse(p_call, cur_state == AppState.WHEEL)
+            wheel = self.commandActions[p_call.actions[0]]
+            self.runActions((BoundAction(run=self.wheel_actions[wheel["type"]].run, call=p_call.actions[0],
+                                         action=p_call.actions[0], repeat=1, up=None),), pulse, elem)
+            return
 
         # Regular call
-        else:
-            p_call.actions = []
-            # Find the corresponding action to execute
-            for state in (cur_state, AppState.ANY):
-                for act in self.cmdbind[elem][call][state]:
-                    if act.get("wheel") is None:
-                        continue
-
-                    if p_call.up is None:
-                        if act.get("up") is not None:
-                            p_call.up = act["up"]
+        compiled = self.dispatch.get((elem, call, cur_state))
+        if compiled is None:
+            self.logger.warning("Actionengine could not find call " + str(elem) + "." + str(call))
+            return
 
-                    p_call.actions.append(self.cmdmap.get(act["wheel"]["name"], CommandActions.Custom))
-                    call_stack.append(act)
+        if p_call.up is None:
+            p_call.up = compiled.up
+        p_call.actions = compiled.commands
 
         pulse = self.generatePulse(p_call, cur_state == AppState.WHEEL)
 
         # Call these actions
-        for act in call_stack:
-            # Check for non-core actions
-            if self.cmdmap.get(act["wheel"]["name"]) is not None:
-                name = self.cmdmap[act["wheel"]["name"]]
-            else:
-                name = act["wheel"]["name"]
+        self.runActions(compiled.actions, pulse, elem)
 
-            for _ in range(1 + act.get("repeat", 0)):
-                self.wheel_actions[act["wheel"]["type"]].run(
-                    name, pulse
-                )
-        Classes.RootCanvas().update_func()
+    def runActions(self, actions: tuple, pulse: Pulse, bind: Optional[str] = None):
+        """
+        Execute the actions on the GUI thread. In the engine thread mode the actions are queued
+
+        Parameters
+        ==========
+        actions
+            Tuple of BoundAction
+        pulse
+            Generated pulse
+        bind
+            (Optional) Device bind of the pulse
+        """
+        if self.threaded:
+            self.publishSnapshot()
+            self.actionsReady.emit(actions, pulse, bind)
+        else:
+            self.runner.runActions(actions, pulse, bind)
+
+    def startThread(self):
+        """
+        Move the engine into a dedicated thread. Device pulses and the haptics engine are processed there with a precise timer,
+        the actions are executed on the GUI thread
+        """
+        if self.threaded:
+            return
+        self.engine_thread = QThread()
+        self.engine_thread.setObjectName("ActionEngine")
+        self.threaded = True
+        self.publishWheelState()
+        self.accelTime.setTimerType(Qt.TimerType.PreciseTimer)
+        self.moveToThread(self.engine_thread)
+        self.engine_thread.start(QThread.Priority.TimeCriticalPriority)
+        self.logger.info("ActionEngine is running in a separate thread")
+
+    def stopThread(self):
+        """
+        Stop the engine thread
+        """
+        if not self.threaded:
+            return
+        self.engine_thread.quit()
+        self.engine_thread.wait()
+
+    def deferToEngine(self, func: Callable, *args) -> bool:
+        """
+        Queue the call to the engine thread if it's called from another thread. Returns True if the call was queued
+
+        Parameters
+        ==========
+        func
+            Method to call
+        args
+            Arguments
+        """
+        if not self.threaded or QThread.currentThread() is self.engine_thread:
+            return False
+        # The call may depend on the state changed right before it
+        self.publishWheelState()
+        self.engineCall.emit(functools.partial(func, *args))
+        return True
+
+    @pyqtSlot(object)
+    def runEngineCall(self, func: Callable):
+        func()
+
+    def publishSnapshot(self):
+        """
+        Replace the engine snapshot, the GUI reads it without locking
+        """
+        meta = self.accelMeta.get(self.lastDevice) if self.lastDevice is not None else None
+        if meta is None:
+            angle = self.angles[1]
+            velocity = 0.0
+        else:
+            angle = self.physics.renderStep(meta.slot)
+            velocity = meta.acceleration
+        section = int(round(self.angles[1] * self.n_positions / 360.0)) % self.n_positions
+        self.snapshot = EngineSnapshot(angle, velocity, section, self.enablePulseCycle)
 
     @staticmethod
     def sign(x):
         return -1.0 if x < 0.0 else 1.0
 
-    def physics_process(self, key: DevicePulse, pulse: DevicePulse, delta: float):
+    def physics_process(self, key: DevicePulse, pulse: DevicePulse, results: tuple):
         """
-        Calculate angle position using haptics engine
+        Apply the results of the haptics engine step (HapticsState.advance) to the virtual pulse.
+        Returns (pulse, distance, nearest angle, stopped, number of clicks)
 
         Parameters
         ==========
@@ -385,83 +1046,21 @@ class ActionEngine(QObject):
             DevicePulse to calculate
         pulse
             Virtual DevicePulse to emit
-        delta
-            DeltaTime in seconds
+        results
+            HapticsState.results() lists
         """
-        # calculate section angle
-        section_angle = 360.0 / self.haptics["moduleSections"]
-
-        # calculate nearest angle among the sections (360 / n_positions)
-        nearest_angle = self.accelMeta[key].target
-        # upper bound
-        if abs(self.accelMeta[key].target + section_angle - self.accelMeta[key].step) < \
-                abs(self.accelMeta[key].target - self.accelMeta[key].step):
-            nearest_angle = self.accelMeta[key].target + section_angle * \
-                            max((self.accelMeta[key].step - self.accelMeta[key].target) // section_angle, 1)
+        up, clicks, nearest, distance, stopped = results
+        i = self.accelMeta[key].slot
 
-        # lower bound
-        elif abs(self.accelMeta[key].target - section_angle - self.accelMeta[key].step) < \
-                abs(self.accelMeta[key].target - self.accelMeta[key].step):
-            nearest_angle = self.accelMeta[key].target - section_angle * \
-                            max((self.accelMeta[key].target - self.accelMeta[key].step) // section_angle, 1)
-
-        # calculate the direction towards the nearest fixed angle
-        direction = 1 if nearest_angle > self.accelMeta[key].step else -1
-
-        # calculate the normalized distance to the nearest angle
-        norm_dist = abs(self.accelMeta[key].step - nearest_angle) / (section_angle / 2.0)
-
-        # calculate deltaTime
-        # delta = self.conf["acceleration"]["pulseRefreshTime"] / 1000
-
-        # update the position with inertia
-        self.accelMeta[key].step += self.accelMeta[key].acceleration * delta
-
-        # check pulse direction (for non-click pulses)
-        if self.accelMeta[key].acceleration > 0:
-            pulse.up = True
-        else:
-            pulse.up = False
-
-        # change of direction
-        if not self.accelMeta[key].target == nearest_angle:
+        pulse.up = up[i]
+        if clicks[i]:
             pulse._click = True
-            # check the direction
-            if self.accelMeta[key].target > nearest_angle:
-                pulse.up = False
-            else:
-                pulse.up = True
-
-            self.accelMeta[key].target = nearest_angle
 
             # update stored angle
             if self.getState() == AppState.WHEEL:
-                self.angles[1] = self.accelMeta[key].target
+                self.angles[1] = nearest[i]
 
-        old_accel = self.accelMeta[key].acceleration
-
-        # friction calculation
-        self.accelMeta[key].acceleration += (-self.accelMeta[key].acceleration) * ((1.0 - norm_dist) ** 2) * \
-                                            self.haptics["friction"] * delta
-
-        # constantly adjust inertia based on the current direction
-        self.accelMeta[key].acceleration += self.haptics["gravity"] * direction * (
-                0.5 + 0.5 * (1.0 - norm_dist)) * delta
-
-        # change of velocity
-        dir_change = self.accelMeta[key].acceleration * old_accel < 0
-
-        stopped = False
-        if dir_change and abs(nearest_angle - self.accelMeta[key].step) < self.haptics["deadzone"] and \
-                abs(self.accelMeta[key].acceleration) < self.haptics["maxStopAccel"]:
-            self.accelMeta[key].acceleration = 0.0
-            self.accelMeta[key].step = nearest_angle
-            if self.conf["acceleration"]["fixedDeltaTime"]:
-                self.accelTime.stop()
-            self.enablePulseCycle = False
-            stopped = True
-
-        return pulse, norm_dist, nearest_angle, stopped
+        return pulse, distance[i], nearest[i], stopped[i], clicks[i]
 
     def linear_process(self, key: DevicePulse, pulse: DevicePulse, delta: float):
         """
@@ -476,13 +1075,15 @@ class ActionEngine(QObject):
         delta
             DeltaTime in seconds
         """
+        meta = self.accelMeta[key]
+
         # calculate section angle
         section_angle = 360.0 / self.n_positions
 
         # calculate deltaTime
         # delta = self.conf["acceleration"]["linearRefreshTime"] / 1000
 
-        if self.accelMeta[key].step < self.accelMeta[key].target:
+        if meta.step < meta.target:
             direction = 1.0
             pulse.up = True
         else:
@@ -490,93 +1091,174 @@ class ActionEngine(QObject):
             pulse.up = False
 
         # increment step
-        self.accelMeta[key].step += direction * section_angle * delta / self.haptics["linearClickTime"]
+        meta.step += direction * section_angle * delta / meta.haptics["linearClickTime"]
 
         # check for middle position
-        if not self.accelMeta[key].threshClick and \
-                abs(self.accelMeta[key].step - self.accelMeta[key].target) < section_angle / 2.0:
+        if not meta.threshClick and abs(meta.step - meta.target) < section_angle / 2.0:
             pulse._click = True
-            self.accelMeta[key].threshClick = True
+            meta.threshClick = True
 
         stopped = False
         # check for end position
-        if self.accelMeta[key].threshClick and abs(self.accelMeta[key].step - self.accelMeta[key].target) < 0.01:
-            if self.conf["acceleration"]["fixedDeltaTime"]:
-                self.accelTime.stop()
-            self.enablePulseCycle = False
+        if meta.threshClick and abs(meta.step - meta.target) < 0.01:
+            meta.active = False
             stopped = True
-            self.accelMeta[key].threshClick = False
-            self.accelMeta[key].step = self.accelMeta[key].target
+            meta.threshClick = False
+            meta.step = meta.target
 
             # disable linear mode
-            if self.linear_mode_enabled:
+            if self.linear_mode_enabled and key == "_none":
                 self.linear_mode_enabled = False
                 # reset timer interval
                 self.accelTime.setInterval(self.conf["acceleration"]["pulseRefreshTime"])
         elif not self.accelTime.isActive():
-            self.enablePulseCycle = True
-            if self.conf["acceleration"]["fixedDeltaTime"]:
-                self.accelTime.start()
+            self.startPulseCycle()
 
         return pulse, stopped
 
+    def startPulseCycle(self):
+        """
+        Enable engine cycles, the timer is started in fixed delta time mode
+        """
+        if not self.enablePulseCycle:
+            # The engine was idle, do not simulate the time in between
+            self.last_cycle = None
+            self.physics.reset()
+        self.enablePulseCycle = True
+        if self.conf["acceleration"]["fixedDeltaTime"] or self.threaded:
+            self.accelTime.start()
+
     @pyqtSlot()
-    def pulseCycle(self, singleShot=False):
+    def pulseCycle(self, singleShot=False, delta=None):
         """
-        Calculate virtual pulses using fancy formulas
+        Calculate virtual pulses of all active devices using fancy formulas. The haptics engine is advanced
+        in fixed sub-steps (physicsStepTime), the frame time is measured with the monotonic clock
 
         Parameters
         ==========
         singleShot
             Emit the pulse once and return
+        delta
+            (Optional) Frame time in seconds, overrides the measured time (deterministic replay)
         """
-        self.conf["debug"] = {}
+        if self.debug["debug"]:
+            self.debug["debug"] = {}
+
+        rec = flightrecorder.recorder
+        if rec is not None:
+            rec.begin(flightrecorder.EventKinds.CYCLE)
 
-        if self.conf["acceleration"]["fixedDeltaTime"] or self.start_time is None:
+        now = time.monotonic_ns()
+        if delta is not None:
+            deltaTime = delta
+        elif self.conf["acceleration"]["fixedDeltaTime"] or self.last_cycle is None:
             if self.linear_mode_enabled:
                 deltaTime = self.conf["acceleration"]["linearRefreshTime"] / 1000
             else:
                 deltaTime = self.conf["acceleration"]["pulseRefreshTime"] / 1000
         else:
-            deltaTime = (time.time_ns() - self.start_time) / 1000000000
+            deltaTime = (now - self.last_cycle) / 1000000000
+        self.last_cycle = now
+
+        # Run haptics engine for all devices at once
+        state = self.physics
+        if self.linear_mode_enabled:
+            state.ticked[:] = False
+        else:
+            exclude = None
+            if singleShot:
+                exclude = (state.target == state.step) & (state.acceleration == 0.0)
+            state.advance(deltaTime, self.conf["acceleration"]["physicsStepTime"] / 1000,
+                          self.conf["acceleration"]["maxSubSteps"], exclude)
+
+        ticked = state.ticked.tolist()
+        active = state.active.tolist()
+        haptic = state.enableHaptics.tolist()
+        results = None
 
-        for key, _ in self.accelMeta.items():
-            pulse = key.copy()
-            pulse._virtual = True
-            pulse._click = False
+        # Emitted pulses may update the devices
+        for key, meta in list(self.accelMeta.items()):
+            i = meta.slot
 
             # Not spinning
-            if singleShot and \
-                    self.accelMeta[key].target == self.accelMeta[key].step and self.accelMeta[key].acceleration == 0.0:
+            if not ticked[i] and not active[i] and not singleShot:
+                continue
+
+            pulse = self.virtualPulse(key)
+
+            if not ticked[i] and singleShot and meta.target == meta.step and meta.acceleration == 0.0:
                 self.callAction.emit(pulse)
                 continue
 
-            if self.haptics["enableHaptics"] and not self.linear_mode_enabled:
-                # Run haptics engine
-                pulse, norm_dist, nearest_angle, stopped = self.physics_process(key, pulse, deltaTime)
-            else:
+            clicks = 0
+            if ticked[i]:
+                if results is None:
+                    results = state.results()
+                pulse, norm_dist, nearest_angle, stopped, clicks = self.physics_process(key, pulse, results)
+            elif self.linear_mode_enabled or not haptic[i]:
                 # Run linear calculation
                 pulse, stopped = self.linear_process(key, pulse, deltaTime)
                 norm_dist = None
                 nearest_angle = None
+            else:
+                # The frame is shorter than the sub-step, nothing to update
+                continue
 
             # All variables theoretically should be in 0.0 - 360.0 range, but this should be done in modules
             # to cover the edge cases (359.9 -> 0.0). In practice it would take insane amount of spins for the sin
             # and cos functions to break due to precision errors
 
-            start_time = time.time_ns()
-
-            if self.conf["debugLookupKey"] == str(key):
-                self.conf["debug"] = {"step": self.accelMeta[key].step, "target": self.accelMeta[key].target,
-                                      "velocity": self.accelMeta[key].acceleration, "distance": norm_dist,
-                                      "stop": stopped, "up": pulse.up}
+            if self.debug_lookup == str(key):
+                self.debug["debug"] = {"step": meta.step, "target": meta.target,
+                                       "velocity": meta.acceleration, "distance": norm_dist,
+                                       "stop": stopped, "up": pulse.up}
 
             self.callAction.emit(pulse)
+            # Coarse frames may contain several detents
+            for _ in range(clicks - 1):
+                up = pulse.up
+                pulse = self.virtualPulse(key)
+                pulse._click = True
+                pulse.up = up
+                self.callAction.emit(pulse)
             if self.conf["logEngine"]:
-                self.logger.debug("Step: " + str(self.accelMeta[key].step) + "; target: " + str(nearest_angle)
-                                  + "; vel: " + str(self.accelMeta[key].acceleration) + "; dist: " + str(norm_dist) +
+                self.logger.debug(str(key) + ": step: " + str(meta.step) + "; target: " + str(nearest_angle)
+                                  + "; vel: " + str(meta.acceleration) + "; dist: " + str(norm_dist) +
                                   "; up: " + str(pulse.up))
 
+        if not state.active.any():
+            if self.conf["acceleration"]["fixedDeltaTime"] or self.threaded:
+                self.accelTime.stop()
+            self.enablePulseCycle = False
+            self.last_cycle = None
+            state.reset()
+            if self.threaded:
+                self.publishSnapshot()
+
+        if rec is not None:
+            rec.end(flightrecorder.EventKinds.CYCLE)
+
+    def virtualPulse(self, key: DevicePulse) -> DevicePulse:
+        """
+        Get the reusable virtual pulse of the device, the pulse is reset to the device values.
+        Virtual pulses are processed synchronously, so one object per device is enough
+
+        Parameters
+        ==========
+        key
+            Device pulse
+        """
+        pulse = self.virtualPulses.get(key.bind)
+        if pulse is None:
+            pulse = DevicePulse(bind=key.bind, _virtual=True)
+            self.virtualPulses[key.bind] = pulse
+        pulse.command = key.command
+        pulse.type = key.type
+        pulse.up = key.up
+        pulse.actions = key.actions
+        pulse._click = False
+        return pulse
+
     def resetPulse(self, dpulse: DevicePulse, is_wheel_mode: bool, state_change=True):
         """
         Reset pulse to its previous values, sets acceleration to 0
@@ -590,18 +1272,111 @@ class ActionEngine(QObject):
         state_change
             Is the application state changed (wheel opened/closed)
         """
-        self.accelMeta[dpulse].velocity = 0.0
-        self.accelMeta[dpulse].acceleration = 0.0
+        meta = self.accelMeta[dpulse]
+        meta.velocity = 0.0
+        meta.acceleration = 0.0
+        meta.active = False
 
         if state_change:
-            # Right now the angle is saved for the modules globally. Perhaps it should be changed...
-            self.angles[int(not is_wheel_mode)] = self.accelMeta[dpulse].target  # save current angle
+            if is_wheel_mode:
+                # save current module angle of the device
+                meta.moduleAngle = meta.target
+                # there is only one wheel, all devices share its angle
+                meta.step = self.angles[1]
+            else:
+                if self.lastDevice == str(dpulse):
+                    self.angles[1] = meta.target
+                meta.step = meta.moduleAngle
 
-            # reset current angle
-            self.accelMeta[dpulse].step = self.angles[int(is_wheel_mode)]
-            self.accelMeta[dpulse].target = self.accelMeta[dpulse].step
+            meta.target = meta.step
         else:
-            self.accelMeta[dpulse].step = self.accelMeta[dpulse].target
+            meta.step = meta.target
+
+    def deviceHaptics(self, bind: str):
+        """
+        Get haptics profile of the device: current haptics parameters with `deviceHaptics` overrides applied
+
+        Parameters
+        ==========
+        bind
+            Device bind
+        """
+        haptics = dict(self.haptics.items())
+        overrides = self.conf["deviceHaptics"].get(bind)
+        if overrides:
+            for key, value in overrides.items():
+                if value is None:
+                    continue
+                haptics[key] = value
+        return haptics
+
+    def updateDeviceHaptics(self):
+        """
+        Refresh haptics profiles of all devices
+        """
+        for key, meta in self.accelMeta.items():
+            meta.haptics = self.deviceHaptics(str(key))
+
+    def accelCurve(self, curve: str):
+        """
+        Get parsed acceleration curve points, the curves are cached by the string
+
+        Parameters
+        ==========
+        curve
+            Curve string "rate:multiplier;..."
+        """
+        points = self.accelCurves.get(curve)
+        if points is None:
+            try:
+                points = parseCurve(curve)
+            except ValueError:
+                self.logger.error("Failed to parse acceleration curve " + curve + ": must be rate:multiplier pairs "
+                                  "separated with ;")
+                points = ((0.0, 1.0),)
+            self.accelCurves[curve] = points
+        return points
+
+    def accelMultiplier(self, dpulse: DevicePulse, haptics: dict):
+        """
+        Estimate the detent rate of the device and map it to the step multiplier with the acceleration curve
+
+        Parameters
+        ==========
+        dpulse
+            Device pulse
+        haptics
+            Haptics profile of the device
+        """
+        rate = self.detentRates.get(dpulse.bind)
+        if rate is None:
+            rate = DetentRate()
+            self.detentRates[dpulse.bind] = rate
+
+        timestamp = dpulse.timestamp
+        if timestamp is None:
+            timestamp = self.pulseClock()
+
+        value = rate.update(timestamp, dpulse.steps, dpulse.up, haptics["accelCurveSmoothing"] / 1000)
+        self.debug["debugDetentRate"] = round(value, 2)
+        return curveValue(self.accelCurve(haptics["accelCurve"]), value)
+
+    def createDeviceMeta(self, dpulse: DevicePulse, is_wheel_mode: bool):
+        """
+        Initialize acceleration metadata for the new device
+
+        Parameters
+        ==========
+        dpulse
+            Emitted device pulse
+        is_wheel_mode
+            Application state, either wheel (True) or module
+        """
+        angle = self.angles[1] if is_wheel_mode else 0.0
+        meta = AccelerationMeta(self.physics, angle, angle, 0.0, 0.0, self.haptics["maxAccel"])
+        meta.haptics = self.deviceHaptics(str(dpulse))
+        self.accelMeta[dpulse.copy()] = meta
+        return meta
 
     def angleChanged(self, up=True):
         """
@@ -612,23 +1387,28 @@ class ActionEngine(QObject):
         up
             Increment up (if True)
         """
+        if self.deferToEngine(self.angleChanged, up):
+            return
+
         is_wheel_mode = self.getState() == AppState.WHEEL
 
         self.linear_mode_enabled = True
 
         self.accelTime.setInterval(self.conf["acceleration"]["linearRefreshTime"])
 
-        self.devicePulses = {}
-        self.accelMeta = {}
-
-        self.explicitPulses[CommandActions.wheel].up = up
-        self.devicePulses[self.explicitPulses[CommandActions.wheel]] = self.explicitPulses[CommandActions.wheel]
-        self.accelMeta[self.explicitPulses[CommandActions.wheel]] = \
-            AccelerationMeta(self.angles[1], self.angles[1], 0.0, 0.0, self.haptics["maxAccel"])
-
+        # Stop all devices, the wheel is controlled by the explicit pulse
         for dp, _ in self.devicePulses.items():
             self.resetPulse(self.devicePulses[dp], is_wheel_mode, state_change=False)
-            self.accelMeta[dp].target += (1 if up else -1) * 360.0 / self.n_positions
+
+        explicit = self.explicitPulses[CommandActions.wheel]
+        explicit.up = up
+        self.devicePulses[str(explicit)] = explicit
+        meta = AccelerationMeta(self.physics, self.angles[1], self.angles[1], 0.0, 0.0, self.haptics["maxAccel"])
+        meta.haptics = self.deviceHaptics(str(explicit))
+        meta.target += (1 if up else -1) * 360.0 / self.n_positions
+        meta.active = True
+        self.accelMeta[explicit] = meta
+        self.lastDevice = str(explicit)
         self.pulseCycle()
 
         self.angles[1] += (1 if up else -1) * 360.0 / self.n_positions
@@ -644,6 +1424,9 @@ class ActionEngine(QObject):
         is_wheel_mode
             Application state, either wheel (True) or module
         """
+        if self.deferToEngine(self.wheelStateChanged, is_wheel_mode):
+            return
+
         for key, _ in self.devicePulses.items():
             self.resetPulse(self.devicePulses[key], is_wheel_mode)
 
@@ -671,20 +1454,23 @@ class ActionEngine(QObject):
             self.haptics["clickAccelCoeff"] = 1.0
             self.haptics["moduleSections"] = self.n_positions
         else:
-            modules = Classes.RootCanvas().cur_wheel_modules
-            current_module = Classes.WheelUi().getCurModule()
+            if self.onEngineThread():
+                module_haptics = self.wheel_state.module_haptics
+            else:
+                module_haptics = self.readModuleHaptics()
 
-            if current_module >= len(modules) or modules[current_module] is None or modules[current_module].get("class") \
-                    is None or modules[current_module]["class"].conf.get("haptics") is None:
+            if module_haptics is None:
                 # Load default params
                 self.updateModuleHaptics(True)
                 return
 
-            for key, value in modules[current_module]["class"].conf["haptics"].items():
+            for key, value in module_haptics.items():
                 if value is None:
                     continue
                 self.haptics[key] = value
 
+        self.updateDeviceHaptics()
+
     @pyqtSlot()
     def updateHapticsConf(self):
         """
@@ -711,12 +1497,13 @@ class ActionEngine(QObject):
         pulse.type = dpulse.type
         pulse.up = dpulse.up
         pulse.actions = tuple(dpulse.actions)
+        pulse.timestamp = dpulse.timestamp
 
         if dpulse._virtual:
             pulse.virtual = True
             pulse.click = dpulse._click
 
-            pulse.step = self.accelMeta[dpulse].step
+            pulse.step = self.physics.renderStep(self.accelMeta[dpulse].slot)
             pulse.target = self.accelMeta[dpulse].target
             pulse.velocity = self.accelMeta[dpulse].acceleration
 
@@ -739,70 +1526,61 @@ class ActionEngine(QObject):
             return pulse
 
         # Rotary
-        if self.accelMeta.get(dpulse) is None:
-            # Clear all DevicePulse instances; TODO clear only conflicting pulses
-
-            # We assume that there is only one existing device right now
-            new_meta = None
-            for dp, _ in self.devicePulses.items():
-                self.resetPulse(self.devicePulses[dp], is_wheel_mode, state_change=False)
-                new_meta = self.accelMeta[dp]
-            self.devicePulses = {}
-            self.accelMeta = {}
-
-            # Store DevicePulse instance by its name (__str__ returns device bind)
-            self.devicePulses[str(dpulse)] = dpulse.copy()
-            self.conf["debugPulses"] = [str(x) for x, _ in self.devicePulses.items()]
-
-            if self.haptics["enableHaptics"]:
-                if dpulse.up:
-                    accel = self.haptics["clickAccel"] * self.haptics["clickAccelCoeff"]
-                else:
-                    accel = -self.haptics["clickAccel"] * self.haptics["clickAccelCoeff"]
-
-                if new_meta is not None:
-                    self.accelMeta[dpulse] = new_meta
-                    self.accelMeta[dpulse].acceleration += accel
-                else:
-                    self.accelMeta[dpulse] = AccelerationMeta(0.0, 0.0, 0.0, accel, self.haptics["maxAccel"])
+        meta = self.accelMeta.get(dpulse)
+        new_device = meta is None
+        if meta is None:
+            # The explicit wheel pulse is no longer needed
+            self.accelMeta.pop("_none", None)
+            self.devicePulses.pop("_none", None)
+
+            # Each device has its own acceleration state
+            meta = self.createDeviceMeta(dpulse, is_wheel_mode)
+        elif not meta.active and is_wheel_mode:
+            # The wheel may have been moved by other devices
+            meta.step = self.angles[1]
+            meta.target = self.angles[1]
+
+        # Store DevicePulse instance by its name (__str__ returns device bind)
+        # Update pulse parameters (dpulse as a key does not represent all unique parameters)
+        self.devicePulses[str(dpulse)] = dpulse.copy()
+        if new_device:
+            self.debug["debugPulses"] = [str(x) for x, _ in self.devicePulses.items()]
+        self.lastDevice = str(dpulse)
+
+        # Coalesced pulses are applied at once
+        steps = dpulse.steps
+        multiplier = 1.0
+        if meta.haptics["enableAccelCurve"]:
+            # Fast spins travel further (pointer acceleration)
+            multiplier = self.accelMultiplier(dpulse, meta.haptics)
+
+        if meta.haptics["enableHaptics"]:
+            if dpulse.up:
+                meta.acceleration += meta.haptics["clickAccel"] * meta.haptics["clickAccelCoeff"] * steps * multiplier
             else:
-                # Linear-only mode
-                if new_meta is not None:
-                    self.accelMeta[dpulse] = new_meta
-                    self.accelMeta[dpulse].target += (1 if dpulse.up else -1) * 360.0 / self.n_positions
-                else:
-                    target = (1 if dpulse.up else -1) * 360.0 / self.n_positions
-                    self.accelMeta[dpulse] = AccelerationMeta(0.0, target, 0.0, 0.0, self.haptics["maxAccel"])
-
+                meta.acceleration -= meta.haptics["clickAccel"] * meta.haptics["clickAccelCoeff"] * steps * multiplier
         else:
-            # Update pulse parameters (dpulse as a key does not represent all unique parameters)
-            # self.devicePulses[str(dpulse)].command = dpulse.command
-            self.devicePulses[str(dpulse)] = dpulse.copy()
-
-            if self.haptics["enableHaptics"]:
-                if dpulse.up:
-                    self.accelMeta[dpulse].acceleration += self.haptics["clickAccel"] * self.haptics["clickAccelCoeff"]
-                else:
-                    self.accelMeta[dpulse].acceleration -= self.haptics["clickAccel"] * self.haptics["clickAccelCoeff"]
+            # Linear-only mode
+            steps = max(1, round(steps * multiplier))
+            meta.target += (1 if dpulse.up else -1) * 360.0 / self.n_positions * steps
+
+        max_accel = meta.haptics["maxAccel"] * max(multiplier, 1.0)
+        if abs(meta.acceleration) >= max_accel:
+            if meta.acceleration > 0:
+                meta.acceleration = max_accel
             else:
-                self.accelMeta[dpulse].target += (1 if dpulse.up else -1) * 360.0 / self.n_positions
+                meta.acceleration = -max_accel
 
-            if abs(self.accelMeta[dpulse].acceleration) >= self.haptics["maxAccel"]:
-                if self.accelMeta[dpulse].acceleration > 0:
-                    self.accelMeta[dpulse].acceleration = self.haptics["maxAccel"]
-                else:
-                    self.accelMeta[dpulse].acceleration = -self.haptics["maxAccel"]
+        meta.active = True
 
         pulse.virtual = False
         pulse.click = False
-        pulse.step = self.accelMeta[dpulse].step
-        pulse.target = self.accelMeta[dpulse].target
-        pulse.velocity = self.accelMeta[dpulse].acceleration
+        pulse.step = meta.step
+        pulse.target = meta.target
+        pulse.velocity = meta.acceleration
         pulse.up = dpulse.up
 
         if not self.accelTime.isActive():
-            self.enablePulseCycle = True
-            if self.conf["acceleration"]["fixedDeltaTime"]:
-                self.accelTime.start()
+            self.startPulseCycle()
 
         return pulse
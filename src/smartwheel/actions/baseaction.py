@@ -6,5 +6,16 @@ class BaseAction(QObject):
     def __init__(self):
         super(BaseAction, self).__init__()
 
+    def compile(self, context: dict):
+        """
+        Prepare the action context once, the result is cached by ActionEngine and passed to run()
+
+        Parameters
+        ==========
+        context
+            Copy of the action context from the module config
+        """
+        return context
+
     def run(self, context: dict, pulse: Pulse):
         pass
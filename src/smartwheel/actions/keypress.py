@@ -21,68 +21,72 @@ class Action(BaseAction):
             "mute": Key.media_volume_mute,
         }
 
-    def run(self, context: dict, pulse: Pulse):
-        if not pulse.click:
-            return True
+    def compile(self, context: dict):
+        """
+        Resolve the key object and the press/release flags of the context
 
-        if context["type"] == "up":
-            up = True
-            down = False
-        elif context["type"] == "down":
-            up = False
-            down = True
-        else:
-            up = True
-            down = True
+        Parameters
+        ==========
+        context
+            Copy of the action context from the module config
+        """
+        context = dict(context)
+        context["_down"] = context["type"] != "up"
+        context["_up"] = context["type"] != "down"
 
+        key = None
         if context["key_class"] == "special":
-            if hasattr(Key, context["key"]):
-                for _ in range(context["repeat"] + 1):
-                    if down:
-                        self.keeb.press(getattr(Key, context["key"]))
-                    if up:
-                        self.keeb.release(getattr(Key, context["key"]))
-            else:
+            key = getattr(Key, context["key"], None)
+            if key is None:
                 self.logger.warning(
                     "Error: cannot parse Key." +
                     context["key"] +
                     ". Please check pynput.Key class"
                 )
-                self.logger.info("Key context:", context)
-                return False
+                self.logger.info("Key context: " + str(context))
 
         elif context["key_class"] == "regular":
-            for _ in range(context["repeat"] + 1):
-                if down:
-                    self.keeb.press(context["key"])
-                if up:
-                    self.keeb.release(context["key"])
+            key = context["key"]
 
         elif context["key_class"] == "vk":
-            for _ in range(context["repeat"] + 1):
-                if down:
-                    self.keeb.press(KeyCode.from_vk(int(context["key"], 16) + 0x200))
-                if up:
-                    self.keeb.release(KeyCode.from_vk(int(context["key"], 16) + 0x200))
-
-        elif context["key_class"] == "xdotool":
-            for _ in range(context["repeat"] + 1):
-                if down:
-                    os.system("xdotool keydown " + context["key"])
-                if up:
-                    os.system("xdotool keyup " + context["key"])
+            try:
+                key = KeyCode.from_vk(int(context["key"], 16) + 0x200)
+            except ValueError:
+                self.logger.warning("Error: cannot parse virtual key code " + context["key"])
 
         elif context["key_class"] == "media":
             key = self.media_keys.get(context["key"])
             if key is None:
                 self.logger.warning("No such media key: " + context["key"])
-                return False
 
+        context["_key"] = key
+        return context
+
+    def run(self, context: dict, pulse: Pulse):
+        if not pulse.click:
+            return True
+
+        if "_key" not in context:
+            context = self.compile(context)
+
+        down = context["_down"]
+        up = context["_up"]
+
+        if context["key_class"] == "xdotool":
             for _ in range(context["repeat"] + 1):
                 if down:
-                    self.keeb.press(key)
+                    os.system("xdotool keydown " + context["key"])
                 if up:
-                    self.keeb.release(key)
-        else:
+                    os.system("xdotool keyup " + context["key"])
+            return True
+
+        key = context["_key"]
+        if key is None:
             return False
+
+        for _ in range(context["repeat"] + 1):
+            if down:
+                self.keeb.press(key)
+            if up:
+                self.keeb.release(key)
         return True
@@ -1,3 +1,4 @@
+import time
 from enum import Enum
 
 
@@ -35,56 +36,88 @@ class DevicePulse:
     Note that they are stored and compared by the bind property, not by the object itself.
     """
 
-    bind: str = None
+    __slots__ = ("bind", "command", "type", "up", "actions", "steps", "timestamp", "_virtual", "_click")
+
+    bind: str
     """
     String that contains action bind/device name (in actionengine config)
     """
 
-    command: str = None
+    command: str
     """
     String that contains device command
     """
 
-    type: PulseTypes = None
+    type: PulseTypes
     """
     Pulse type, can either be a button or an encoder. Buttons pulses do not have any properties
     """
 
-    up: bool = None
+    up: bool
     """
     Scroll direction (only for the encoder)
     """
 
-    actions: list[CommandActions] = []
+    actions: tuple[CommandActions]
+    """
+    Sequence of actions to execute
+    """
+
+    steps: int
+    """
+    Number of encoder detents carried by this pulse (repeated commands may be coalesced into one pulse)
+    """
+
+    timestamp: int
     """
-    List of actions to execute
+    Monotonic capture time in nanoseconds (time.monotonic_ns), None if unknown
     """
 
-    _virtual: bool = False
+    _virtual: bool
     """
     (Internal) True if executed by action engine cycle
     """
 
-    _click: bool = False
+    _click: bool
     """
     (Internal) True if virtual pulse produces a click
     """
 
-    def __init__(self, bind=None, command=None, pulse_type=None, up=None, actions=list(), _virtual=False):
+    def __init__(self, bind=None, command=None, pulse_type=None, up=None, actions=(), steps=1, timestamp=None,
+                 _virtual=False):
         self.bind = bind
         self.command = command
         self.type = pulse_type
         self.up = up
         self.actions = actions
+        self.steps = steps
+        self.timestamp = timestamp
         self._virtual = _virtual
+        self._click = False
 
     def copy(self):
         """
         Copy constructor of DevicePusle
-        Note that it doesn't copy _virtual and _click properties
+        Note that it doesn't copy steps, timestamp, _virtual and _click properties
         """
         return DevicePulse(bind=self.bind, command=self.command, pulse_type=self.type, up=self.up, actions=self.actions)
 
+    def stamped(self, timestamp=None, steps=1):
+        """
+        Copy the pulse with the capture timestamp (serial modules should emit stamped copies of the prebuilt pulses)
+
+        Parameters
+        ==========
+        timestamp
+            (Optional) Monotonic capture time in nanoseconds, current time if not specified
+        steps
+            Number of encoder detents
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        return DevicePulse(bind=self.bind, command=self.command, pulse_type=self.type, up=self.up, actions=self.actions,
+                           steps=steps, timestamp=timestamp)
+
     def __str__(self):
         return self.bind
 
@@ -104,51 +137,61 @@ class Pulse:
     Pulse that is sent by actionengine, is used by modules
     """
 
-    type: PulseTypes = None
+    __slots__ = ("type", "up", "click", "step", "target", "velocity", "virtual", "actions", "timestamp")
+
+    type: PulseTypes
     """
     Pulse type, can either be a button or an encoder. Buttons pulses do not have any properties
     """
 
-    up: bool = None
+    up: bool
     """
     True if the encoder has rotated up (clockwise). Only present if the pulse is not virtual or has changed its position (click=True)
     """
 
-    click: bool = True
+    click: bool
     """
     Indicates if the encoder or button has changed its position. Module should not produce any action if it is false
     """
 
-    step: float = None
+    step: float
     """
     Accumulated encoder steps (from 0.0 to 360.0)
     """
 
-    target: float = None
+    target: float
     """
     Encoder target position (one of the fixed angles in 0-360 range)
     """
 
-    velocity: float = None
+    velocity: float
     """
     Current encoder velocity
     """
 
-    virtual: bool = None
+    virtual: bool
     """
     False if this pulse is created by the hardware and not by action engine cycle
     """
 
-    actions: tuple[CommandActions] = None
+    actions: tuple[CommandActions]
     """
     Tuple containing actions to execute
     """
 
-    def __init__(self, pulse_type=None, click=True, step=None, target=None, velocity=None, up=None, actions=None):
+    timestamp: int
+    """
+    Monotonic capture time of the device pulse in nanoseconds, None for virtual pulses
+    """
+
+    def __init__(self, pulse_type=None, click=True, step=None, target=None, velocity=None, up=None, actions=None,
+                 timestamp=None, virtual=None):
         self.type = pulse_type
         self.click = click
         self.step = step
         self.target = target
         self.velocity = velocity
         self.up = up
+        self.virtual = virtual
         self.actions = actions
+        self.timestamp = timestamp
@@ -4,18 +4,19 @@ import logging
 import os
 import queue
 import sys
-import time
 import weakref
 import traceback
 
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
-from smartwheel import common, config, gui_tools
+from smartwheel import common, config, flightrecorder, gui_tools
 from smartwheel.actionengine import ActionEngine
+from smartwheel.framescheduler import FrameScheduler
 from smartwheel.tools import merge_dicts
 from smartwheel.api.app import Classes, Common
 from smartwheel.api.settings import HandlersApi
+from smartwheel.ui.base import BaseUIElem
 
 
 class MList(list):
@@ -43,7 +44,9 @@ class RootCanvas(QObject):
         self.config_dir = config_dir
         self.conf = WConfig
         Common.DebugMode = self.conf["debugMode"]
-        self.update_func = update_func
+        # All repaint requests go through the scheduler, it paces and coalesces them into frames
+        self.scheduler = FrameScheduler(update_func, self.conf)
+        self.update_func = self.scheduler.request
         self.logger = logging.getLogger(__name__)
         self.loadCommonConf()
         self.processCommonConfig()
@@ -67,9 +70,8 @@ class RootCanvas(QObject):
         self.exec_window = 0
         self.exec_times = queue.Queue()
         self.conf["real_fps"] = 0.0
-        self.start_time = None
-        self.sleep_time = None
         self.e_time = None
+        self.paint_region = None
 
         self.startThreads()
 
@@ -260,9 +262,41 @@ class RootCanvas(QObject):
     @pyqtSlot()
     def updateCanvas(self):
         """
-        Call update event to refresh canvas
+        Call update event to refresh canvas. Modules with dirty tracking are repainted only while they are displayed
         """
-        self.update_func()
+        sender = self.sender()
+        if isinstance(sender, BaseUIElem) and sender.dirtyTracking:
+            m = self.getWheelModule()
+            if m is None or m["class"] is not sender:
+                return
+        self.requestFrame()
+
+    def requestFrame(self, cycle=False):
+        """
+        Request the next frame: only the dirty region of the current module if the wheel is not changed and
+        the module tracks its changes, the whole canvas otherwise
+
+        Parameters
+        ==========
+        cycle
+            (Optional) The frame is needed for the engine cycle even if nothing is changed
+        """
+        wheel = self.conf["modules"][0]["class"]
+        m = self.getWheelModule()
+        if (
+                wheel.needsRepaint()
+                or m is None
+                or not isinstance(m["class"], BaseUIElem)
+                or not m["class"].dirtyTracking
+        ):
+            self.update_func()
+            return
+
+        region = m["class"].repaintRegion()
+        if cycle and region is not None and region.isEmpty():
+            rect = m["class"].boundingRect()
+            region = None if rect is None else QRegion(QRectF(rect).toAlignedRect())
+        self.scheduler.requestRegion(region)
 
     def startThreads(self):
         for thread in self.threads:
@@ -275,6 +309,7 @@ class RootCanvas(QObject):
                 thread.shutdown = True
 
         self.pool.waitForDone(100)
+        self.ae.stopThread()
 
     def reloadWheelModules(self, is_up, caller=None):
         if is_up:
@@ -340,6 +375,8 @@ class RootCanvas(QObject):
         self.ae.canvas = weakref.ref(self)
         self.ae.wheel = weakref.ref(self.conf["modules"][0]["class"])
         Classes.ActionEngine = weakref.ref(self.ae)
+        if self.ae.conf["engineThread"]:
+            self.ae.startThread()
 
     def updateIconCache(self):
         """
@@ -360,12 +397,12 @@ class RootCanvas(QObject):
 
     def calculateSmoothFPS(self, new_time):
         """
-        Calculate the average render time out of n frames
+        Calculate the average frame interval out of n frames
 
         Parameters
         ==========
         new_time
-            The most recent frame render time
+            The most recent frame interval
         """
         if self.exec_window == 0:
             self.exec_times.put(new_time)
@@ -388,7 +425,7 @@ class RootCanvas(QObject):
             self.exec_window * self.exec_time - last_time + new_time
         ) / self.exec_window
 
-    def draw(self, qp):
+    def draw(self, qp, region=None):
         """
         Main draw function
 
@@ -396,27 +433,40 @@ class RootCanvas(QObject):
         ----------
         qp
             QPainter object
+        region
+            (Optional) Repainted QRegion, None for the whole canvas
         """
         # for i in self.conf["modulesLoad"]:
         #    self.conf["modules"][i]["class"].draw(qp)
         if common.doctor.startupMode == common.StartupMode.Emergency:
             return
 
-        # Check if it's the first run
-        if self.start_time is not None:
-            # Stop measurements, calculate execution time
-            self.e_time = (time.time_ns() - self.start_time) / 1000000000  # seconds
+        # Time since the previous frame, None after an idle period
+        self.e_time = self.scheduler.frameStarted()
+        self.paint_region = region
+        try:
+            self.drawFrame(qp)
+        finally:
+            self.scheduler.frameDone()
 
-            if self.conf["stabilizeFPS"]:
-                self.sleep_time = max(1 / self.conf["fps"] - self.exec_time, 0)
-            else:
-                self.sleep_time = 1 / self.conf["fps"]
+    def drawFrame(self, qp):
+        """
+        Render the frame and request the next one while anything is animated
 
-            if self.conf["enableSleep"]:
-                time.sleep(self.sleep_time)
+        Parameters
+        ==========
+        qp
+            QPainter object
+        """
+        ae = Classes.ActionEngine()
+        if ae.threaded:
+            # The engine runs in its own thread, read the latest state and publish the wheel state (animations)
+            self.conf["modules"][0]["class"].applySnapshot(ae.snapshot)
+            ae.publishWheelState()
 
-        # Start measurements
-        self.start_time = time.time_ns()
+        rec = flightrecorder.recorder
+        if rec is not None:
+            rec.begin(flightrecorder.EventKinds.DRAW, "wheel")
 
         try:
             self.conf["modules"][0]["class"].draw(qp)  # render wheel
@@ -426,28 +476,39 @@ class RootCanvas(QObject):
             common.doctor.startupMode = common.StartupMode.Emergency
             self.fixConfig.emit(common.doctor.broken_config, common.doctor.broken_key)
             return
+        finally:
+            if rec is not None:
+                rec.end(flightrecorder.EventKinds.DRAW, "wheel")
+
+        if rec is not None:
+            rec.event(flightrecorder.EventKinds.FRAME)
 
         HandlersApi.watch.emit()
+        ae.updateLatencyDebug()
 
-        if not Classes.ActionEngine().conf["acceleration"]["fixedDeltaTime"] and Classes.ActionEngine().enablePulseCycle:
-            Classes.ActionEngine().pulseCycle()
+        if not ae.threaded and not ae.conf["acceleration"]["fixedDeltaTime"] and ae.enablePulseCycle:
+            ae.pulseCycle()
 
-        if self.sleep_time is not None:
+        if self.e_time is not None:
             if self.conf["stabilizeFPS"]:
-                self.conf["real_fps"] = str(round(1 / max(self.sleep_time + self.exec_time, 0.0000001), 1))
+                self.calculateSmoothFPS(self.e_time)
+                self.conf["real_fps"] = str(round(1 / max(self.exec_time, 0.0000001), 1))
                 if self.conf["logFPS"]:
                     self.logger.info(
                         "FPS(AVG): "
                         + self.conf["real_fps"]
                     )
-                self.calculateSmoothFPS(self.e_time)
 
             else:
-                self.conf["real_fps"] = str(round(1 / (self.sleep_time + self.e_time), 1))
+                self.conf["real_fps"] = str(round(1 / max(self.e_time, 0.0000001), 1))
                 if self.conf["logFPS"]:
                     self.logger.info("FPS: " + self.conf["real_fps"])
 
         m = self.getWheelModule()
+        self.conf["modules"][0]["class"].markClean()
+        if m is not None and isinstance(m["class"], BaseUIElem) and m["class"].visibleIn(self.paint_region):
+            m["class"].markClean()
+
         cache = self.updateIconCache()
         if (
                 self.conf["modules"][0]["class"].is_anim_running
@@ -459,3 +520,6 @@ class RootCanvas(QObject):
                 or cache
         ):
             self.update_func()
+        elif not ae.threaded and not ae.conf["acceleration"]["fixedDeltaTime"] and ae.enablePulseCycle:
+            # The engine cycles are driven by the frames
+            self.requestFrame(cycle=True)
@@ -2,17 +2,24 @@ import json
 import logging
 import os
 import time
+import weakref
 from enum import auto, IntEnum, Enum
 
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
 from PyQt6.QtWidgets import QMessageBox
 
 from smartwheel.api.app import Classes, Common
+from smartwheel.configsnapshot import SnapshotCache
+from smartwheel.configwriter import ConfigWriter
+from smartwheel.storage import JsonStorage
 
 
 class ConfigManager(QObject):
     """
     Global class that manages all config files. This module contains an instance of this class, acting as a singleton
+
+    Updated keys (`updated`, `batchUpdate`) are routed only to the configs that have the top-level key of the path,
+    configs are registered with subscribe()
     """
 
     save = pyqtSignal()
@@ -24,6 +31,9 @@ class ConfigManager(QObject):
 
     def __init__(self):
         super(ConfigManager, self).__init__()
+        self.subscribers = {}  # top-level key -> WeakValueDictionary(id -> Config), Config is not hashable
+        self.updated.connect(self.routeUpdate)
+        self.batchUpdate.connect(self.routeBatchUpdate)
 
     def __new__(cls):
         """
@@ -33,10 +43,71 @@ class ConfigManager(QObject):
             cls.instance = super(ConfigManager, cls).__new__(cls)
         return cls.instance
 
+    def subscribe(self, conf):
+        """
+        Register the top-level keys of the config. Should be called when the set of the keys is changed, the keys
+        removed from the config are not unregistered (Config.onUpdated checks the full key path anyway)
+
+        Parameters
+        ==========
+        conf
+            Config object
+        """
+        if conf.c is None:
+            return
+        conf_id = id(conf)
+        for key in conf.c.keys():
+            subs = self.subscribers.get(key)
+            if subs is None:
+                subs = self.subscribers[key] = weakref.WeakValueDictionary()
+            if conf_id not in subs:
+                subs[conf_id] = conf
+
+    @pyqtSlot(list)
+    def routeUpdate(self, key: list):
+        """
+        Deliver the updated key to the subscribed configs
+
+        Parameters
+        ==========
+        key
+            Updated nested key (["a"]["b"] -> ["a", "b"])
+        """
+        subs = self.subscribers.get(key[0]) if key else None
+        if not subs:
+            return
+        for conf in list(subs.values()):
+            conf.onUpdated(key)
+
+    @pyqtSlot(list)
+    def routeBatchUpdate(self, keys: list):
+        """
+        Deliver the updated keys to the subscribed configs, each config receives only the keys it is subscribed to
+
+        Parameters
+        ==========
+        keys
+            Updated nested keys
+        """
+        targets = {}  # id -> (Config, keys)
+        for key in keys:
+            subs = self.subscribers.get(key[0]) if key else None
+            if not subs:
+                continue
+            for conf_id, conf in list(subs.items()):
+                target = targets.get(conf_id)
+                if target is None:
+                    target = targets[conf_id] = (conf, [])
+                target[1].append(key)
+
+        for conf, conf_keys in targets.values():
+            conf.onBatchUpdate(conf_keys)
+
     @pyqtSlot()
     def saveConfig(self):
         """
-        Slot function that executes the saving of all Config objects, must be called from settings module
+        Slot function that executes the saving of all Config objects, must be called from settings module.
+        Only modified configs are saved, the files are written by config_writer
         """
         self.save.emit()
         defaults_manager.save()
@@ -134,6 +205,11 @@ class ApplicationManager(QObject):
         self.logger.info(
             "Init: load complete. Total load time is " + str(final_time) + " ms"
         )
+        self.logger.info(
+            "Init: " + str(config_snapshot.hits) + " config files loaded from the snapshot, "
+            + str(config_snapshot.misses) + " parsed"
+        )
+        config_snapshot.save()
 
 
 class StartupMode(str, Enum):
@@ -382,16 +458,14 @@ class DefaultsManager(QObject):
         self.defaults_config_dir = defaults_config_dir
 
         self.modified_file = os.path.join(Common.Basedir, self.config_dir, "modified.json")
-        if os.path.exists(self.modified_file):
-            with open(self.modified_file, 'r') as f:
-                self.modified = set(json.load(f).get("modified", []))
+        if config_storage.exists(self.modified_file):
+            self.modified = set(config_storage.read(self.modified_file).get("modified", []))
 
     def save(self):
         """
         Save the list of modified properties
         """
-        with open(self.modified_file, 'w') as f:
-            json.dump({"modified": list(self.modified)}, f)
+        config_storage.write(self.modified_file, {"modified": list(self.modified)})
 
     def __new__(cls):
         """
@@ -495,6 +569,12 @@ class CacheManager(QObject):
 
 defaults_manager = DefaultsManager()
 config_manager = ConfigManager()
+config_snapshot = SnapshotCache()
+config_storage = JsonStorage(config_snapshot)
+"""
+Storage backend of the config files (JsonStorage or storage.SqliteStorage), is selected on startup
+"""
+config_writer = ConfigWriter(dump=lambda filename, data: config_storage.write(filename, data))
 app_manager = ApplicationManager()
 cache_manager = CacheManager()
 doctor = Doctor()
@@ -1,14 +1,34 @@
 import json
 import logging
 import os
+import threading
+import types
 import weakref
 import copy
 
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QEventLoop
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QEventLoop, QTimer
 
 from smartwheel import common
 from smartwheel.api.app import Classes
 from smartwheel.api.settings import HandlersApi
+from smartwheel.configsnapshot import copyJson, jsonSnapshot
+
+
+def freeze(obj):
+    """
+    Read-only copy of json-like data: dicts become MappingProxyType, lists become tuples. Other objects
+    (runtime variables) are kept by reference
+
+    Parameters
+    ==========
+    obj
+        Object to freeze
+    """
+    if isinstance(obj, dict):
+        return types.MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(value) for value in obj)
+    return obj
 
 
 class Config(QObject):
@@ -21,6 +41,12 @@ class Config(QObject):
 
     If any property is updated, Config emits `updated()` signal.
 
+    Changes made with item assignment or by the settings mark the config as dirty, only dirty configs are saved.
+    Use markDirty() after modifying nested values directly. A config created from a part of another config's dict
+    (dictOwner) marks the owner dirty as well.
+
+    Worker threads must not read the config directly, snapshot() returns a frozen view that is safe to share.
+
     Note: assertion does not work directly! Config = some_other_dict cannot be overloaded, use Config.c = some_other_dict instead.
     """
 
@@ -28,6 +54,11 @@ class Config(QObject):
 
     keyError = pyqtSignal(QObject, str)
 
+    cacheReads = True
+    """
+    Cache the values resolved through the linked configs (see __fetchkey). Disable to measure the uncached lookups
+    """
+
     def __init__(
         self,
         config_file=None,
@@ -39,6 +70,7 @@ class Config(QObject):
         varsBlacklist=[],
         updateFunc=None,
         disableSaving=False,
+        dictOwner=None,
     ):
         """
         Initialize Config object
@@ -65,6 +97,8 @@ class Config(QObject):
             (Optional) Update function to call when settings are updated. Use only if signals are not supported
         disableSaving
             (Optional) Do not save config file automatically. False by default
+        dictOwner
+            (Optional) Config whose dict contains config_dict, it is marked dirty when this config is modified
         """
         super(Config, self).__init__()
         self.config_file = config_file
@@ -77,9 +111,20 @@ class Config(QObject):
                 1,
             )
 
+        self.version = 0  # Incremented on every change of this config or the linked configs
+        self._cache = {}  # key -> value resolved by __fetchkey
+        self.dependents = weakref.WeakValueDictionary()  # id -> Config linked to this one (Config is not hashable)
+        self._invalidating = False
+        self.dirty = False  # Modified since the last save
+        self.dictOwner = weakref.ref(dictOwner) if dictOwner is not None else None
+        self._owner = threading.get_ident()  # The config is modified only in this thread
+        self._snapshot = None  # Published frozen view, see snapshot()
+        self._snapshotStale = None  # None - up to date, set of the changed keys or True - all keys
+        self._snapshotScheduled = False
+
         # Initialize defaults if there is no file
         self.c = config_dict
-        self.defaults = copy.deepcopy(self.c)
+        self.defaults = copyJson(self.c)
 
         if logger is not None:
             self.logger = logger
@@ -100,8 +145,7 @@ class Config(QObject):
 
         self._fixStrategy = common.doctor.defaultMergeStrategy
         common.config_manager.save.connect(self.saveConfig)
-        common.config_manager.updated.connect(self.onUpdated)
-        common.config_manager.batchUpdate.connect(self.onBatchUpdate)
+        # updated and batchUpdate are routed by config_manager (see c property)
         # We assume that all configs are in the same thread as settings
         common.config_manager.defaults.connect(self.loadDefaults)
         common.config_manager.merge.connect(self.doMerge)
@@ -125,10 +169,128 @@ class Config(QObject):
         if self.c.get(key) is None:
             common.doctor.configKeyError(self, key)
 
+    @property
+    def c(self):
+        """
+        Underlying config dict
+        """
+        return self._c
+
+    @c.setter
+    def c(self, value):
+        self._c = value
+        self.invalidate()
+        common.config_manager.subscribe(self)
+
+    def invalidate(self, key=None):
+        """
+        Drop the cached value of the key (or all values) and bump the version. Propagates to the dependent configs
+
+        Parameters
+        ==========
+        key
+            (Optional) Changed key, all keys if not specified
+        """
+        if self._invalidating:
+            # Linked configs may form a cycle
+            return
+        self._invalidating = True
+        self.version += 1
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+        if self._snapshot is not None:
+            self.__markSnapshot(key)
+        for dep in list(self.dependents.values()):
+            dep.invalidate(key)
+        self._invalidating = False
+
+    def __markSnapshot(self, key):
+        """
+        Mark the key of the published snapshot as stale and schedule the republish in the owner thread
+        """
+        if key is None:
+            self._snapshotStale = True
+        elif self._snapshotStale is None:
+            self._snapshotStale = {key}
+        elif self._snapshotStale is not True:
+            self._snapshotStale.add(key)
+
+        if not self._snapshotScheduled and threading.get_ident() == self._owner:
+            # Changes made in one event loop iteration are published together
+            self._snapshotScheduled = True
+            QTimer.singleShot(0, self.publishSnapshot)
+
+    def snapshot(self):
+        """
+        Get the frozen view of the config (MappingProxyType with the resolved values of the linked configs,
+        nested dicts are read-only, lists are tuples). Snapshots are immutable and may be shared with other threads,
+        reads need no locks.
+
+        After the first call the snapshot is republished atomically after each update (copy-on-write: only changed
+        keys are copied). In other threads the last published snapshot is returned, so the first call must be made
+        in the thread of the config (before the worker thread is started)
+        """
+        if threading.get_ident() == self._owner:
+            if self._snapshot is None or self._snapshotStale is not None:
+                self.publishSnapshot()
+        elif self._snapshot is None:
+            self.logger.warning("Config snapshot is requested from a worker thread before it is published")
+            self.publishSnapshot()
+        return self._snapshot
+
+    @pyqtSlot()
+    def publishSnapshot(self):
+        """
+        Rebuild the stale keys of the snapshot and publish it. Should be called in the thread of the config
+        """
+        self._snapshotScheduled = False
+        stale = self._snapshotStale
+        if self._snapshot is not None and stale is None:
+            return
+        self._snapshotStale = None
+
+        if self.c is None:
+            self._snapshot = types.MappingProxyType({})
+            return
+
+        if self._snapshot is None or stale is True:
+            data = {key: freeze(self.get(key)) for key in self.c.keys()}
+        else:
+            # Unchanged values are shared with the previous snapshot
+            data = dict(self._snapshot)
+            for key in stale:
+                if key in self.c:
+                    data[key] = freeze(self.get(key))
+                else:
+                    data.pop(key, None)
+        # Reference assignment is atomic, readers get either the old or the new snapshot
+        self._snapshot = types.MappingProxyType(data)
+
     def __fetchkey(self, key):
         """
         Get the updated value from the linked dicts. Do not use directly
 
+        Parameters
+        ==========
+        key
+            Dictionary key
+        """
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        value = self.__resolve(key)
+        if self.cacheReads:
+            self._cache[key] = value
+        return value
+
+    def __resolve(self, key):
+        """
+        Walk the linked dicts, then the config dict. Do not use directly
+
         Parameters
         ==========
         key
@@ -166,6 +328,10 @@ class Config(QObject):
                     self.c[key] = other[key]
 
         self.links.append(weakref.ref(other))
+        if isinstance(other, Config):
+            other.dependents[id(self)] = self
+        self.invalidate()
+        common.config_manager.subscribe(self)
 
     def __getitem__(self, key):
         """
@@ -189,7 +355,12 @@ class Config(QObject):
         newvalue
             Right-hand side value
         """
+        new = key not in self.c
         self.c[key] = newvalue
+        self.markDirty()
+        self.invalidate(key)
+        if new:
+            common.config_manager.subscribe(self)
 
     @pyqtSlot(list)
     def onUpdated(self, key: list[str]):
@@ -203,6 +374,9 @@ class Config(QObject):
         """
         ok, _ = HandlersApi.getter(prop=key, silent=True, inplace_dict=self.c)
         if ok:
+            # Nested values are modified in place, only the top-level key is stale
+            self.invalidate(key[0])
+            self.markDirty()
             self.logger.debug("Updated property " + '.'.join(key) + " for " + str(self.config_file))
             if self.updateFunc is not None:
                 self.updateFunc()
@@ -269,6 +443,8 @@ class Config(QObject):
             self.logger.debug("Key " + '.'.join(key) + " is set to defaults")
 
             HandlersApi.setter(prop=key, value=default_key, inplace_dict=self.c, _user=False)
+            self.invalidate()
+            self.markDirty()
 
     def __len__(self):
         return len(self.c)
@@ -302,14 +478,25 @@ class Config(QObject):
         if self.c is None:
             return None
 
-        if len(self.links) == 0:
-            return self.c.get(key, default)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
 
         for i in range(len(self.links)):
-            if self.links[i]().get(key) is not None:
-                return self.links[i]().get(key)
+            value = self.links[i]().get(key)
+            if value is not None:
+                if self.cacheReads:
+                    self._cache[key] = value
+                return value
+
+        if key not in self.c:
+            return default
 
-        return self.c.get(key, default)
+        value = self.c[key]
+        if self.cacheReads:
+            self._cache[key] = value
+        return value
 
     def items(self):
         """
@@ -326,7 +513,7 @@ class Config(QObject):
         if self.default_config_file is None:
             return False
 
-        if os.path.exists(self.config_file):
+        if common.config_storage.exists(self.config_file):
             return False
 
         os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
@@ -338,8 +525,8 @@ class Config(QObject):
 
         self.c = defaults
 
-        with open(self.config_file, "w") as f:
-            json.dump(defaults, f, indent=4)
+        # The file is read right after the creation, it is written immediately
+        common.config_storage.write(self.config_file, defaults)
 
         return True
 
@@ -367,15 +554,18 @@ class Config(QObject):
             if self.createConfig():
                 return True
 
+        # Pending writes of the file must land first
+        common.config_writer.flush(config_file)
+
         try:
-            with open(config_file, "r") as f:
-                if immediate:
-                    return True, json.load(f)
-                self.c = json.load(f)
-                if common.doctor.startupMode == common.StartupMode.Update:
-                    self.mergeDefaults()
-                elif common.doctor.startupMode == common.StartupMode.Defaults:
-                    self.loadDefaults()
+            data = common.config_storage.read(config_file)
+            if immediate:
+                return True, data
+            self.c = data
+            if common.doctor.startupMode == common.StartupMode.Update:
+                self.mergeDefaults()
+            elif common.doctor.startupMode == common.StartupMode.Defaults:
+                self.loadDefaults()
         except BaseException as e:
             if self.logger is not None:
                 self.logger.error("Could not load config file: " + str(e))
@@ -474,31 +664,61 @@ class Config(QObject):
             elif not dropNew:
                 old[key] = val
 
+    def markDirty(self):
+        """
+        Mark the config (and the owner of its dict) as modified, so it is written on the next save
+        """
+        self.dirty = True
+        if self.dictOwner is not None:
+            owner = self.dictOwner()
+            if owner is not None:
+                owner.markDirty()
+
     @pyqtSlot()
     def saveConfig(self):
         """
-        Save the config file
+        Save the config file if it is modified. The file is written in the background by common.config_writer
         Note: new variables are dropped by default (we need to purge runtime variables)
         """
-        if self.config_file is None or self.disableSaving:
+        if self.config_file is None or self.disableSaving or not self.dirty:
             return
 
-        # We need to drop runtime variables, so we need to load the json file again
-        ok, old_values = self.loadConfig(immediate=True)
+        # The snapshot is merged into the file on the writer thread
+        snapshot = jsonSnapshot(self.c)
+        self.dirty = False
+        common.config_writer.schedule(self.config_file, lambda: self.__mergeSaved(snapshot), key=("save", id(self)))
 
-        if not ok:
-            if self.logger is not None:
-                self.logger.error("Failed to apply config")
-            else:
-                print("Failed to apply config")
+    def __mergeSaved(self, snapshot):
+        """
+        Merge the snapshot into the saved config, returns the new contents or None if nothing has changed.
+        Is called on the writer thread
 
-            return
+        Parameters
+        ==========
+        snapshot
+            Copy of the config dict
+        """
+        # We need to drop runtime variables, so we need to load the saved config again
+        old_values = common.config_storage.read(self.config_file)
+        saved = copyJson(old_values)
 
         # recursively iterate over the dictionary
-        self.dictIter(self.c, old_values, dropNew=self.ignoreNew)
+        self.dictIter(snapshot, old_values, dropNew=self.ignoreNew)
+
+        if old_values == saved:
+            return None
+        return old_values
+
+    def writeFile(self, data):
+        """
+        Schedule the write of the config file with the given contents (see common.config_writer)
 
-        with open(self.config_file, "w") as f:
-            json.dump(old_values, f, indent=4)
+        Parameters
+        ==========
+        data
+            Config dict, must not be modified after the call
+        """
+        common.config_writer.schedule(self.config_file, lambda: data)
 
     def mergeDefaults(self):
         """
@@ -519,9 +739,12 @@ class Config(QObject):
         # Default refresh strategy
         self.dictIter(defaults, self.c, dropNew=False, preserveOld=True, checkModified=True)
         self.dictIter(self.c, defaults, dropNew=self.ignoreNew)
+        self.invalidate()
+        common.config_manager.subscribe(self)
 
-        with open(self.config_file, "w") as f:
-            json.dump(defaults, f, indent=4)
+        # defaults share values with the config dict
+        self.writeFile(jsonSnapshot(defaults))
+        self.dirty = False
 
     @pyqtSlot()
     def doMerge(self):
@@ -560,9 +783,12 @@ class Config(QObject):
 
         if not hardReset:
             self.dictIter(defaults, self.c)
+            self.invalidate()
+            common.config_manager.subscribe(self)
         else:
             self.c = defaults
 
-        with open(self.config_file, "w") as f:
-            json.dump(defaults, f, indent=4)
+        # defaults share values with the config dict
+        self.writeFile(jsonSnapshot(defaults))
+        self.dirty = False
 
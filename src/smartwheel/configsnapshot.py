@@ -0,0 +1,136 @@
+import copy
+import json
+import logging
+import marshal
+import os
+import sys
+
+VERSION = 1
+
+
+def copyJson(obj):
+    """
+    Deep copy of json-like data (dicts, lists, strings, numbers). marshal round trip is several times faster than
+    copy.deepcopy, other objects fall back to copy.deepcopy
+
+    Parameters
+    ==========
+    obj
+        Object to copy
+    """
+    if obj is None:
+        return None
+    try:
+        return marshal.loads(marshal.dumps(obj))
+    except ValueError:
+        return copy.deepcopy(obj)
+
+
+def jsonSnapshot(obj):
+    """
+    Deep copy of the json-serializable part of the data, other objects (runtime variables like nested Config objects)
+    are dropped
+
+    Parameters
+    ==========
+    obj
+        Object to copy
+    """
+    try:
+        return marshal.loads(marshal.dumps(obj))
+    except ValueError:
+        pass
+
+    if isinstance(obj, dict):
+        result = {}
+        for key, value in obj.items():
+            if isinstance(value, _json_types):
+                result[key] = jsonSnapshot(value)
+        return result
+    if isinstance(obj, (list, tuple)):
+        # Keep the indices, the list is merged element-wise
+        return [jsonSnapshot(value) if isinstance(value, _json_types) else None for value in obj]
+    return obj
+
+
+_json_types = (dict, list, tuple, str, int, float, bool, type(None))
+
+
+class SnapshotCache:
+    """
+    Compiled snapshot of the parsed json config files. The snapshot is loaded with a single read on startup,
+    each file is served from it while its mtime, size and inode are unchanged, otherwise the file is parsed again.
+    The snapshot is written after the startup if any file has been parsed
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.filename = None
+        self.entries = {}  # path -> (mtime_ns, size, inode, marshalled data)
+        self.changed = False
+        self.hits = 0
+        self.misses = 0
+
+    def open(self, filename):
+        """
+        Load the snapshot file, the cache starts empty if the file is missing or incompatible
+
+        Parameters
+        ==========
+        filename
+            Snapshot file
+        """
+        self.filename = filename
+        self.entries = {}
+        if not os.path.exists(filename):
+            return
+
+        try:
+            with open(filename, "rb") as f:
+                version, python, entries = marshal.loads(f.read())
+            if version == VERSION and python == tuple(sys.version_info[:2]):
+                self.entries = entries
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            self.logger.warning("Could not load config snapshot: " + str(e))
+
+    def load(self, path):
+        """
+        Get the parsed json file, the returned object is not shared
+
+        Parameters
+        ==========
+        path
+            Json file
+        """
+        st = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size and entry[2] == st.st_ino:
+            self.hits += 1
+            return marshal.loads(entry[3])
+
+        with open(path, "r") as f:
+            data = json.load(f)
+        self.misses += 1
+        if self.filename is not None:
+            self.entries[path] = (st.st_mtime_ns, st.st_size, st.st_ino, marshal.dumps(data))
+            self.changed = True
+        return data
+
+    def save(self):
+        """
+        Write the snapshot if it has changed, the entries of deleted files are dropped
+        """
+        if self.filename is None or not self.changed:
+            return
+
+        # The config writer thread may add entries
+        self.entries = {path: entry for path, entry in list(self.entries.items()) if os.path.exists(path)}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+            tmp = self.filename + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(marshal.dumps((VERSION, tuple(sys.version_info[:2]), self.entries)))
+            os.replace(tmp, self.filename)
+            self.changed = False
+        except OSError as e:
+            self.logger.warning("Could not save config snapshot: " + str(e))
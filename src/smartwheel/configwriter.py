@@ -0,0 +1,176 @@
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+
+def atomicDump(filename, data, indent=4):
+    """
+    Write json to a temporary file next to the target and rename it over the target, so the config file is never
+    left half-written
+
+    Parameters
+    ==========
+    filename
+        Target file
+    data
+        Json-serializable object
+    indent
+        (Optional) Json indentation
+    """
+    tmp = filename + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+class ConfigWriter:
+    """
+    Write-behind queue of the config files. Writes are debounced and executed in batches on a worker thread,
+    the jobs of a file are executed in the scheduling order
+    """
+
+    def __init__(self, delay=0.5, max_delay=2.0, dump=atomicDump):
+        """
+        Initialize ConfigWriter, the worker thread is started with the first job
+
+        Parameters
+        ==========
+        delay
+            Seconds without new jobs before the batch is written
+        max_delay
+            Maximum seconds between the first job of the batch and the write
+        dump
+            (Optional) Function (filename, data) that writes the file, atomicDump by default
+        """
+        self.logger = logging.getLogger(__name__)
+        self.delay = delay
+        self.max_delay = max_delay
+        self.dump = dump
+        self.cond = threading.Condition()
+        self.jobs = collections.OrderedDict()  # filename -> [(key, produce), ...]
+        self.first = None  # Time of the first job of the batch
+        self.last = None  # Time of the last job of the batch
+        self.owner = None  # Ident of the thread that executes the jobs
+        self.thread = None
+        self.written = 0
+        self.skipped = 0
+
+    def schedule(self, filename, produce, key=None):
+        """
+        Schedule the write of the file
+
+        Parameters
+        ==========
+        filename
+            Target file
+        produce
+            Function that returns the data to write, or None to skip the write. Is called on the worker thread
+        key
+            (Optional) Job key. If the last pending job of the file has the same key, it is replaced
+        """
+        with self.cond:
+            jobs = self.jobs.setdefault(filename, [])
+            if key is not None and jobs and jobs[-1][0] == key:
+                jobs[-1] = (key, produce)
+            else:
+                jobs.append((key, produce))
+
+            now = time.monotonic()
+            if self.first is None:
+                self.first = now
+            self.last = now
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="ConfigWriter", daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+
+    def run(self):
+        """
+        Worker thread loop
+        """
+        while True:
+            with self.cond:
+                while True:
+                    if not self.jobs or self.owner is not None:
+                        self.cond.wait()
+                        continue
+                    now = time.monotonic()
+                    deadline = min(self.last + self.delay, self.first + self.max_delay)
+                    if now >= deadline:
+                        break
+                    self.cond.wait(deadline - now)
+
+                jobs = self.take()
+
+            self.execute(jobs)
+
+    def take(self, filename=None):
+        """
+        Take the pending jobs (of all files or of the given file) and mark the current thread as the executor.
+        Must be called with the lock held
+        """
+        if filename is None:
+            jobs = self.jobs
+            self.jobs = collections.OrderedDict()
+        else:
+            jobs = collections.OrderedDict([(filename, self.jobs.pop(filename))])
+        if not self.jobs:
+            self.first = None
+        self.owner = threading.get_ident()
+        return jobs
+
+    def execute(self, jobs):
+        """
+        Execute the taken jobs and release the executor mark
+        """
+        try:
+            for filename, file_jobs in jobs.items():
+                for key, produce in file_jobs:
+                    try:
+                        data = produce()
+                        if data is None:
+                            self.skipped += 1
+                            continue
+                        self.dump(filename, data)
+                        self.written += 1
+                    except BaseException as e:
+                        self.logger.error("Could not write config file " + filename + ": " + str(e))
+        finally:
+            with self.cond:
+                self.owner = None
+                self.cond.notify_all()
+
+    def flush(self, filename=None):
+        """
+        Write the pending jobs (of all files or of the given file) on the calling thread and wait until they are
+        written. Does nothing if called from the jobs themselves
+
+        Parameters
+        ==========
+        filename
+            (Optional) Flush only this file
+        """
+        with self.cond:
+            if self.owner == threading.get_ident():
+                return
+            # A running batch may contain the file
+            while self.owner is not None:
+                self.cond.wait()
+            if not self.jobs or filename is not None and filename not in self.jobs:
+                return
+            jobs = self.take(filename)
+
+        self.execute(jobs)
+
+    def pending(self):
+        """
+        Number of files with pending writes
+        """
+        with self.cond:
+            return len(self.jobs)
@@ -0,0 +1,270 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+
+_header = struct.Struct("<8sIIqB")
+"""
+File header: magic, version, capacity (events), write index, clean shutdown flag
+"""
+
+_event = struct.Struct("<qBBHHH")
+"""
+Event: monotonic timestamp (ns), event kind, phase, thread index, name id, argument
+"""
+
+MAGIC = b"SWFLIGHT"
+VERSION = 1
+
+PHASE_BEGIN = 0
+PHASE_END = 1
+PHASE_INSTANT = 2
+
+_phases = {PHASE_BEGIN: "B", PHASE_END: "E", PHASE_INSTANT: "i"}
+
+
+class EventKinds:
+    """
+    Kinds of the recorded events
+    """
+    PULSE = 0
+    """
+    Device pulse has entered ActionEngine (name - device bind, arg - number of steps)
+    """
+    ACTIONS = 1
+    """
+    Actions of the pulse are executed (name - device bind)
+    """
+    CYCLE = 2
+    """
+    Haptics engine cycle
+    """
+    DRAW = 3
+    """
+    Module draw (name - module name)
+    """
+    FRAME = 4
+    """
+    Frame is drawn
+    """
+
+    names = ("pulse", "actions", "cycle", "draw", "frame")
+
+
+class FlightRecorder:
+    """
+    Ring buffer of fixed-size binary events. The buffer is mapped to a file, so the events survive a crash of the process
+    and are exported on the next start
+    """
+
+    def __init__(self, filename, capacity=65536):
+        """
+        Initialize FlightRecorder and map the buffer file
+
+        Parameters
+        ==========
+        filename
+            Buffer file, the names table is stored next to it (.names)
+        capacity
+            Number of events in the ring buffer
+        """
+        self.logger = logging.getLogger(__name__)
+        self.filename = filename
+        self.capacity = capacity
+        self.index = 0
+        self.names = {}  # name -> id
+        self.threads = {}  # thread ident -> index
+        self.local = threading.local()  # Cached thread index
+        self.lock = threading.Lock()  # Names and threads tables
+        self.slot_lock = threading.Lock()  # Write index, events are written from the GUI and the engine threads
+
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        size = _header.size + capacity * _event.size
+        with open(filename, "wb") as f:
+            f.truncate(size)
+        self.file = open(filename, "r+b")
+        self.buffer = mmap.mmap(self.file.fileno(), size)
+        _header.pack_into(self.buffer, 0, MAGIC, VERSION, capacity, 0, 0)
+
+        self.names_file = open(filename + ".names", "w", encoding="utf-8")
+
+    def nameId(self, name):
+        """
+        Get the id of the interned name, new names are appended to the names file
+
+        Parameters
+        ==========
+        name
+            String to intern
+        """
+        i = self.names.get(name)
+        if i is None:
+            with self.lock:
+                i = self.names.get(name)
+                if i is None:
+                    i = len(self.names)
+                    self.names[name] = i
+                    self.names_file.write(json.dumps(name) + "\n")
+                    self.names_file.flush()
+        return i
+
+    def threadIndex(self):
+        """
+        Get the index of the current thread
+        """
+        i = getattr(self.local, "index", None)
+        if i is None:
+            with self.lock:
+                i = len(self.threads)
+                self.threads[threading.get_ident()] = i
+            self.local.index = i
+        return i
+
+    def event(self, kind, phase=PHASE_INSTANT, name=None, arg=0):
+        """
+        Write the event into the ring buffer
+
+        Parameters
+        ==========
+        kind
+            EventKinds value
+        phase
+            PHASE_BEGIN, PHASE_END or PHASE_INSTANT
+        name
+            (Optional) Event name (device bind, module name)
+        arg
+            (Optional) Integer argument (0-65535)
+        """
+        name_id = 0xFFFF if name is None else self.nameId(name)
+        tid = self.threadIndex()
+        with self.slot_lock:
+            # The slot is reserved and the header index is advanced atomically, the timestamps stay in order
+            i = self.index
+            self.index = i + 1
+            _event.pack_into(self.buffer, _header.size + (i % self.capacity) * _event.size,
+                             time.monotonic_ns(), kind, phase, tid, name_id, arg & 0xFFFF)
+            struct.pack_into("<q", self.buffer, 16, i + 1)
+
+    def begin(self, kind, name=None, arg=0):
+        self.event(kind, PHASE_BEGIN, name, arg)
+
+    def end(self, kind, name=None, arg=0):
+        self.event(kind, PHASE_END, name, arg)
+
+    def exportChrome(self, filename):
+        """
+        Export the buffer to Chrome/Perfetto trace JSON
+
+        Parameters
+        ==========
+        filename
+            JSON file
+        """
+        names = [None] * len(self.names)
+        for name, i in self.names.items():
+            names[i] = name
+        exportChrome(bytes(self.buffer), names, filename)
+        self.logger.info("Flight recorder trace saved to " + filename)
+
+    def close(self):
+        """
+        Mark the clean shutdown and unmap the buffer
+        """
+        if self.buffer is None:
+            return
+        struct.pack_into("<B", self.buffer, 24, 1)
+        self.buffer.flush()
+        self.buffer.close()
+        self.buffer = None
+        self.file.close()
+        self.names_file.close()
+
+
+def readEvents(data, names):
+    """
+    Read the events from the buffer in the chronological order, yields (timestamp, kind, phase, tid, name, arg) tuples
+
+    Parameters
+    ==========
+    data
+        Buffer contents
+    names
+        List of the interned names
+    """
+    magic, version, capacity, index, clean = _header.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a flight recorder buffer")
+
+    start = max(index - capacity, 0)
+    for i in range(start, index):
+        ts, kind, phase, tid, name_id, arg = _event.unpack_from(data, _header.size + (i % capacity) * _event.size)
+        name = names[name_id] if name_id < len(names) else None
+        yield ts, kind, phase, tid, name, arg
+
+
+def exportChrome(data, names, filename):
+    """
+    Convert the buffer contents to Chrome trace JSON (chrome://tracing, ui.perfetto.dev)
+
+    Parameters
+    ==========
+    data
+        Buffer contents
+    names
+        List of the interned names
+    filename
+        JSON file
+    """
+    events = []
+    for ts, kind, phase, tid, name, arg in readEvents(data, names):
+        kind_name = EventKinds.names[kind] if kind < len(EventKinds.names) else str(kind)
+        event = {
+            "name": kind_name if name is None else kind_name + " " + name,
+            "cat": kind_name,
+            "ph": _phases.get(phase, "i"),
+            "ts": ts / 1000,
+            "pid": 0,
+            "tid": tid,
+        }
+        if phase == PHASE_INSTANT:
+            event["s"] = "t"
+        if arg:
+            event["args"] = {"arg": arg}
+        events.append(event)
+
+    with open(filename, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def loadBuffer(filename):
+    """
+    Load the buffer file and its names table, returns (data, names, clean shutdown flag)
+
+    Parameters
+    ==========
+    filename
+        Buffer file
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    names = []
+    if os.path.exists(filename + ".names"):
+        with open(filename + ".names", "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    names.append(json.loads(line))
+                except ValueError:
+                    # The last line may be truncated
+                    break
+    clean = _header.unpack_from(data, 0)[4] if len(data) >= _header.size else 1
+    return data, names, bool(clean)
+
+
+recorder = None
+"""
+Global FlightRecorder instance, None if the recorder is disabled
+"""
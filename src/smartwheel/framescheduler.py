@@ -0,0 +1,140 @@
+import time
+
+from PyQt6.QtCore import QMetaObject, QObject, Qt, QThread, QTimer, pyqtSlot
+from PyQt6.QtGui import QRegion
+
+
+class FrameScheduler(QObject):
+    """
+    Central frame clock of the canvas. Repaint requests are coalesced into at most one frame per tick, the frames are
+    paced by a precise timer instead of sleeping in the paint event. No frames are produced while nothing requests
+    them, the first frame after an idle period is scheduled immediately. A request may be limited to a region of
+    the canvas, the frame repaints the union of the requested regions
+    """
+
+    def __init__(self, update, conf):
+        """
+        Initialize FrameScheduler
+
+        Parameters
+        ==========
+        update
+            Function that schedules the paint event of the window, optionally of a QRegion (QWidget.update)
+        conf
+            Canvas config: fps, stabilizeFPS, enableSleep
+        """
+        super().__init__()
+        self.update = update
+        self.conf = conf
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        self.region = QRegion()  # Region of the next frame, None for the whole canvas
+        self.waiting = False  # The paint event is scheduled, Qt merges the new requests into it
+        self.drawing = False
+        self.chained = False  # The next frame was requested during the previous frame or its period
+        self.last_start = None
+        self.last_end = None
+        self.slot = None  # Ideal start of the last frame on the frame grid
+        self.requests = 0
+        self.frames = 0
+
+    def period(self):
+        """
+        Frame period in seconds, 0 if the frame rate is not limited
+        """
+        if not self.conf["enableSleep"]:
+            return 0.0
+        return 1 / self.conf["fps"]
+
+    def delay(self, now):
+        """
+        Time until the next frame in seconds. With stabilizeFPS the frames are kept on a fixed grid of periods
+        (timer latency does not accumulate), otherwise the full period is kept between the end of the frame and
+        the start of the next one
+        """
+        if self.last_start is None:
+            return 0.0
+        if self.conf["stabilizeFPS"]:
+            deadline = self.slot + self.period()
+        else:
+            deadline = self.last_end + self.period()
+        return max(deadline - now, 0.0)
+
+    @pyqtSlot()
+    def request(self):
+        """
+        Request a frame, can be called any number of times per frame and from any thread
+        """
+        if QThread.currentThread() is not self.thread():
+            QMetaObject.invokeMethod(self, "request", Qt.ConnectionType.QueuedConnection)
+            return
+        self.requestRegion(None)
+
+    def requestRegion(self, region):
+        """
+        Request a frame that repaints the region, must be called from the GUI thread
+
+        Parameters
+        ==========
+        region
+            QRegion of the canvas, None for the whole canvas. Empty regions are ignored
+        """
+        if region is not None and region.isEmpty():
+            return
+
+        self.requests += 1
+        if self.waiting:
+            self.repaint(region)
+            return
+        if region is None or self.region is None:
+            self.region = None
+        else:
+            self.region = self.region.united(region)
+        if self.timer.isActive():
+            return
+        delay = self.delay(time.monotonic())
+        self.chained = self.drawing or delay > 0.0
+        # Timers have a millisecond resolution, the frame is started early rather than late
+        self.timer.start(int(delay * 1000))
+
+    @pyqtSlot()
+    def tick(self):
+        self.waiting = True
+        region = self.region
+        self.region = QRegion()
+        self.repaint(region)
+
+    def repaint(self, region):
+        if region is None:
+            self.update()
+        else:
+            self.update(region)
+
+    def frameStarted(self):
+        """
+        Must be called at the start of the paint event, returns the time since the start of the previous frame
+        in seconds, or None if the frame follows an idle period
+        """
+        now = time.monotonic()
+        interval = now - self.last_start if self.chained else None
+        period = self.period()
+        if self.chained and self.slot is not None and now - self.slot < 2 * period:
+            # Stay on the grid unless a whole frame was missed
+            self.slot = max(self.slot + period, now - period / 2)
+        else:
+            self.slot = now
+        self.waiting = False
+        self.drawing = True
+        self.chained = False
+        self.last_start = now
+        self.frames += 1
+        return interval
+
+    def frameDone(self):
+        """
+        Must be called at the end of the paint event
+        """
+        self.last_end = time.monotonic()
+        self.drawing = False
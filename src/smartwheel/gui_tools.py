@@ -1,6 +1,7 @@
+import math
 import weakref
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
 from PyQt6.QtGui import QColor, QIcon, QPainter, QPixmap
 
 
@@ -102,6 +103,63 @@ class IconManager(QObject):
         self.updated.emit()
 
 
+class PixmapLayer:
+    """
+    Static render layer cached in a device-pixel-ratio-aware QPixmap. The layer is rendered again only when its key
+    (a tuple of everything the layer depends on: size, config values, brushes) is changed
+    """
+
+    def __init__(self, render):
+        """
+        Initialize PixmapLayer
+
+        Parameters
+        ==========
+        render
+            Function (qp) that draws the layer, qp is the QPainter of the pixmap
+        """
+        self.render = render
+        self.key = None
+        self.pixmap = None
+        self.renders = 0
+
+    def get(self, key, width, height, dpr):
+        """
+        Get the pixmap of the layer, render it if the key is changed
+
+        Parameters
+        ==========
+        key
+            State of the layer, compared with ==
+        width
+            Width in logical pixels
+        height
+            Height in logical pixels
+        dpr
+            Device pixel ratio of the target
+        """
+        key = (key, width, height, dpr)
+        if self.pixmap is not None and key == self.key:
+            return self.pixmap
+
+        pixmap = QPixmap(math.ceil(width * dpr), math.ceil(height * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        qp = QPainter(pixmap)
+        qp.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.render(qp)
+        qp.end()
+
+        self.pixmap = pixmap
+        self.key = key
+        self.renders += 1
+        return pixmap
+
+    def invalidate(self):
+        self.key = None
+        self.pixmap = None
+
+
 icon_managers = {
     "wheel": IconManager(),
     "sections": IconManager(),
@@ -0,0 +1,536 @@
+import math
+
+import numpy as np
+
+
+class HapticsState:
+    """
+    Struct-of-arrays storage of the haptics engine. Each device occupies one slot in the contiguous arrays,
+    all active slots are integrated at once
+    """
+
+    float_fields = ("step", "prevStep", "target", "velocity", "acceleration", "maxVelocity", "moduleAngle",
+                    "sectionAngle", "friction", "gravity", "deadzone", "maxStopAccel")
+    """
+    Per-slot float64 arrays
+    """
+
+    bool_fields = ("active", "threshClick", "enableHaptics", "used")
+    """
+    Per-slot bool arrays
+    """
+
+    output_fields = ("nearest", "distance", "up", "clickUp", "clicks", "stopped", "ticked")
+    """
+    Results of the last advance() call
+    """
+
+    vectorize_threshold = 16
+    """
+    Minimal number of active slots to integrate with numpy, smaller batches are integrated one by one
+    (numpy call overhead is larger than the work itself)
+    """
+
+    def __init__(self, capacity=8):
+        """
+        Initialize HapticsState
+
+        Parameters
+        ==========
+        capacity
+            Initial number of slots, the arrays grow automatically
+        """
+        self.capacity = 0
+        self.free = []
+        self.accumulator = 0  # Unsimulated time (ns)
+        self.alpha = 0.0  # Fraction of the sub-step left in the accumulator
+        self.allocateArrays(capacity)
+
+    def allocateArrays(self, capacity):
+        """
+        (Re)allocate the arrays while preserving the values
+
+        Parameters
+        ==========
+        capacity
+            New number of slots
+        """
+        for name in self.float_fields + ("nearest", "distance"):
+            self.resize(name, capacity, np.float64)
+        for name in self.bool_fields + ("up", "clickUp", "stopped", "ticked"):
+            self.resize(name, capacity, np.bool_)
+        self.resize("clicks", capacity, np.int64)
+
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def resize(self, name, capacity, dtype):
+        arr = np.zeros(capacity, dtype=dtype)
+        if self.capacity:
+            arr[:self.capacity] = getattr(self, name)
+        setattr(self, name, arr)
+
+    def allocate(self):
+        """
+        Get a free slot index
+        """
+        if not self.free:
+            self.allocateArrays(self.capacity * 2)
+        i = self.free.pop()
+        for name in self.float_fields:
+            getattr(self, name)[i] = 0.0
+        for name in self.bool_fields:
+            getattr(self, name)[i] = False
+        self.used[i] = True
+        return i
+
+    def release(self, i):
+        """
+        Return the slot to the pool
+
+        Parameters
+        ==========
+        i
+            Slot index
+        """
+        self.used[i] = False
+        self.active[i] = False
+        self.ticked[i] = False
+        self.free.append(i)
+
+    def setProfile(self, i, haptics: dict):
+        """
+        Copy haptics parameters of the device into the slot
+
+        Parameters
+        ==========
+        i
+            Slot index
+        haptics
+            Haptics profile of the device
+        """
+        self.sectionAngle[i] = 360.0 / haptics["moduleSections"]
+        self.friction[i] = haptics["friction"]
+        self.gravity[i] = haptics["gravity"]
+        self.deadzone[i] = haptics["deadzone"]
+        self.maxStopAccel[i] = haptics["maxStopAccel"]
+        self.enableHaptics[i] = haptics["enableHaptics"]
+
+    def advance(self, delta: float, substep: float, max_substeps: int, exclude=None):
+        """
+        Advance the simulation by the frame time in fixed sub-steps. The remainder is kept in the accumulator
+        until the next call, so the trajectories do not depend on the timer jitter. Clicks are counted over all sub-steps,
+        slots processed by at least one sub-step are marked in `ticked`. Returns the number of sub-steps
+
+        Parameters
+        ==========
+        delta
+            Frame time in seconds
+        substep
+            Fixed simulation step in seconds
+        max_substeps
+            Maximum number of sub-steps per frame, the time above the limit is dropped
+        exclude
+            (Optional) Bool mask of the slots to skip
+        """
+        self.ticked[:] = False
+        self.clicks[:] = 0
+
+        step_ns = max(round(substep * 1000000000), 1)
+        self.accumulator += round(delta * 1000000000)
+
+        steps = self.accumulator // step_ns
+        if steps > max_substeps:
+            # The engine can't catch up, slow down the simulation instead
+            steps = max_substeps
+            self.accumulator = steps * step_ns
+        self.accumulator -= steps * step_ns
+
+        self.alpha = self.accumulator / step_ns
+        if not steps:
+            return steps
+
+        substep = step_ns / 1000000000
+        mask = self.active & self.enableHaptics
+        if exclude is not None:
+            mask &= ~exclude
+
+        idx = np.flatnonzero(mask)
+        if idx.size < self.vectorize_threshold:
+            for i in idx.tolist():
+                self.integrateSlot(i, substep, steps)
+        else:
+            for _ in range(steps):
+                self.integrate(substep, exclude)
+
+        return steps
+
+    def reset(self):
+        """
+        Clear the accumulator (the simulation has stopped)
+        """
+        self.accumulator = 0
+        self.alpha = 0.0
+
+    def renderStep(self, i) -> float:
+        """
+        Get the step of the slot interpolated between the last two sub-steps
+
+        Parameters
+        ==========
+        i
+            Slot index
+        """
+        step = self.step[i].item()
+        if not self.ticked[i] or not self.active[i]:
+            return step
+        prev = self.prevStep[i].item()
+        return prev + (step - prev) * self.alpha
+
+    def integrate(self, delta: float, exclude=None):
+        """
+        Advance all active haptics slots by one step: friction, gravity towards the nearest section and the deadzone stop.
+        Produces the same trajectories as the scalar formulas. Results are written to the output arrays
+
+        Parameters
+        ==========
+        delta
+            DeltaTime in seconds
+        exclude
+            (Optional) Bool mask of the slots to skip
+        """
+        mask = self.active & self.enableHaptics
+        if exclude is not None:
+            mask &= ~exclude
+
+        idx = np.flatnonzero(mask)
+        if idx.size < self.vectorize_threshold:
+            for i in idx.tolist():
+                self.integrateSlot(i, delta)
+            return idx
+
+        step = self.step[idx]
+        target = self.target[idx]
+        accel = self.acceleration[idx]
+        section = self.sectionAngle[idx]
+
+        # calculate nearest angle among the sections
+        dist = np.abs(target - step)
+        upper = np.abs(target + section - step) < dist
+        lower = ~upper & (np.abs(target - section - step) < dist)
+        nearest = np.where(upper, target + section * np.maximum((step - target) // section, 1), target)
+        nearest = np.where(lower, target - section * np.maximum((target - step) // section, 1), nearest)
+
+        # calculate the direction towards the nearest fixed angle
+        direction = np.where(nearest > step, 1.0, -1.0)
+
+        # calculate the normalized distance to the nearest angle
+        norm_dist = np.abs(step - nearest) / (section / 2.0)
+
+        # update the position with inertia
+        step = step + accel * delta
+
+        # change of direction produces a click
+        click = target != nearest
+        up = np.where(click, ~(target > nearest), accel > 0)
+
+        old_accel = accel
+
+        # friction calculation
+        accel = accel + (-accel) * ((1.0 - norm_dist) ** 2) * self.friction[idx] * delta
+
+        # constantly adjust inertia based on the current direction
+        accel = accel + self.gravity[idx] * direction * (0.5 + 0.5 * (1.0 - norm_dist)) * delta
+
+        # change of velocity
+        dir_change = accel * old_accel < 0
+
+        stopped = dir_change & (np.abs(nearest - step) < self.deadzone[idx]) & \
+            (np.abs(accel) < self.maxStopAccel[idx])
+        accel[stopped] = 0.0
+        step[stopped] = nearest[stopped]
+
+        self.prevStep[idx] = self.step[idx]
+        self.step[idx] = step
+        self.target[idx] = nearest
+        self.acceleration[idx] = accel
+        self.active[idx] = ~stopped
+
+        self.nearest[idx] = nearest
+        self.distance[idx] = norm_dist
+        self.up[idx] = up
+        self.stopped[idx] = stopped
+        self.ticked[idx] = True
+        self.clicks[idx] += click
+        self.clickUp[idx] = np.where(click, up, self.clickUp[idx])
+
+        return idx
+
+    def results(self):
+        """
+        Get the results of the last advance() call as lists: (up, clicks, nearest, distance, stopped).
+        The direction of the last click is reported if the slot has clicked
+        """
+        up = np.where(self.clicks > 0, self.clickUp, self.up)
+        return up.tolist(), self.clicks.tolist(), self.nearest.tolist(), self.distance.tolist(), \
+            self.stopped.tolist()
+
+    def integrateSlot(self, i, delta: float, steps=1):
+        """
+        Scalar version of integrate() for a single slot. The values are loaded once for all sub-steps
+
+        Parameters
+        ==========
+        i
+            Slot index
+        delta
+            DeltaTime in seconds
+        steps
+            Number of sub-steps, stops early if the slot has stopped
+        """
+        step = self.step[i].item()
+        prev_step = step
+        target = self.target[i].item()
+        accel = self.acceleration[i].item()
+        section = self.sectionAngle[i].item()
+        friction = self.friction[i].item()
+        gravity = self.gravity[i].item()
+        deadzone = self.deadzone[i].item()
+        max_stop_accel = self.maxStopAccel[i].item()
+
+        clicks = 0
+        click_up = False
+        for _ in range(steps):
+            # calculate nearest angle among the sections
+            nearest = target
+            # upper bound
+            if abs(target + section - step) < abs(target - step):
+                nearest = target + section * max((step - target) // section, 1)
+            # lower bound
+            elif abs(target - section - step) < abs(target - step):
+                nearest = target - section * max((target - step) // section, 1)
+
+            # calculate the direction towards the nearest fixed angle
+            direction = 1 if nearest > step else -1
+
+            # calculate the normalized distance to the nearest angle
+            norm_dist = abs(step - nearest) / (section / 2.0)
+
+            # update the position with inertia
+            prev_step = step
+            step += accel * delta
+
+            # change of direction produces a click
+            click = target != nearest
+            up = not target > nearest if click else accel > 0
+            if click:
+                clicks += 1
+                click_up = up
+
+            old_accel = accel
+
+            # friction calculation
+            accel += (-accel) * ((1.0 - norm_dist) ** 2) * friction * delta
+
+            # constantly adjust inertia based on the current direction
+            accel += gravity * direction * (0.5 + 0.5 * (1.0 - norm_dist)) * delta
+
+            # change of velocity
+            dir_change = accel * old_accel < 0
+
+            target = nearest
+
+            stopped = dir_change and abs(nearest - step) < deadzone and abs(accel) < max_stop_accel
+            if stopped:
+                accel = 0.0
+                step = nearest
+                break
+
+        self.prevStep[i] = prev_step
+        self.step[i] = step
+        self.target[i] = nearest
+        self.acceleration[i] = accel
+        self.active[i] = not stopped
+
+        self.nearest[i] = nearest
+        self.distance[i] = norm_dist
+        self.up[i] = up
+        self.stopped[i] = stopped
+        self.ticked[i] = True
+        if clicks:
+            self.clicks[i] += clicks
+            self.clickUp[i] = click_up
+
+
+class _FloatField:
+    """
+    AccelerationMeta attribute that is stored in HapticsState array
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return getattr(obj.state, self.name)[obj.slot].item()
+
+    def __set__(self, obj, value):
+        getattr(obj.state, self.name)[obj.slot] = value
+
+
+class _BoolField(_FloatField):
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return bool(getattr(obj.state, self.name)[obj.slot])
+
+
+class AccelerationMeta:
+    """
+    Internal acceleration metadata for each pulse. The values are stored in HapticsState slot
+    """
+
+    __slots__ = ("state", "slot", "_haptics")
+
+    step = _FloatField()
+
+    target = _FloatField()
+
+    velocity = _FloatField()
+
+    acceleration = _FloatField()
+
+    maxVelocity = _FloatField()
+
+    threshClick = _BoolField()
+
+    active = _BoolField()
+    """
+    True if the haptics engine needs to process this pulse
+    """
+
+    moduleAngle = _FloatField()
+    """
+    Saved angle of the device in module mode
+    """
+
+    def __init__(self, state: HapticsState, step, target, velocity, accel, maxvel):
+        self.state = state
+        self.slot = state.allocate()
+        self.step = step
+        self.target = target
+        self.velocity = velocity
+        self.acceleration = accel
+        self.maxVelocity = maxvel
+        self._haptics = None
+
+    def __del__(self):
+        self.state.release(self.slot)
+
+    @property
+    def haptics(self) -> dict:
+        """
+        Haptics profile of the device (haptics parameters + deviceHaptics overrides)
+        """
+        return self._haptics
+
+    @haptics.setter
+    def haptics(self, value: dict):
+        self._haptics = value
+        self.state.setProfile(self.slot, value)
+
+
+class DetentRate:
+    """
+    Smoothed detent rate of a device (detents per second), estimated from the pulse capture timestamps
+    """
+
+    __slots__ = ("rate", "last", "up")
+
+    timeout = 0.5
+    """
+    Pause (in seconds) after which the spin is considered new and the rate is reset
+    """
+
+    def __init__(self):
+        self.rate = 0.0
+        self.last = None
+        self.up = None
+
+    def update(self, timestamp: int, steps: int, up: bool, smoothing: float) -> float:
+        """
+        Add the detents and return the smoothed rate. The rate is reset when the direction changes
+
+        Parameters
+        ==========
+        timestamp
+            Capture timestamp (monotonic ns)
+        steps
+            Number of detents in the pulse
+        up
+            Direction of the pulse
+        smoothing
+            Time constant of the exponential filter in seconds
+        """
+        last = self.last
+        self.last = timestamp
+
+        if last is None or up != self.up or timestamp - last > self.timeout * 1e9:
+            self.rate = 0.0
+            self.up = up
+            return self.rate
+
+        # Coalesced pulses may share the timestamp
+        dt = max((timestamp - last) / 1e9, 1e-4)
+        if smoothing > 0.0:
+            alpha = 1.0 - math.exp(-dt / smoothing)
+        else:
+            alpha = 1.0
+        self.rate += alpha * (steps / dt - self.rate)
+        return self.rate
+
+
+def parseCurve(curve: str):
+    """
+    Parse the acceleration curve string "rate:multiplier;rate:multiplier;...", returns a sorted tuple of points.
+    Raises ValueError if the string is malformed
+
+    Parameters
+    ==========
+    curve
+        Curve string, rate is in detents per second
+    """
+    points = []
+    for point in curve.split(";"):
+        if not point.strip():
+            continue
+        rate, multiplier = point.split(":")
+        points.append((float(rate), float(multiplier)))
+
+    if not points:
+        raise ValueError("empty curve")
+    return tuple(sorted(points))
+
+
+def curveValue(points: tuple, x: float) -> float:
+    """
+    Piecewise linear interpolation of the curve, the value is constant outside of the points range
+
+    Parameters
+    ==========
+    points
+        Sorted tuple of (x, y) points
+    x
+        Argument
+    """
+    if x <= points[0][0]:
+        return points[0][1]
+
+    for i in range(1, len(points)):
+        x1, y1 = points[i]
+        if x <= x1:
+            x0, y0 = points[i - 1]
+            return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    return points[-1][1]
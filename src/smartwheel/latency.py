@@ -0,0 +1,181 @@
+import array
+import csv
+import math
+import time
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-scale histogram of latencies. Bins are spaced by 2^(1/bins_per_octave) starting from 1 us,
+    so the memory and the recording cost do not depend on the number of samples
+    """
+
+    bins_per_octave = 4
+
+    n_bins = 100
+    """
+    Number of bins, the last bin contains all latencies above ~30 s
+    """
+
+    def __init__(self):
+        self.counts = array.array("Q", bytes(8 * self.n_bins))
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        """
+        Add a sample
+
+        Parameters
+        ==========
+        ns
+            Latency in nanoseconds
+        """
+        us = ns / 1000
+        if us < 1.0:
+            i = 0
+        else:
+            i = min(int(math.log2(us) * self.bins_per_octave) + 1, self.n_bins - 1)
+        self.counts[i] += 1
+        self.total += 1
+        if ns > self.max:
+            self.max = ns
+
+    def edges(self, i):
+        """
+        Get (low, high) edges of the bin in microseconds
+
+        Parameters
+        ==========
+        i
+            Bin index
+        """
+        if i == 0:
+            return 0.0, 1.0
+        return 2.0 ** ((i - 1) / self.bins_per_octave), 2.0 ** (i / self.bins_per_octave)
+
+    def quantile(self, q):
+        """
+        Estimate the quantile (upper edge of the bin) in microseconds, None if there are no samples
+
+        Parameters
+        ==========
+        q
+            Quantile from 0.0 to 1.0
+        """
+        if not self.total:
+            return None
+        target = q * self.total
+        acc = 0
+        for i, count in enumerate(self.counts):
+            acc += count
+            if acc >= target and count:
+                return self.edges(i)[1]
+        return self.edges(self.n_bins - 1)[1]
+
+    def reset(self):
+        for i in range(self.n_bins):
+            self.counts[i] = 0
+        self.total = 0
+        self.max = 0
+
+
+class LatencyTracker:
+    """
+    End-to-end input latency measurements. Each stage is measured from the pulse capture timestamp (DevicePulse.timestamp)
+    """
+
+    stages = ("queue", "dispatch", "frame")
+    """
+    queue - capture to ActionEngine.processCall, dispatch - capture to the end of module actions,
+    frame - capture to the next drawn frame
+    """
+
+    max_pending = 256
+    """
+    Maximum number of pulses waiting for the next frame
+    """
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+        self.pending = []  # Capture timestamps of the dispatched pulses, GUI thread only
+        self.last_publish = 0
+
+    def record(self, stage, timestamp, now=None):
+        """
+        Record the latency of the stage
+
+        Parameters
+        ==========
+        stage
+            Stage name
+        timestamp
+            Capture timestamp (monotonic ns)
+        now
+            (Optional) End of the stage, current time if not specified
+        """
+        if now is None:
+            now = time.monotonic_ns()
+        self.histograms[stage].record(now - timestamp)
+
+    def dispatched(self, timestamp):
+        """
+        Pulse actions have been executed, the pulse is waiting for the next frame
+
+        Parameters
+        ==========
+        timestamp
+            Capture timestamp (monotonic ns)
+        """
+        now = time.monotonic_ns()
+        self.record("dispatch", timestamp, now)
+        if len(self.pending) < self.max_pending:
+            self.pending.append(timestamp)
+
+    def frameDrawn(self):
+        """
+        Record the frame latency of all pending pulses
+        """
+        if not self.pending:
+            return
+        now = time.monotonic_ns()
+        frame = self.histograms["frame"]
+        for timestamp in self.pending:
+            frame.record(now - timestamp)
+        self.pending.clear()
+
+    def summary(self):
+        """
+        Get the dict of "p50 / p90 / p99 (n)" strings in milliseconds for each stage
+        """
+        result = {}
+        for stage, hist in self.histograms.items():
+            if not hist.total:
+                result[stage] = "-"
+                continue
+            result[stage] = " / ".join(str(round(hist.quantile(q) / 1000, 3)) for q in (0.5, 0.9, 0.99)) + \
+                " ms (" + str(hist.total) + ")"
+        return result
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+        self.pending.clear()
+
+    def dumpCsv(self, filename):
+        """
+        Write all histograms to the CSV file: stage, bin start (us), bin end (us), count
+
+        Parameters
+        ==========
+        filename
+            CSV file
+        """
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "low_us", "high_us", "count"])
+            for stage, hist in self.histograms.items():
+                for i, count in enumerate(hist.counts):
+                    if count:
+                        low, high = hist.edges(i)
+                        writer.writerow([stage, round(low, 3), round(high, 3), count])
@@ -0,0 +1,212 @@
+import collections
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from smartwheel.api.action import DevicePulse, PulseTypes
+
+
+class QueuePolicy:
+    """
+    Queueing policies of the device commands
+    """
+
+    KEEP = "keep"
+    """
+    The pulse is never dropped or merged (buttons by default)
+    """
+
+    COALESCE = "coalesce"
+    """
+    The pulse is merged with the last queued pulse of the same command (steps are added), may be dropped if the queue
+    is full. Stale pulses are delivered (encoders by default)
+    """
+
+    LATEST = "latest"
+    """
+    Only the latest pulse of the command is kept in the queue, may be dropped if the queue is full or the pulse is stale
+    (max_age)
+    """
+
+    values = (KEEP, COALESCE, LATEST)
+
+
+class PulseQueue(QObject):
+    """
+    Bounded queue of device pulses between serialpipe modules and ActionEngine. Pulses are pushed from any thread
+    with emit(), the consumer is notified once per batch with the `ready` signal and takes the pulses with drain()
+    """
+
+    ready = pyqtSignal()
+    """
+    The queue has become non-empty
+    """
+
+    def __init__(self, size=64, max_age=0, policies=None):
+        """
+        Initialize PulseQueue
+
+        Parameters
+        ==========
+        size
+            Maximum number of droppable pulses in the queue, KEEP pulses are always accepted
+        max_age
+            LATEST pulses captured more than max_age ms before drain() are dropped, 0 to disable (default)
+        policies
+            (Optional) Dict of "bind.command" or "bind" -> QueuePolicy value
+        """
+        super(PulseQueue, self).__init__()
+        self.lock = threading.Lock()
+        self.queue = collections.deque()  # (pulse, policy, capture time of the newest merged pulse)
+        self.n_droppable = 0  # Number of queued non-KEEP pulses
+        self.size = size
+        self.max_age = max_age
+        self.policies = {}
+        self.policy_cache = {}  # (bind, command, type) -> policy
+        self.setPolicies(policies or {})
+
+        self.max_depth = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.stale = 0
+
+    def setPolicies(self, policies: dict):
+        """
+        Update per-command policies
+
+        Parameters
+        ==========
+        policies
+            Dict of "bind.command" or "bind" -> QueuePolicy value
+        """
+        with self.lock:
+            self.policies = dict(policies)
+            self.policy_cache = {}
+
+    def policy(self, pulse: DevicePulse) -> str:
+        """
+        Get the policy of the pulse: "bind.command" entry, then "bind" entry, then the default of the pulse type
+
+        Parameters
+        ==========
+        pulse
+            Device pulse
+        """
+        key = (pulse.bind, pulse.command, pulse.type)
+        policy = self.policy_cache.get(key)
+        if policy is None:
+            policy = self.policies.get(str(pulse.bind) + "." + str(pulse.command), self.policies.get(pulse.bind))
+            if policy not in QueuePolicy.values:
+                policy = QueuePolicy.KEEP if pulse.type == PulseTypes.BUTTON else QueuePolicy.COALESCE
+            self.policy_cache[key] = policy
+        return policy
+
+    def emit(self, pulse: DevicePulse):
+        """
+        Push the pulse from any thread. Has the same signature as ActionEngine.callAction.emit, so it may replace
+        the signal in serialpipe modules
+
+        Parameters
+        ==========
+        pulse
+            Device pulse
+        """
+        with self.lock:
+            policy = self.policy(pulse)
+            queue = self.queue
+            notify = not queue
+
+            if policy == QueuePolicy.COALESCE and queue:
+                tail = queue[-1][0]
+                if tail.bind == pulse.bind and tail.command == pulse.command and tail.up == pulse.up \
+                        and queue[-1][1] == QueuePolicy.COALESCE:
+                    # Pulses may be shared by the emitters, the merged pulse is a copy.
+                    # The capture time of the first pulse is kept for the latency metrics, the staleness is checked
+                    # against the newest one
+                    newest = pulse.timestamp if pulse.timestamp is not None else queue[-1][2]
+                    queue[-1] = (tail.stamped(tail.timestamp, tail.steps + pulse.steps), policy, newest)
+                    self.coalesced += 1
+                    return
+
+            elif policy == QueuePolicy.LATEST:
+                for i, (queued, queued_policy, _) in enumerate(queue):
+                    if queued_policy == QueuePolicy.LATEST and queued.bind == pulse.bind \
+                            and queued.command == pulse.command:
+                        del queue[i]
+                        self.n_droppable -= 1
+                        self.dropped += 1
+                        break
+
+            if policy != QueuePolicy.KEEP:
+                if self.n_droppable >= self.size:
+                    # Drop the oldest droppable pulse
+                    for i, (queued, queued_policy, _) in enumerate(queue):
+                        if queued_policy != QueuePolicy.KEEP:
+                            del queue[i]
+                            break
+                    self.dropped += 1
+                else:
+                    self.n_droppable += 1
+
+            queue.append((pulse, policy, pulse.timestamp))
+            if len(queue) > self.max_depth:
+                self.max_depth = len(queue)
+
+        if notify:
+            self.ready.emit()
+
+    def drain(self) -> list:
+        """
+        Take all queued pulses in the arrival order. Stale LATEST pulses are skipped, stale COALESCE pulses are
+        delivered, merged with the previous pulse of the same command if the skipped pulses made them adjacent
+        """
+        with self.lock:
+            pulses = self.queue
+            self.queue = collections.deque()
+            self.n_droppable = 0
+
+        if not self.max_age:
+            return [pulse for pulse, _, _ in pulses]
+
+        deadline = time.monotonic_ns() - self.max_age * 1000000
+        result = []
+        merged = False  # The last result pulse is a copy that may be merged with
+        for pulse, policy, newest in pulses:
+            if newest is None or newest >= deadline:
+                result.append(pulse)
+                merged = False
+                continue
+
+            if policy == QueuePolicy.LATEST:
+                self.stale += 1
+                continue
+
+            if policy == QueuePolicy.COALESCE and result:
+                last = result[-1]
+                if last.bind == pulse.bind and last.command == pulse.command and last.up == pulse.up \
+                        and self.policy(last) == QueuePolicy.COALESCE:
+                    if not merged:
+                        last = last.stamped(last.timestamp, last.steps)
+                        result[-1] = last
+                        merged = True
+                    last.steps += pulse.steps
+                    self.coalesced += 1
+                    continue
+
+            result.append(pulse)
+            merged = False
+        return result
+
+    def stats(self) -> dict:
+        """
+        Queue metrics: current depth, maximum depth, coalesced, dropped (overflow) and stale pulses
+        """
+        return {"depth": len(self.queue), "maxDepth": self.max_depth, "coalesced": self.coalesced,
+                "dropped": self.dropped, "stale": self.stale}
+
+    def resetStats(self):
+        self.max_depth = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.stale = 0
@@ -0,0 +1,338 @@
+import logging
+import os
+import struct
+import time
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal, pyqtSlot
+
+from smartwheel.api.action import DevicePulse, PulseTypes
+
+
+TRACE_MAGIC = b"SWPT\x01"
+"""
+Trace file header (magic + format version)
+"""
+
+_record = struct.Struct("<qBBHH")
+"""
+Record header: monotonic timestamp (ns), pulse type, up, bind length, command length
+"""
+
+_types = {None: 255, PulseTypes.BUTTON: PulseTypes.BUTTON.value, PulseTypes.ENCODER: PulseTypes.ENCODER.value}
+_up = {False: 0, True: 1, None: 2}
+
+
+class PulseRecorder:
+    """
+    Append-only binary recorder of device pulses. Each record is followed by utf-8 encoded bind and command strings
+    """
+
+    flush_records = 64
+    """
+    Flush the file buffer after this number of records, so a crash loses at most a short tail of the trace
+    """
+
+    flush_interval = 1000000000
+    """
+    Flush the file buffer if the previous flush is older than this (ns)
+    """
+
+    def __init__(self, filename):
+        """
+        Initialize PulseRecorder and open the trace file
+
+        Parameters
+        ==========
+        filename
+            Trace file, the records are appended if it already exists
+        """
+        self.logger = logging.getLogger(__name__)
+        self.filename = filename
+        self.strings = {}  # Encoded strings cache
+        self.pending = 0  # Records written since the last flush
+        self.last_flush = time.monotonic_ns()
+
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self.file = open(filename, "ab")
+        if new_file:
+            self.file.write(TRACE_MAGIC)
+
+    def encode(self, string):
+        """
+        Get encoded string from cache
+
+        Parameters
+        ==========
+        string
+            String to encode, may be None
+        """
+        if string is None:
+            return b""
+        data = self.strings.get(string)
+        if data is None:
+            data = string.encode("utf-8")
+            self.strings[string] = data
+        return data
+
+    def record(self, pulse: DevicePulse, timestamp=None):
+        """
+        Append the pulse to the trace
+
+        Parameters
+        ==========
+        pulse
+            DevicePulse to record
+        timestamp
+            (Optional) Monotonic timestamp in nanoseconds, current time if not specified
+        """
+        if self.file is None:
+            return
+
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+
+        bind = self.encode(pulse.bind)
+        command = self.encode(pulse.command)
+        self.file.write(_record.pack(timestamp, _types.get(pulse.type, 255), _up.get(pulse.up, 2),
+                                     len(bind), len(command)))
+        self.file.write(bind)
+        self.file.write(command)
+
+        self.pending += 1
+        if self.pending >= self.flush_records or timestamp - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.file is None:
+            return
+        self.file.flush()
+        self.pending = 0
+        self.last_flush = time.monotonic_ns()
+
+    def close(self):
+        """
+        Flush and close the trace file
+        """
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        self.logger.info("Pulse trace saved to " + self.filename)
+
+
+def readTrace(filename):
+    """
+    Read the trace file, yields (timestamp, DevicePulse) tuples
+
+    Parameters
+    ==========
+    filename
+        Trace file
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError("Not a pulse trace file: " + filename)
+
+        while True:
+            header = f.read(_record.size)
+            if len(header) < _record.size:
+                # Truncated record is ignored (the app has crashed while writing)
+                return
+
+            timestamp, pulse_type, up, bind_len, command_len = _record.unpack(header)
+            data = f.read(bind_len + command_len)
+            if len(data) < bind_len + command_len:
+                return
+
+            yield timestamp, DevicePulse(
+                bind=data[:bind_len].decode("utf-8") if bind_len else None,
+                command=data[bind_len:].decode("utf-8") if command_len else None,
+                pulse_type=None if pulse_type == 255 else PulseTypes(pulse_type),
+                up=None if up == 2 else bool(up),
+            )
+
+
+def mergeSteps(trace):
+    """
+    Merge the consecutive encoder records of one coalesced pulse (same timestamp and command) back into one pulse with
+    the step count, returns a list of (timestamp, DevicePulse) tuples
+
+    Parameters
+    ==========
+    trace
+        (timestamp, DevicePulse) tuples from readTrace
+    """
+    merged = []
+    for timestamp, pulse in trace:
+        if merged and pulse.type == PulseTypes.ENCODER:
+            last_time, last = merged[-1]
+            if (last_time == timestamp and last.type == pulse.type and last.bind == pulse.bind
+                    and last.command == pulse.command and last.up == pulse.up):
+                last.steps += 1
+                continue
+        merged.append((timestamp, pulse))
+    return merged
+
+
+class PulseReplayer(QObject):
+    """
+    Feed the recorded trace back into ActionEngine.processCall. See benchmarks/replay_trace.py for a headless runner.
+    Replayed pulses have no capture timestamp, so the latency metrics ignore them. The detent rate is estimated from
+    the recorded timestamps shifted to a synthetic clock that starts at 0
+    """
+
+    finished = pyqtSignal()
+
+    max_stop_cycles = 10000
+    """
+    Maximum number of haptics engine cycles to run after the last pulse (immediate replay)
+    """
+
+    def __init__(self, engine, filename, speed=1.0):
+        """
+        Initialize PulseReplayer
+
+        Parameters
+        ==========
+        engine
+            ActionEngine instance
+        filename
+            Trace file
+        speed
+            Playback speed multiplier (1.0 - original speed). 0 or None replays the trace as fast as possible
+        """
+        super(PulseReplayer, self).__init__()
+        self.logger = logging.getLogger(__name__)
+        self.engine = engine
+        self.speed = speed
+        self.trace = mergeSteps(readTrace(filename))
+        self.pos = 0
+        self.recorder = None
+        self.clock_time = 0  # Synthetic clock (ns), the recorded timestamp of the last replayed pulse minus the first
+        self.pulseClock = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.nextPulse)
+
+    def start(self):
+        """
+        Start the playback
+        """
+        self.pos = 0
+        self.logger.info("Replaying " + str(len(self.trace)) + " pulses")
+
+        # Do not record the replayed pulses
+        self.recorder = self.engine.recorder
+        self.engine.recorder = None
+        # The detent rates are estimated on the synthetic clock, the rates of the live pulses are reset
+        self.clock_time = 0
+        self.pulseClock = self.engine.pulseClock
+        self.engine.pulseClock = self.syntheticClock
+        self.engine.detentRates.clear()
+        self.finished.connect(self.restoreEngine)
+
+        if not self.speed:
+            self.replayImmediate()
+            return
+
+        self.start_time = time.monotonic_ns()
+        self.scheduleNext()
+
+    def replayImmediate(self):
+        """
+        Replay the whole trace synchronously. Haptics engine cycles are simulated between pulses with fixed delta time,
+        so the result is deterministic
+        """
+        last_time = None
+        for timestamp, pulse in self.trace:
+            if last_time is not None:
+                self.simulateCycles((timestamp - last_time) / 1000000)
+            last_time = timestamp
+            self.clock_time = timestamp - self.trace[0][0]
+            self.engine.processCall(pulse)
+
+        # Let the wheel stop
+        for _ in range(self.max_stop_cycles):
+            if not self.engine.enablePulseCycle:
+                break
+            self.engine.pulseCycle(delta=self.refreshTime() / 1000)
+
+        self.pos = len(self.trace)
+        self.finished.emit()
+
+    def syntheticClock(self):
+        """
+        Detent rate clock of the engine during the replay (ns)
+        """
+        return self.clock_time
+
+    def refreshTime(self):
+        """
+        Get the nominal engine cycle time in milliseconds
+        """
+        if self.engine.linear_mode_enabled:
+            return self.engine.conf["acceleration"]["linearRefreshTime"]
+        return self.engine.conf["acceleration"]["pulseRefreshTime"]
+
+    def simulateCycles(self, gap_ms):
+        """
+        Run haptics engine cycles that would have happened in the given interval
+
+        Parameters
+        ==========
+        gap_ms
+            Time between two pulses in milliseconds
+        """
+        refresh = self.refreshTime()
+        for _ in range(int(gap_ms // refresh)):
+            if not self.engine.enablePulseCycle:
+                return
+            self.engine.pulseCycle(delta=refresh / 1000)
+
+    def scheduleNext(self):
+        if self.pos >= len(self.trace):
+            self.finished.emit()
+            return
+
+        first = self.trace[0][0]
+        offset = (self.trace[self.pos][0] - first) / self.speed
+        wait = (offset - (time.monotonic_ns() - self.start_time)) / 1000000
+        self.timer.start(max(int(wait), 0))
+
+    @pyqtSlot()
+    def nextPulse(self):
+        """
+        Emit all pulses that are due and schedule the next one
+        """
+        first = self.trace[0][0]
+        elapsed = time.monotonic_ns() - self.start_time
+
+        while self.pos < len(self.trace) and (self.trace[self.pos][0] - first) / self.speed <= elapsed:
+            self.clock_time = self.trace[self.pos][0] - first
+            self.engine.processCall(self.trace[self.pos][1])
+            self.pos += 1
+
+        self.scheduleNext()
+
+    @pyqtSlot()
+    def restoreEngine(self):
+        """
+        Restore the pulse recorder and the detent rate clock of the engine
+        """
+        self.finished.disconnect(self.restoreEngine)
+        self.engine.recorder = self.recorder
+        self.recorder = None
+        self.engine.pulseClock = self.pulseClock
+        self.pulseClock = None
+        self.engine.detentRates.clear()
+
+    def stop(self):
+        """
+        Stop the playback
+        """
+        if self.timer.isActive():
+            self.timer.stop()
+            self.finished.emit()
@@ -3,11 +3,29 @@ import time
 
 from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
 
+from smartwheel.api.action import DevicePulse
+
+
+def stamp(argument, timestamp):
+    """
+    Copy DevicePulse argument with the capture timestamp, other datatypes are returned as is
+
+    Parameters
+    ----------
+    argument
+        Signal argument
+    timestamp
+        Monotonic capture time in nanoseconds
+    """
+    if isinstance(argument, DevicePulse):
+        return argument.stamped(timestamp)
+    return argument
+
 
 class PRButton(QObject):
     """Press and release button"""
 
-    pressSignal = pyqtSignal(bool)
+    pressSignal = pyqtSignal(bool, object)
 
     def __init__(self, click_thresh, parent=None):
         """
@@ -35,6 +53,7 @@ class PRButton(QObject):
         self.state = "up"
         self.buttonType = "pressReleaseButton"
         self.click_thresh = click_thresh
+        self.timestamp = None  # Capture time of the last event
 
     def setupCallbacks(self, signals, arguments):
         """
@@ -61,10 +80,10 @@ class PRButton(QObject):
         down
             Is button pressed down
         """
-        self.pressSignal.emit(down)
+        self.pressSignal.emit(down, time.monotonic_ns())
 
-    @pyqtSlot(bool)
-    def press(self, down):
+    @pyqtSlot(bool, object)
+    def press(self, down, timestamp=None):
         """
         Press button signal (call execPress instead)
 
@@ -72,15 +91,18 @@ class PRButton(QObject):
         ----------
         down
             Is button pressed down
+        timestamp
+            Monotonic capture time in nanoseconds
         """
         up = not down
+        self.timestamp = timestamp
 
         if self.state == "up" and down:  # Unpressed
             self.state = "down_pre"  # Button down
             self.timer.stop()
             self.logger.debug("prbutton pressed down")
             if self.signals[0] is not None:
-                self.signals[0].emit(self.arguments[0])
+                self.signals[0].emit(stamp(self.arguments[0], timestamp))
 
         elif (
             self.state == "down_pre" and up
@@ -100,7 +122,7 @@ class PRButton(QObject):
             self.timer.stop()
             self.logger.debug("prbutton doubleclicked")
             if self.signals[2] is not None:
-                self.signals[2].emit(self.arguments[2])
+                self.signals[2].emit(stamp(self.arguments[2], timestamp))
 
         elif up:  # drop the state
             self.logger.debug("prbutton state reset")
@@ -116,13 +138,13 @@ class PRButton(QObject):
             self.logger.debug("prbutton clicked, timeout exceeded")
 
             if self.signals[1] is not None:
-                self.signals[1].emit(self.arguments[1])
+                self.signals[1].emit(stamp(self.arguments[1], self.timestamp))
 
 
 class ClickButton(QObject):
     """Simple click button without separate up and down events"""
 
-    pressSignal = pyqtSignal()
+    pressSignal = pyqtSignal(object)
 
     def __init__(self, click_thresh, parent=None):
         """
@@ -148,6 +170,7 @@ class ClickButton(QObject):
         self.state = "unpressed"
         self.buttonType = "clickButton"
         self.click_thresh = click_thresh
+        self.timestamp = None  # Capture time of the last event
 
     def setupCallbacks(self, signals, arguments):
         """
@@ -169,13 +192,19 @@ class ClickButton(QObject):
         """
         Press button event
         """
-        self.pressSignal.emit()
+        self.pressSignal.emit(time.monotonic_ns())
 
-    @pyqtSlot()
-    def press(self):
+    @pyqtSlot(object)
+    def press(self, timestamp=None):
         """
         Press button slot (call exec_press instead)
+
+        Parameters
+        ----------
+        timestamp
+            Monotonic capture time in nanoseconds
         """
+        self.timestamp = timestamp
         if self.state == "unpressed":  # single click
             self.state = "double_pre"
             self.timer.stop()
@@ -185,7 +214,7 @@ class ClickButton(QObject):
             self.state = "unpressed"
             self.timer.stop()
             if self.signals[1] is not None:
-                self.signals[1].emit(self.arguments[1])
+                self.signals[1].emit(stamp(self.arguments[1], timestamp))
 
     @pyqtSlot()
     def pressTimeout(self):
@@ -195,13 +224,13 @@ class ClickButton(QObject):
         if self.state == "double_pre":
             self.state = "unpressed"
             if self.signals[0] is not None:
-                self.signals[0].emit(self.arguments[0])
+                self.signals[0].emit(stamp(self.arguments[0], self.timestamp))
 
 
 class Rotary(QObject):
     """Simple rotary encoder with up and down events"""
 
-    rotateSignal = pyqtSignal(bool)
+    rotateSignal = pyqtSignal(bool, object)
 
     def __init__(self, prbutton, parent=None):
         """
@@ -238,7 +267,7 @@ class Rotary(QObject):
         self.signals = signals
         self.arguments = arguments
 
-    def callSignal(self, i, up):
+    def callSignal(self, i, up, timestamp=None):
         """
         Call the specified signal
 
@@ -248,16 +277,18 @@ class Rotary(QObject):
             Index of the clockwise (up) signal
         up
             Is the direction up
+        timestamp
+            Monotonic capture time in nanoseconds
         """
         if i + 1 > len(self.signals):
             self.logger.error("Could not call rotary event signal: no such index")
             return
         if up:
             if self.signals[i] is not None:
-                self.signals[i].emit(self.arguments[i])
+                self.signals[i].emit(stamp(self.arguments[i], timestamp))
         else:
             if self.signals[i + 1] is not None:
-                self.signals[i + 1].emit(self.arguments[i + 1])
+                self.signals[i + 1].emit(stamp(self.arguments[i + 1], timestamp))
 
     def execRotate(self, up):
         """
@@ -268,10 +299,10 @@ class Rotary(QObject):
         up
             Is the direction up (up - clockwise)
         """
-        self.rotateSignal.emit(up)
+        self.rotateSignal.emit(up, time.monotonic_ns())
 
-    @pyqtSlot(bool)
-    def rotate(self, up):
+    @pyqtSlot(bool, object)
+    def rotate(self, up, timestamp=None):
         """
         Rotation signal (call execRotate instead)
 
@@ -279,10 +310,12 @@ class Rotary(QObject):
         ----------
         up
             Is the direction up (up - clockwise)
+        timestamp
+            Monotonic capture time in nanoseconds
         """
         if self.btn is None:  # No linked btn
             self.logger.debug("rotary scrolled")
-            self.callSignal(0, up)
+            self.callSignal(0, up, timestamp)
 
         elif (
             self.btn.state == "up" or self.btn.state == "click_pre"
@@ -290,7 +323,7 @@ class Rotary(QObject):
             self.btn.state = "up"
             self.btn.timer.stop()
             self.logger.debug("rotary scrolled")
-            self.callSignal(0, up)
+            self.callSignal(0, up, timestamp)
 
         elif (
             self.btn.state == "down_pre" or self.btn.state == "down"
@@ -298,13 +331,13 @@ class Rotary(QObject):
             self.btn.state = "down"  # the next up event won't trigger anything
             self.btn.timer.stop()
             self.logger.debug("rotary scrolled with click")
-            self.callSignal(2, up)
+            self.callSignal(2, up, timestamp)
 
         elif self.btn.state == "double_pre" or self.btn.state == "double":
             self.btn.state = "double"  # the next up event won't trigger anything
             self.btn.timer.stop()
             self.logger.debug("rotary scrolled with doubleclick")
-            self.callSignal(4, up)
+            self.callSignal(4, up, timestamp)
 
 
 class ConnPipe(QThread):
@@ -25,7 +25,7 @@ class SConn(ConnPipe):
         self.conf = None
         self.logger = logging.getLogger(__name__)
         self.config_file = config_file
-        self.call = Classes.ActionEngine().callAction
+        self.call = Classes.ActionEngine().pulseQueue
         self.loadConfig()
         self.loadKeys()
 
@@ -86,7 +86,7 @@ class SConn(ConnPipe):
 
             self.encoders[enc["name"]] = Rotary(self.prbuttons[enc["linkedButton"]])
             self.encoders[enc["name"]].setupCallbacks(
-                [self.call] * 6,  # Classes.ActionEngine().callAction
+                [self.call] * 6,  # Classes.ActionEngine().pulseQueue
                 [
                     DevicePulse(bind=enc["name"], command=x, pulse_type=PulseTypes.ENCODER, up=(i % 2 == 0))
                     for i, x in enumerate([
@@ -112,7 +112,7 @@ class SConn(ConnPipe):
         k = str(key).strip("\'")
 
         if self.keys["keyboards"].get(k) is not None:
-            self.call.emit(self.keys["keyboards"][k])
+            self.call.emit(self.keys["keyboards"][k].stamped())
 
         if self.keys["prbuttons"].get(k) is not None:
             btn = self.keys["prbuttons"][k]
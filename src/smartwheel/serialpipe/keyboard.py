@@ -1,7 +1,10 @@
+import time
+
 from PyQt6.QtCore import *
 
 from smartwheel.serialpipe.base import ConnPipe
 from smartwheel.api.app import Classes
+from smartwheel.api.action import DevicePulse, PulseTypes
 from smartwheel import config
 
 
@@ -20,7 +23,7 @@ class SConn(ConnPipe):
         super().__init__()
         self.conf = None
         self.config_file = config_file
-        self.call = Classes.ActionEngine().callAction
+        self.call = Classes.ActionEngine().pulseQueue
         self.loadConfig()
 
     def loadConfig(self):
@@ -29,7 +32,7 @@ class SConn(ConnPipe):
 
     def findKey(self, key):
         """
-        Returns command tuple by key
+        Returns stamped DevicePulse by key
 
         Parameters
         ----------
@@ -39,26 +42,41 @@ class SConn(ConnPipe):
         for b in self.conf["binds"]:
             for c in b["commands"]:
                 if c["string"] == key:
-                    return b, c
+                    return DevicePulse(bind=b["name"], command=c["string"],
+                                       pulse_type=PulseTypes.BUTTON if b["type"] == "button" else PulseTypes.ENCODER,
+                                       up=c.get("up"), timestamp=time.monotonic_ns())
 
         return None
 
+    def emitKey(self, key):
+        """
+        Emit the pulse of the key if it's bound
+
+        Parameters
+        ----------
+        key
+            String containing the key
+        """
+        pulse = self.findKey(key)
+        if pulse is not None:
+            self.call.emit(pulse)
+
     def handleKeypress(self, event):
         """
         Keypress handler, called from main thread
         """
         if event.key() == Qt.Key_W:
-            self.call.emit(self.findKey("w"))
+            self.emitKey("w")
         elif event.key() == Qt.Key_A:
-            self.call.emit(self.findKey("a"))
+            self.emitKey("a")
         elif event.key() == Qt.Key_Up:
-            self.call.emit(self.findKey("up"))
+            self.emitKey("up")
         elif event.key() == Qt.Key_Down:
-            self.call.emit(self.findKey("down"))
+            self.emitKey("down")
         elif event.key() == Qt.Key_Return:
-            self.call.emit(self.findKey("return"))
+            self.emitKey("return")
         elif event.key() == Qt.Key_Escape:
-            self.call.emit(self.findKey("esc"))
+            self.emitKey("esc")
 
     def run(self):
         """
@@ -1,9 +1,11 @@
 import logging
+import time
 
 import serial
 from PyQt6.QtCore import *
 
 from smartwheel import config
+from smartwheel.configsnapshot import copyJson
 from smartwheel.serialpipe.base import ConnPipe
 from smartwheel.api.app import Classes
 from smartwheel.api.action import DevicePulse, PulseTypes
@@ -16,7 +18,7 @@ class SConn(ConnPipe):
         super().__init__()
         self.conf = None
         self.config_file = config_file
-        self.call = Classes.ActionEngine().callAction
+        self.call = Classes.ActionEngine().pulseQueue
         self.logger = logging.getLogger(__name__)
         self.loadConfig()
 
@@ -25,6 +27,46 @@ class SConn(ConnPipe):
             config_file=self.config_file, logger=self.logger, varsWhitelist=["binds"]
         )
         self.conf.loadConfig()
+        # The serial thread reads only the snapshots, the first one is published in the GUI thread
+        self.conf.snapshot()
+        self.binds = None
+        self.loadKeys()
+        self.conf.updated.connect(self.onConfigUpdated)
+
+    @pyqtSlot()
+    def onConfigUpdated(self):
+        """
+        Rebuild the pulses if the binds are edited in settings
+        """
+        if self.conf["binds"] != self.binds:
+            self.loadKeys()
+
+    def loadKeys(self):
+        """
+        Build device pulses for all serial commands, the pulses are reused for each call.
+        The tables are replaced at once, the serial thread keeps reading the old ones until then
+        """
+        keys = {}
+        coalesce = {}  # Only encoder commands are coalesced
+        for b in self.conf["binds"]:
+            for c in b["commands"]:
+                pulse = DevicePulse(bind=b["name"], command=c["string"])
+
+                if b["type"] == "button":
+                    pulse.type = PulseTypes.BUTTON
+                else:
+                    pulse.type = PulseTypes.ENCODER
+
+                if c.get("up") is not None:
+                    pulse.up = bool(c["up"])
+
+                keys.setdefault(c["string"], []).append(pulse)
+                coalesce[c["string"]] = all(x.type == PulseTypes.ENCODER for x in keys[c["string"]])
+
+        # Settings modify the binds in place, a copy is kept to detect the changes
+        self.binds = copyJson(self.conf["binds"])
+        self.keys = keys
+        self.coalesce = coalesce
 
     def serialCall(self, string):
         """
@@ -35,50 +77,84 @@ class SConn(ConnPipe):
         string
             Command from serial
         """
-        # l = string.split()
-        string = string.decode("utf-8").strip()
-        self.logger.debug(string)
-        if string == "":
-            return
-        cmd = []
-        for b in self.conf["binds"]:
-            for c in b["commands"]:
-                if c["string"] == string:
-                    pulse = DevicePulse()
-                    pulse.bind = b["name"]
-                    pulse.command = c["string"]
+        self.serialRead([string])
 
-                    if b["type"] == "button":
-                        pulse.type = PulseTypes.BUTTON
-                    else:
-                        pulse.type = PulseTypes.ENCODER
+    def serialRead(self, lines, timestamp=None):
+        """
+        Parse all lines received in one read. Repeated encoder commands are coalesced into one pulse with the step count
+
+        Parameters
+        ----------
+        lines
+            Lines from serial
+        timestamp
+            (Optional) Monotonic capture time in nanoseconds, current time if not specified
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+
+        last = None
+        count = 0
+        for line in lines:
+            string = line.decode("utf-8").strip()
+            self.logger.debug(string)
+            if string == "":
+                continue
+
+            if string == last:
+                count += 1
+                continue
 
-                    if c.get("up") is not None:
-                        if c["up"]:
-                            pulse.up = True
-                        else:
-                            pulse.up = False
+            if last is not None:
+                self.emitCommand(last, count, timestamp)
 
-                    cmd.append(pulse)
+            if self.coalesce.get(string):
+                last = string
+                count = 1
+            else:
+                last = None
+                self.emitCommand(string, 1, timestamp)
 
-        if cmd:
-            for c in cmd:
-                self.call.emit(c)
+        if last is not None:
+            self.emitCommand(last, count, timestamp)
+
+    def emitCommand(self, string, steps, timestamp):
+        """
+        Emit pulses of the command
+
+        Parameters
+        ----------
+        string
+            Command string
+        steps
+            Number of repeats
+        timestamp
+            Monotonic capture time in nanoseconds
+        """
+        for pulse in self.keys.get(string, ()):
+            # Prebuilt pulses are shared, the counter and the timestamp are stored in a copy
+            self.call.emit(pulse.stamped(timestamp, steps))
 
     def run(self):
         """
         Reads for serial data from device and executes actions
         """
         # TODO move to another module
+        conf = self.conf.snapshot()
         tm = None
-        if self.conf["useTimeout"]:
-            tm = self.conf["timeout"]
+        if conf["useTimeout"]:
+            tm = conf["timeout"]
         try:
             with serial.Serial(
-                self.conf["device"], self.conf["baudRate"], timeout=tm
+                conf["device"], conf["baudRate"], timeout=tm
             ) as s:
                 while self.isRunning() and s.is_open:
-                    self.serialCall(s.readline())
+                    lines = [s.readline()]
+                    timestamp = time.monotonic_ns()
+                    # Read the rest of the burst
+                    while s.in_waiting:
+                        lines.append(s.readline())
+                    self.serialRead(lines, timestamp)
         except BaseException as e:
             self.logger.error(e)
             return
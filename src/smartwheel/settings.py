@@ -126,24 +126,20 @@ class SettingsWindow(QWidget):
 
         if self.conf.get("tabs") is not None:
             for i in range(len(self.conf["tabs"])):
-                with open(
+                self.conf["tabs"][i]["conf"] = common.config_snapshot.load(
                     os.path.join(
                         self.basedir,
                         "settings_registry",
                         self.conf["tabs"][i]["config"],
-                    ),
-                    "r",
-                ) as f:
-                    self.conf["tabs"][i]["conf"] = json.load(f)
+                    )
+                )
 
             for key, value in self.conf["external"].items():
-                with open(
+                self.external_reg[key] = common.config_snapshot.load(
                     os.path.join(
                         self.basedir, "settings_registry", "external", key + ".json"
-                    ),
-                    "r",
-                ) as f:
-                    self.external_reg[key] = json.load(f)
+                    )
+                )
                 self.external_reg[key]["extra"] = self.conf["external"][key]
 
     def setConfigHook(self, main_class, conf):
@@ -1,3 +1,4 @@
+import copy
 import logging
 
 from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot
@@ -354,6 +355,9 @@ class ActionList(BaseHandler):
         )
         if not exists:
             elem_bind = [{"command": elem["command"], "actions": []}]
+        else:
+            # Edit a copy, the setter compares it with the live value and emits the update only if it has changed
+            elem_bind = copy.deepcopy(elem_bind)
 
         found = False
         for i, e in enumerate(elem_bind):
@@ -0,0 +1,226 @@
+import json
+import os
+import sqlite3
+import threading
+
+from smartwheel.configwriter import atomicDump
+
+
+class JsonStorage:
+    """
+    Default storage: every config is a json file. Reads go through the config snapshot cache
+    """
+
+    def __init__(self, snapshot=None):
+        """
+        Initialize JsonStorage
+
+        Parameters
+        ==========
+        snapshot
+            (Optional) configsnapshot.SnapshotCache used for the reads
+        """
+        self.snapshot = snapshot
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def read(self, path):
+        """
+        Read the config, returns a dict that is not shared
+
+        Parameters
+        ==========
+        path
+            Config file
+        """
+        if self.snapshot is not None:
+            return self.snapshot.load(path)
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def write(self, path, data):
+        """
+        Write the config atomically
+
+        Parameters
+        ==========
+        path
+            Config file
+        data
+            Config dict
+        """
+        atomicDump(path, data)
+
+
+class SqliteStorage:
+    """
+    Single-file storage of the configs in an SQLite database. Top-level keys of a config are stored as rows,
+    a write updates only the changed rows in one transaction.
+
+    Only the configs under the root dir (user config dir) are stored in the database, other files (defaults,
+    settings registries) are read from json. Configs that are missing in the database are imported from their json
+    files on the first access, exportJson() writes them back to the json layout
+    """
+
+    def __init__(self, filename, root, fallback=None):
+        """
+        Open or create the database
+
+        Parameters
+        ==========
+        filename
+            Database file
+        root
+            Dir of the configs stored in the database, paths are stored relative to it
+        fallback
+            (Optional) Storage of the other files, JsonStorage by default
+        """
+        self.filename = filename
+        self.root = os.path.abspath(root)
+        self.fallback = fallback if fallback is not None else JsonStorage()
+        self.lock = threading.Lock()
+        self.names = {}  # path -> database name
+
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        # Saves are executed on the config writer thread
+        self.db = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (path TEXT, key TEXT, pos INTEGER, value TEXT, "
+            "PRIMARY KEY (path, key)) WITHOUT ROWID"
+        )
+
+    def name(self, path):
+        """
+        Get the database name of the config file, None if the file is not stored in the database
+
+        Parameters
+        ==========
+        path
+            Config file
+        """
+        try:
+            return self.names[path]
+        except KeyError:
+            pass
+
+        abspath = os.path.abspath(path)
+        if os.path.commonpath([abspath, self.root]) != self.root:
+            name = None
+        else:
+            name = os.path.relpath(abspath, self.root).replace(os.sep, "/")
+        self.names[path] = name
+        return name
+
+    def stored(self, name):
+        return self.db.execute("SELECT 1 FROM files WHERE path = ?", (name,)).fetchone() is not None
+
+    def exists(self, path):
+        name = self.name(path)
+        if name is None:
+            return self.fallback.exists(path)
+        with self.lock:
+            if self.stored(name):
+                return True
+        return os.path.exists(path)
+
+    def read(self, path):
+        """
+        Read the config, returns a dict that is not shared. The json file is imported if the config is not stored yet
+
+        Parameters
+        ==========
+        path
+            Config file
+        """
+        name = self.name(path)
+        if name is None:
+            return self.fallback.read(path)
+
+        with self.lock:
+            # The rows are assembled into one json object by SQLite, a single decode is much faster than one per row
+            text, = self.db.execute(
+                "SELECT json_group_object(key, json(value)) FROM "
+                "(SELECT key, value FROM entries WHERE path = ? ORDER BY pos)", (name,)
+            ).fetchone()
+            if text != "{}" or self.stored(name):
+                return json.loads(text)
+
+        with open(path, "r") as f:
+            data = json.load(f)
+        self.write(path, data)
+        return data
+
+    def write(self, path, data):
+        """
+        Write the changed top-level keys of the config in one transaction
+
+        Parameters
+        ==========
+        path
+            Config file
+        data
+            Config dict
+        """
+        name = self.name(path)
+        if name is None:
+            self.fallback.write(path, data)
+            return
+        if not isinstance(data, dict):
+            raise ValueError("Only dict configs can be stored in the database: " + path)
+
+        rows = [(key, pos, json.dumps(value)) for pos, (key, value) in enumerate(data.items())]
+        with self.lock:
+            old = {key: (pos, value) for key, pos, value in self.db.execute(
+                "SELECT key, pos, value FROM entries WHERE path = ?", (name,))}
+            changed = [(name, key, pos, value) for key, pos, value in rows if old.get(key) != (pos, value)]
+            removed = [(name, key) for key in old.keys() - data.keys()]
+
+            self.db.execute("BEGIN")
+            try:
+                self.db.execute("INSERT OR IGNORE INTO files (path) VALUES (?)", (name,))
+                if changed:
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO entries (path, key, pos, value) VALUES (?, ?, ?, ?)", changed
+                    )
+                if removed:
+                    self.db.executemany("DELETE FROM entries WHERE path = ? AND key = ?", removed)
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def importJson(self, paths):
+        """
+        Import json configs into the database, replacing the stored ones
+
+        Parameters
+        ==========
+        paths
+            Config files
+        """
+        for path in paths:
+            with open(path, "r") as f:
+                self.write(path, json.load(f))
+
+    def exportJson(self):
+        """
+        Write all stored configs to their json files, returns the list of the files
+        """
+        with self.lock:
+            names = [name for name, in self.db.execute("SELECT path FROM files")]
+
+        paths = []
+        for name in names:
+            path = os.path.join(self.root, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomicDump(path, self.read(path))
+            paths.append(path)
+        return paths
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,14 +1,87 @@
 # from PyQt6.QtGui import *
-from PyQt6.QtCore import QObject
+from PyQt6.QtCore import QObject, QRectF
+from PyQt6.QtGui import QRegion
 
 
 class BaseUIElem(QObject):
+    dirtyTracking = False
+    """
+    Set to True by the elements that call markDirty() on every visual change. The canvas then repaints only
+    their dirty region while they are the only thing that changes, other elements are repainted with the whole canvas
+    """
+
     def __init__(self):
         super().__init__()
-        pass
+        self.dirty = True
+        self.dirty_region = QRegion()
 
     def loadConfig(self):
         pass
 
     def draw(self, qp, offset=None):
         pass
+
+    def boundingRect(self):
+        """
+        Canvas rect (QRect or QRectF) of everything the element draws, None if it's not known
+        """
+        return None
+
+    def markDirty(self, rect=None):
+        """
+        Mark the element for repaint
+
+        Parameters
+        ==========
+        rect
+            (Optional) Changed canvas area: QRect, QRectF or QRegion. The bounding rect by default
+        """
+        self.dirty = True
+        if self.dirty_region is None:
+            return
+        if rect is None:
+            rect = self.boundingRect()
+        if rect is None:
+            self.dirty_region = None
+        elif isinstance(rect, QRegion):
+            self.dirty_region = self.dirty_region.united(rect)
+        else:
+            if isinstance(rect, QRectF):
+                rect = rect.toAlignedRect()
+            self.dirty_region = self.dirty_region.united(QRegion(rect))
+
+    def markClean(self):
+        """
+        Called by the canvas after the element is drawn
+        """
+        self.dirty = False
+        self.dirty_region = QRegion()
+
+    def needsRepaint(self):
+        return self.dirty or not self.dirtyTracking
+
+    def repaintRegion(self):
+        """
+        Canvas region to repaint (empty if the element is clean), None for the whole canvas
+        """
+        if not self.dirtyTracking:
+            return None
+        return self.dirty_region
+
+    def visibleIn(self, region):
+        """
+        Check if the element has to be drawn in the repainted region
+
+        Parameters
+        ==========
+        region
+            Repainted QRegion of the canvas, None for the whole canvas
+        """
+        if region is None or not self.dirtyTracking:
+            return True
+        rect = self.boundingRect()
+        if rect is None:
+            return True
+        if isinstance(rect, QRectF):
+            rect = rect.toAlignedRect()
+        return region.intersects(rect)
@@ -37,6 +37,8 @@ class Internal(BaseInternal):
     def loadConfig(self):
         self.conf = config.Config(config_file=self.config_file)
         self.conf.loadConfig()
+        # The server thread reads only the snapshots, the first one is published in the GUI thread
+        self.conf.snapshot()
 
     def getSignals(self):
         return self.signals
@@ -60,7 +62,7 @@ class Internal(BaseInternal):
             self.socket_type = socket.AF_INET
 
         self.sock = socket.socket(self.socket_type, socket.SOCK_STREAM)
-        self.sock.settimeout(self.conf["socketTimeout"])
+        self.sock.settimeout(self.conf.snapshot()["socketTimeout"])
         while self.isRunning:
             try:
                 self.sock.bind(self.socket_addr)
@@ -68,7 +70,7 @@ class Internal(BaseInternal):
                 return True
             except BaseException as e:
                 self.logger.error(e)
-                time.sleep(self.conf["errorTimeout"])
+                time.sleep(self.conf.snapshot()["errorTimeout"])
 
     @pyqtSlot(str)
     def send(self, data):
@@ -16,13 +16,15 @@ class ThreadWrapper(QObject):
 
 
 class UIThread(QRunnable):
-    def __init__(self, sleep_ms):
+    def __init__(self, conf):
         super(UIThread, self).__init__()
         self.wrapper = ThreadWrapper()
         self.unix_meta_old = ""
         self.unix_track_meta_old = []
         self.last_text = []
-        self.sleep_ms = sleep_ms
+        self.conf = conf
+        # The first snapshot is published in the GUI thread, the thread reads only the snapshots
+        conf.snapshot()
         self.shutdown = False
 
     @pyqtSlot()
@@ -48,7 +50,7 @@ class UIThread(QRunnable):
                 self.wrapper.update.emit(res)
                 self.last_text = res
 
-            time.sleep(self.sleep_ms)
+            time.sleep(self.conf.snapshot()["mediaFetchSleep"])
 
     def fetchMediaWin(self):
         return ["--", "--", "--", "--"]
@@ -105,6 +107,7 @@ class UIThread(QRunnable):
 
 class UIElem(BaseUIElem):
     updateSignal = pyqtSignal()
+    dirtyTracking = True
 
     def __init__(self, config_file, WConfig):
         super().__init__()
@@ -112,7 +115,7 @@ class UIElem(BaseUIElem):
         self.loadConfig()
         merge_dicts(self.conf, WConfig)
         self.icon_path = self.conf["icon_path"]
-        self.thread = UIThread(self.conf["mediaFetchSleep"])
+        self.thread = UIThread(self.conf)
         self.thread.wrapper.update.connect(self.updateText)
         self.text = ["--", "--", "--", "--"]
 
@@ -147,8 +150,25 @@ class UIElem(BaseUIElem):
     @pyqtSlot(list)
     def updateText(self, text):
         self.text = text
+        self.markDirty()
         self.updateSignal.emit()
 
+    def boundingRect(self):
+        # The icon and the three text lines (drawText clips the text to its rect), as of the last draw
+        text = QRectF(
+            self.conf["cx"] - self.text_width / 2.0,
+            self.conf["cy"] - self.text_height / 2.0,
+            self.text_width,
+            self.text_height * 3,
+        )
+        icon = QRectF(
+            self.conf["cx"] - self.pix_width // 2,
+            self.conf["cy"] - self.pix_height * 1.5,
+            self.pix_width,
+            self.pix_height,
+        )
+        return text.united(icon).adjusted(-1, -1, 1, 1)
+
     def drawText(self, qp, color, t_font, size, pos, text):
         pen = QPen(QColor(color))
         font = QFont(t_font, size)
@@ -1,4 +1,4 @@
-from PyQt6.QtCore import pyqtSignal, QPoint
+from PyQt6.QtCore import pyqtSignal, QPoint, QRect
 from PyQt6.QtGui import QPen, QBrush, QColor
 
 from smartwheel import config, gui_tools
@@ -11,6 +11,7 @@ from rtmidi.midiconstants import CONTROL_CHANGE
 
 class UIElem(BaseUIElem):
     updateSignal = pyqtSignal()
+    dirtyTracking = True
 
     def __init__(self, config_file, WConfig):
         super().__init__()
@@ -49,13 +50,21 @@ class UIElem(BaseUIElem):
         if not self.midiout.is_port_open():
             return
         if event["call"] == CommandActions.scroll:
+            old = self.cur
             if pulse.up:
                 self.cur = min(self.max_pos, self.cur + self.conf["steps"])
             else:
                 self.cur = max(self.min_pos, self.cur - self.conf["steps"])
+            if self.cur != old:
+                self.markDirty()
 
         self.midiout.send_message([CONTROL_CHANGE, self.conf["controlChangeType"], self.cur])
 
+    def boundingRect(self):
+        # The largest indicator, with a pixel for antialiasing
+        r = self.max_pos // 4 + 1
+        return QRect(self.conf["cx"] - r, self.conf["cy"] - r, 2 * r + 1, 2 * r + 1)
+
     def draw(self, qp, offset=None):
         pen = QPen(QColor(self.conf["indicatorColor"]))
         brush = QBrush(QColor(self.conf["indicatorColor"]))
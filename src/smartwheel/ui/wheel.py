@@ -8,7 +8,7 @@ from queue import LifoQueue
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
-from smartwheel import config, gui_tools
+from smartwheel import config, flightrecorder, gui_tools
 from smartwheel.tools import merge_dicts
 from smartwheel.ui.base import BaseUIElem
 from smartwheel.api.app import Classes
@@ -48,10 +48,22 @@ class Section:
 
     def draw_module(self, qp, opacity):
         if self.module is not None and self.module["class"] is not None:
+            module = self.module["class"]
+            if isinstance(module, BaseUIElem) and not module.visibleIn(self.parent().parent().paint_region):
+                # Outside of the repainted region
+                return
+
+            rec = flightrecorder.recorder
+            if rec is not None:
+                rec.begin(flightrecorder.EventKinds.DRAW, self.module["name"])
+
             qp.setOpacity(opacity)
             self.module["class"].draw(qp, self.parent()._sections_pos)
             qp.setOpacity(1.0)
 
+            if rec is not None:
+                rec.end(flightrecorder.EventKinds.DRAW, self.module["name"])
+
     def update_vars(self):
         self.delta = self.parent()._angle - self.init_angle
 
@@ -125,6 +137,8 @@ class Section:
 
 
 class UIElem(BaseUIElem):
+    dirtyTracking = True
+
     def __init__(self, config_file, WConfig, modules, force_update, parent=None):
         super().__init__()
         self.parent = parent
@@ -144,6 +158,11 @@ class UIElem(BaseUIElem):
         self._sections_pos = 0
         self.global_shadow = False
         self.wheelUp = LifoQueue()
+        # Cached layers, see blitLayer. The sections and the overlays rotate with the wheel, they are drawn directly
+        self.layers = {
+            "selection": gui_tools.PixmapLayer(self.layerRender(self.drawSelectionRing)),
+            "wheel": gui_tools.PixmapLayer(self.layerRender(self.drawWheelDisk)),
+        }
 
     def _set_angle(self, a):
         self._angle = a
@@ -170,6 +189,31 @@ class UIElem(BaseUIElem):
 
     def drawSelection(self, circleWidth, circleHeight):
         # Draw selection wheel
+        if not self.conf["renderCache"]:
+            self.drawSelectionWheel(circleWidth)
+            return
+
+        self.blitLayer("selection", (
+            self.conf["width"],
+            self.conf["height"],
+            self.conf["selectionWheelFG"],
+            self.conf["selectionWheelBG"],
+        ))
+        self.drawSections(self.conf["width"], circleWidth)
+
+    def drawSelectionWheel(self, circleWidth=None):
+        """
+        Draw the selection wheel: the ring, the sections and the pointer
+        """
+        if circleWidth is None:
+            circleWidth = self.wheel_size[0]
+        self.drawSelectionRing()
+        self.drawSections(self.conf["width"], circleWidth)
+
+    def drawSelectionRing(self):
+        """
+        Draw the background of the selection wheel (selection layer)
+        """
         width = self.conf["width"]
         height = self.conf["height"]
 
@@ -181,7 +225,47 @@ class UIElem(BaseUIElem):
             QPointF(self.conf["cx"], self.conf["cy"]), width / 2.0, height / 2.0
         )
 
-        self.drawSections(width, circleWidth)
+    def layerSize(self):
+        """
+        Size of the layer pixmaps: the canvas area up to the bottom right corner of the wheel with the pointer.
+        The layers start at the canvas origin, so the brush patterns stay aligned with the direct drawing
+        """
+        margin = abs(self.conf["pointerMargin"]) + 4
+        return (
+            math.ceil(self.conf["corner_x"] + self.conf["width"] + margin),
+            math.ceil(self.conf["corner_y"] + self.conf["height"] + margin),
+        )
+
+    def layerRender(self, draw):
+        """
+        Wrap the draw method into the render function of PixmapLayer, the method draws with self.qp
+        """
+        def render(qp):
+            canvas_qp = self.qp
+            self.qp = qp
+            try:
+                draw()
+            finally:
+                self.qp = canvas_qp
+        return render
+
+    def blitLayer(self, name, key):
+        """
+        Draw the cached layer with the current painter opacity, the layer is rendered first if its key is changed.
+        The key holds everything the layer depends on besides the geometry. Only the layers that do not depend on the
+        wheel angle are cached, a layer re-rendered on every animation frame costs more than direct drawing
+
+        Parameters
+        ==========
+        name
+            Layer name
+        key
+            Layer state (see gui_tools.PixmapLayer)
+        """
+        width, height = self.layerSize()
+        key = (key, self.conf["cx"], self.conf["cy"], self.conf["corner_x"], self.conf["corner_y"])
+        pixmap = self.layers[name].get(key, width, height, self.qp.device().devicePixelRatioF())
+        self.qp.drawPixmap(0, 0, pixmap)
 
     def scrollModule(self, up):
         old_selection = self.cur_section
@@ -192,7 +276,19 @@ class UIElem(BaseUIElem):
         self.sections[self.cur_section].is_selected = True
         self.sections[old_selection].is_selected = False
 
+    def needsRepaint(self):
+        """
+        The wheel is repainted while it's changed or animated
+        """
+        return (
+                self.dirty
+                or self.anim.state() == QAbstractAnimation.State.Running
+                or self.shadow_anim.state() == QAbstractAnimation.State.Running
+                or self.sections_anim.state() == QAbstractAnimation.State.Running
+        )
+
     def processKey(self, pulse: Pulse):
+        self.markDirty()
         if pulse.click and pulse.up is not None:
             self.wheelUp.put(pulse.up)
             self.startShadowAnimation()
@@ -224,11 +320,29 @@ class UIElem(BaseUIElem):
         # self.sections_timer.singleShot(self.conf["sectionsHideTimeout"] + self.conf["sectionsAnimationDuration"], self.hideSections)
         # self.startSectionsAnimation(True)
 
+    def applySnapshot(self, snapshot):
+        """
+        Set the wheel angle from ActionEngine snapshot (engine thread mode)
+
+        Parameters
+        ==========
+        snapshot
+            actionengine.EngineSnapshot, may be None
+        """
+        if snapshot is None or self.is_sections_hidden:
+            return
+        angle = snapshot.angle + self.conf["selectionAngle"]
+        if angle != self._angle:
+            self._angle = angle
+            self.markDirty()
+
     def openWheel(self):
+        self.markDirty()
         self.sections_timer.stop()
         self.showSections()
 
     def selectModule(self):
+        self.markDirty()
         self.sections_timer.stop()
         self.hideSections()
 
@@ -236,6 +350,7 @@ class UIElem(BaseUIElem):
         if not pulse.click:
             return
 
+        self.markDirty()
         # self.scrollModule(up)
         self.wheelUp.put(pulse.up)
 
@@ -271,6 +386,7 @@ class UIElem(BaseUIElem):
         self.cur_section = 0
 
     def resetUI(self):
+        self.markDirty()
         for i in range(len(self.sections)):
             self.sections[i].is_selected = False
         self.sections[0].is_selected = True
@@ -467,6 +583,28 @@ class UIElem(BaseUIElem):
 
     def drawMainWheel(self, circleWidth, circleHeight):
         # Draw main wheel
+        if self.conf["renderCache"]:
+            brush = self.parent().brushes.get(self.conf["backgroundStyle"])
+            # Brushes are modified in place on settings changes, the copy keeps the old state for the comparison
+            self.blitLayer("wheel", (
+                circleWidth,
+                circleHeight,
+                self.conf["bgWheelColor"],
+                self.conf["wheelTextureColor"],
+                self.conf["drawWheelCircle"],
+                None if brush is None else QBrush(brush),
+            ))
+        else:
+            self.drawWheelDisk(circleWidth, circleHeight)
+
+        self.drawOverlays(1 - self._opacity / 255, circleWidth)
+
+    def drawWheelDisk(self, circleWidth=None, circleHeight=None):
+        """
+        Draw the textured wheel disk (wheel layer with the default arguments)
+        """
+        if circleWidth is None:
+            circleWidth, circleHeight = self.wheel_size
         color = self.conf["bgWheelColor"]
         if self.conf["drawWheelCircle"]:
             color = self.conf["wheelTextureColor"]
@@ -495,53 +633,73 @@ class UIElem(BaseUIElem):
             circleHeight / 2.0,
         )
         # self.qp.setOpacity(1.0)
-        self.drawOverlays(1 - self._opacity / 255, circleWidth)
 
     def drawOverlays(self, opacity, circleWidth):
-        brush = QBrush(QColor(self.conf["overlayCirclesColor"]))
-
-        self.qp.setBrush(brush)
+        circles_angle = (self._angle - 225.0) / 4.0
+        rects_angle = (self._angle - 225) / 6
 
         if self.conf["drawOverlayCircles"]:
-            self.qp.setPen(QPen(QColor(self.conf["overlayCirclesColor"])))
             self.qp.setOpacity(opacity * self.conf["overlayCirclesOpacity"])
-
-            for i in range(0, 360, 360 // 10):
-                self.qp.drawEllipse(
-                    QPointF(
-                        self.conf["cx"] + math.cos(math.radians(i + (self._angle - 225.0) / 4.0)) * circleWidth / 3,
-                        self.conf["cy"] + math.sin(math.radians(i + (self._angle - 225.0) / 4.0)) * circleWidth / 3,
-                    ),
-                    self.conf["overlayCirclesWidth"],
-                    self.conf["overlayCirclesWidth"],
-                )
+            self.drawOverlayCircles(circleWidth, circles_angle)
 
         if self.conf["drawOverlayRects"]:
-            self.qp.setPen(
-                QPen(
-                    QColor(self.conf["overlayRectsColor"]),
-                    self.conf["overlayRectsWidth"],
-                    Qt.PenStyle.SolidLine,
-                )
-            )
             self.qp.setOpacity(self.conf["overlayRectsOpacity"] * opacity)
-
-            for i in range(0, 360, 360 // 6):
-                cx = math.cos(math.radians(i + (self._angle - 225) / 6))
-                cy = math.sin(math.radians(i + (self._angle - 225) / 6))
-                self.qp.drawLine(
-                    QPointF(
-                        self.conf["cx"] + cx * circleWidth * 0.3,
-                        self.conf["cy"] + cy * circleWidth * 0.3,
-                    ),
-                    QPointF(
-                        self.conf["cx"] + cx * circleWidth * 0.45,
-                        self.conf["cy"] + cy * circleWidth * 0.45,
-                    ),
-                )
+            self.drawOverlayRects(circleWidth, rects_angle)
 
         self.qp.setOpacity(1.0)
 
+    def drawOverlayCircles(self, circleWidth=None, angle=None):
+        """
+        Draw the overlay circles
+        """
+        if circleWidth is None:
+            circleWidth = self.wheel_size[0]
+        if angle is None:
+            angle = (self._angle - 225.0) / 4.0
+        color = QColor(self.conf["overlayCirclesColor"])
+        self.qp.setBrush(QBrush(color))
+        self.qp.setPen(QPen(color))
+
+        for i in range(0, 360, 360 // 10):
+            self.qp.drawEllipse(
+                QPointF(
+                    self.conf["cx"] + math.cos(math.radians(i + angle)) * circleWidth / 3,
+                    self.conf["cy"] + math.sin(math.radians(i + angle)) * circleWidth / 3,
+                ),
+                self.conf["overlayCirclesWidth"],
+                self.conf["overlayCirclesWidth"],
+            )
+
+    def drawOverlayRects(self, circleWidth=None, angle=None):
+        """
+        Draw the overlay rects
+        """
+        if circleWidth is None:
+            circleWidth = self.wheel_size[0]
+        if angle is None:
+            angle = (self._angle - 225) / 6
+        self.qp.setPen(
+            QPen(
+                QColor(self.conf["overlayRectsColor"]),
+                self.conf["overlayRectsWidth"],
+                Qt.PenStyle.SolidLine,
+            )
+        )
+
+        for i in range(0, 360, 360 // 6):
+            cx = math.cos(math.radians(i + angle))
+            cy = math.sin(math.radians(i + angle))
+            self.qp.drawLine(
+                QPointF(
+                    self.conf["cx"] + cx * circleWidth * 0.3,
+                    self.conf["cy"] + cy * circleWidth * 0.3,
+                ),
+                QPointF(
+                    self.conf["cx"] + cx * circleWidth * 0.45,
+                    self.conf["cy"] + cy * circleWidth * 0.45,
+                ),
+            )
+
     def draw(self, qp, offset=None):
         if self.anim.state() == QAbstractAnimation.State.Stopped:
             self.is_scroll_anim_running = False
@@ -567,6 +725,7 @@ class UIElem(BaseUIElem):
             circleHeight = (self.conf["height"] * 3) // 4 + self._sections_pos
 
         self.qp = qp
+        self.wheel_size = (circleWidth, circleHeight)
 
         self.drawSelection(circleWidth, circleHeight)
 